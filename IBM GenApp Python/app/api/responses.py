@@ -0,0 +1,175 @@
+"""JSON / MessagePack response rendering for the API routers.
+
+`FastJSONResponse` renders with orjson, else msgspec, else the standard
+library, whichever is installed first. Dates and datetimes are written
+natively in ISO format, so list endpoints can hand it plain dicts built from
+row tuples and skip FastAPI's ``jsonable_encoder`` by returning the response
+object themselves. Routes with a ``response_model`` keep FastAPI's own
+pydantic serialization.
+
+With the optional ``msgpack`` package installed, clients sending
+``Accept: application/msgpack`` get MessagePack instead (same structure, dates
+as ISO strings) and may send request bodies as ``Content-Type:
+application/msgpack``. `app.api.routing.GenappRoute` negotiates per request:
+`FastJSONResponse` then packs its content directly, other JSON responses of the
+route are transcoded. Error responses stay JSON.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import decimal
+import json
+import uuid
+from contextvars import ContextVar
+from typing import Any
+
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+
+
+def _default(value: Any) -> Any:
+    """Fallback for types the backend does not know (same results as ``jsonable_encoder``)."""
+    if isinstance(value, decimal.Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (dt.date, dt.datetime, dt.time)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, bytes)):
+        return value.decode() if isinstance(value, bytes) else str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+try:
+    import orjson
+
+    BACKEND = "orjson"
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+except ImportError:  # pragma: no cover - depends on the environment
+    try:
+        import msgspec
+
+        BACKEND = "msgspec"
+        _encoder = msgspec.json.Encoder(enc_hook=_default)
+
+        def dumps(content: Any) -> bytes:
+            return _encoder.encode(content)
+
+    except ImportError:
+        BACKEND = "json"
+
+        def dumps(content: Any) -> bytes:
+            return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+try:
+    import orjson as _json_decoder
+except ImportError:  # pragma: no cover - depends on the environment
+    _json_decoder = json
+
+try:
+    import msgpack
+except ImportError:  # optional: pip install msgpack
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+
+# format negotiated for the current request (set by GenappRoute)
+negotiated: ContextVar[str] = ContextVar("genapp_response_format", default=JSON)
+
+
+def packb(content: Any) -> bytes:
+    return msgpack.packb(content, default=_default, use_bin_type=True, datetime=False)
+
+
+def unpackb(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False)
+
+
+def negotiate(accept: str | None) -> str:
+    """`MSGPACK` if the client prefers it over JSON (and msgpack is installed), else `JSON`."""
+    if not accept or msgpack is None:
+        return JSON
+    best_pack = best_json = 0.0
+    first = None
+    for part in accept.split(","):
+        media, _, params = part.strip().partition(";")
+        media = media.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if media in MSGPACK_TYPES:
+            best_pack = max(best_pack, q)
+            first = first or MSGPACK
+        elif media == JSON:
+            best_json = max(best_json, q)
+            first = first or JSON
+    if best_pack > best_json or (best_pack and best_pack == best_json and first == MSGPACK):
+        return MSGPACK
+    return JSON
+
+
+def is_msgpack(content_type: str | None) -> bool:
+    return bool(content_type) and content_type.split(";", 1)[0].strip().lower() in MSGPACK_TYPES
+
+
+class FastJSONResponse(JSONResponse):
+    def __init__(self, content: Any, *args, **kwargs) -> None:
+        self.format = negotiated.get()
+        if self.format == MSGPACK:
+            self.media_type = MSGPACK
+        super().__init__(content, *args, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        return packb(content) if self.format == MSGPACK else dumps(content)
+
+
+def transcode(response: Response) -> Response:
+    """Re-encode a JSON response (pydantic fast path, plain JSONResponse) as MessagePack."""
+    if getattr(response, "format", None) == MSGPACK or not hasattr(response, "body"):
+        return response
+    if response.headers.get("content-type", "").split(";", 1)[0] != JSON or not response.body:
+        return response
+    response.body = packb(_json_decoder.loads(response.body))
+    response.headers["content-type"] = MSGPACK
+    response.headers["content-length"] = str(len(response.body))
+    return response
+
+
+def recode(body: bytes, content_type: str | None, fmt: str) -> tuple[bytes, str] | None:
+    """Re-encode a stored JSON or MessagePack body as ``fmt``; None if it already is (or is neither)."""
+    if not body:
+        return None
+    if fmt == MSGPACK and (content_type or "").split(";", 1)[0].strip().lower() == JSON:
+        return packb(_json_decoder.loads(body)), MSGPACK
+    if fmt == JSON and is_msgpack(content_type):
+        return dumps(unpackb(body)), JSON
+    return None
+
+
+class MsgpackRequest(Request):
+    """Request whose body is MessagePack; FastAPI reads it through `json`."""
+
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = unpackb(await self.body())
+        return self._json
+
+
+def msgpack_request(request: Request) -> Request:
+    if msgpack is None:
+        raise HTTPException(status_code=415, detail="application/msgpack wird nicht unterstützt (Paket msgpack fehlt)")
+    # FastAPI only parses bodies declared as JSON
+    headers = [(k, v) for k, v in request.scope["headers"] if k != b"content-type"]
+    headers.append((b"content-type", JSON.encode()))
+    return MsgpackRequest({**request.scope, "headers": headers}, request.receive)
@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+
+from app.api.responses import FastJSONResponse
+from app.api.routing import GenappRoute
+from app.db import counts, retention, snapshot
+from app.db.session import engine
+from app.services import rating
+from app.utils import profiling
+from app.utils.admin import require_admin
+
+
+router = APIRouter(route_class=GenappRoute, default_response_class=FastJSONResponse, dependencies=[Depends(require_admin)])
+
+
+@router.get("/api/admin/profiling")
+def api_get_profiling():
+    return {"enabled": profiling.state.enabled, "mode": profiling.state.mode}
+
+
+@router.put("/api/admin/profiling")
+def api_set_profiling(enabled: bool, mode: str | None = None):
+    if mode is not None:
+        if mode not in profiling.MODES:
+            raise HTTPException(status_code=400, detail=f"mode muss einer von {', '.join(profiling.MODES)} sein")
+        profiling.state.mode = mode
+    profiling.state.enabled = enabled
+    return {"enabled": profiling.state.enabled, "mode": profiling.state.mode}
+
+
+@router.get("/api/admin/profiles")
+def api_list_profiles():
+    return profiling.store.list()
+
+
+@router.get("/api/admin/profiles/{name}")
+def api_download_profile(name: str):
+    path = profiling.store.path_for(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media_type = "text/plain" if path.suffix == ".collapsed" else "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=name)
+
+
+@router.get("/api/admin/snapshot")
+def api_get_snapshot():
+    return snapshot.state.as_dict()
+
+
+@router.post("/api/admin/snapshot")
+def api_refresh_snapshot():
+    if snapshot.live_path() is None:
+        raise HTTPException(status_code=400, detail="Snapshots benötigen eine SQLite-Datei als DATABASE_URL")
+    return snapshot.refresh().as_dict()
+
+
+@router.post("/api/admin/counts/reconcile")
+def api_reconcile_counts():
+    return counts.reconcile(engine)
+
+
+@router.get("/api/admin/events/compaction")
+def api_get_compaction():
+    return {**retention.state.as_dict(), "archives": [p.name for p in retention.archives()]}
+
+
+@router.post("/api/admin/events/compaction")
+def api_run_compaction():
+    if retention.archive_dir() is None:
+        raise HTTPException(status_code=400, detail="Archive benötigen GENAPP_EVENTS_ARCHIVE_DIR oder eine SQLite-Datei als DATABASE_URL")
+    return retention.compact().as_dict()
+
+
+@router.post("/api/admin/rating/rerate")
+def api_rerate_motor_book(dry_run: bool = False):
+    return rating.rerate_book(dry_run=dry_run).as_dict()
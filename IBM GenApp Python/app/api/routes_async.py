@@ -0,0 +1,258 @@
+"""Coroutine variants of the JSON API routes (enabled with ``GENAPP_ASYNC_API=1``).
+
+The router is included before the sync routers, so matching paths are served here;
+everything not listed (UI pages, typed policy detail updates, admin) falls
+through to the sync handlers.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from app.api.responses import FastJSONResponse
+from app.api.routes_policies import _parse_optional_int
+from app.api.routing import GenappRoute
+from app.db.session import get_async_db
+from app.schemas.claims import ClaimCreate, ClaimOut, ClaimUpdate
+from app.schemas.customers import CustomerCreate, CustomerOut, CustomerUpdate, CustomerSecurityIn, CustomerSecurityOut
+from app.schemas.policies import (
+    PolicyCreate,
+    PolicyOut,
+    PolicyUpdate,
+    MotorPolicyCreate,
+    HousePolicyCreate,
+    EndowmentPolicyCreate,
+    CommercialPolicyCreate,
+)
+from app.services import aio as svc
+from app.utils.errors import CobolError, http_exception_for
+
+
+router = APIRouter(route_class=GenappRoute, default_response_class=FastJSONResponse)
+
+
+# Customers
+@router.get("/api/customers", response_model=list[CustomerOut])
+async def api_list_customers(
+    name: str | None = None,
+    postcode: str | None = None,
+    limit: int = 100,
+    offset: int = 0,
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        return await svc.list_customers(db, limit=limit, offset=offset, name=name, postcode=postcode)
+    except CobolError as exc:
+        raise http_exception_for(exc.code, exc.message)
+
+
+@router.post("/api/customers", response_model=CustomerOut, status_code=201)
+async def api_create_customer(data: CustomerCreate, db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await svc.create_customer(db, data)
+    except CobolError as exc:
+        raise http_exception_for(exc.code, exc.message)
+
+
+@router.get("/api/customers/{customer_id}", response_model=CustomerOut)
+async def api_get_customer(customer_id: int, db: AsyncSession = Depends(get_async_db)):
+    obj = await svc.get_customer(db, customer_id)
+    if not obj:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    return obj
+
+
+@router.put("/api/customers/{customer_id}", response_model=CustomerOut)
+async def api_update_customer(customer_id: int, data: CustomerUpdate, db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await svc.update_customer(db, customer_id, data)
+    except CobolError as exc:
+        raise http_exception_for(exc.code, exc.message)
+
+
+@router.get("/api/customers/{customer_id}/security", response_model=CustomerSecurityOut)
+async def api_get_customer_security(customer_id: int, rotate: bool = False, db: AsyncSession = Depends(get_async_db)):
+    try:
+        if rotate:
+            obj = await svc.rotate_customer_security(db, customer_id)
+        else:
+            obj = await svc.get_customer_security(db, customer_id)
+    except CobolError as exc:
+        raise http_exception_for(exc.code, exc.message)
+    if not obj:
+        raise HTTPException(status_code=404, detail="Customer or security not found")
+    return obj
+
+
+@router.put("/api/customers/{customer_id}/security", response_model=CustomerSecurityOut)
+async def api_set_customer_security(
+    customer_id: int,
+    data: CustomerSecurityIn,
+    rotate: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+):
+    try:
+        if rotate and not data.model_dump(exclude_unset=True):
+            obj = await svc.rotate_customer_security(db, customer_id)
+        else:
+            obj = await svc.set_customer_security(db, customer_id, data)
+    except CobolError as exc:
+        raise http_exception_for(exc.code, exc.message)
+    if not obj:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    return obj
+
+
+# Policies
+@router.get("/api/policies", response_model=list[PolicyOut])
+async def api_list_policies(
+    policy_type: str | None = None,
+    customer_id: str | None = Query(default=None),
+    active_only: bool = False,
+    postcode: str | None = None,
+    limit: int = 100,
+    offset: int = 0,
+    db: AsyncSession = Depends(get_async_db),
+):
+    parsed_customer_id, _ = _parse_optional_int(customer_id, field_label="customer_id", raise_error=True)
+    try:
+        return await svc.list_policies(
+            db,
+            policy_type=policy_type,
+            customer_id=parsed_customer_id,
+            active_only=active_only,
+            postcode=postcode,
+            limit=limit,
+            offset=offset,
+        )
+    except CobolError as exc:
+        raise http_exception_for(exc.code, exc.message)
+
+
+@router.get("/api/policies/detailed")
+async def api_list_policies_detailed(
+    policy_type: str | None = None,
+    customer_id: str | None = Query(default=None),
+    active_only: bool = False,
+    postcode: str | None = None,
+    page: int | None = None,
+    limit: int = 100,
+    offset: int = 0,
+    db: AsyncSession = Depends(get_async_db),
+):
+    if page and page > 0:
+        offset = (page - 1) * limit
+    parsed_customer_id, _ = _parse_optional_int(customer_id, field_label="customer_id", raise_error=True)
+    try:
+        rows = await svc.list_policies_detailed(
+            db,
+            policy_type=policy_type,
+            customer_id=parsed_customer_id,
+            active_only=active_only,
+            postcode=postcode,
+            limit=limit,
+            offset=offset,
+        )
+        return FastJSONResponse(rows)
+    except CobolError as exc:
+        raise http_exception_for(exc.code, exc.message)
+
+
+@router.post("/api/policies", response_model=PolicyOut, status_code=201)
+async def api_create_policy(data: PolicyCreate, db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await svc.create_policy(db, data)
+    except CobolError as exc:
+        raise http_exception_for(exc.code, exc.message)
+
+
+@router.post("/api/policies/motor", response_model=PolicyOut, status_code=201)
+async def api_create_policy_motor(data: MotorPolicyCreate, db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await svc.create_policy_motor(db, data)
+    except CobolError as exc:
+        raise http_exception_for(exc.code, exc.message)
+
+
+@router.post("/api/policies/house", response_model=PolicyOut, status_code=201)
+async def api_create_policy_house(data: HousePolicyCreate, db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await svc.create_policy_house(db, data)
+    except CobolError as exc:
+        raise http_exception_for(exc.code, exc.message)
+
+
+@router.post("/api/policies/endowment", response_model=PolicyOut, status_code=201)
+async def api_create_policy_endowment(data: EndowmentPolicyCreate, db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await svc.create_policy_endowment(db, data)
+    except CobolError as exc:
+        raise http_exception_for(exc.code, exc.message)
+
+
+@router.post("/api/policies/commercial", response_model=PolicyOut, status_code=201)
+async def api_create_policy_commercial(data: CommercialPolicyCreate, db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await svc.create_policy_commercial(db, data)
+    except CobolError as exc:
+        raise http_exception_for(exc.code, exc.message)
+
+
+@router.put("/api/policies/{policy_id}", response_model=PolicyOut)
+async def api_update_policy(policy_id: int, data: PolicyUpdate, db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await svc.update_policy(db, policy_id, data)
+    except CobolError as exc:
+        raise http_exception_for(exc.code, exc.message)
+
+
+# Claims
+@router.get("/api/claims", response_model=list[ClaimOut])
+async def api_list_claims(
+    policy_id: Optional[int] = None,
+    page: Optional[int] = None,
+    limit: int = 100,
+    offset: int = 0,
+    db: AsyncSession = Depends(get_async_db),
+):
+    if page and page > 0:
+        offset = (page - 1) * limit
+    try:
+        return FastJSONResponse(await svc.list_claims(db, policy_id=policy_id, limit=limit, offset=offset, rows=True))
+    except CobolError as exc:
+        raise http_exception_for(exc.code, exc.message)
+
+
+@router.post("/api/claims", response_model=ClaimOut, status_code=201)
+async def api_create_claim(data: ClaimCreate, db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await svc.create_claim(db, data)
+    except CobolError as exc:
+        raise http_exception_for(exc.code, exc.message)
+
+
+@router.get("/api/claims/{claim_id}", response_model=ClaimOut)
+async def api_get_claim(claim_id: int, db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await svc.get_claim(db, claim_id)
+    except CobolError as exc:
+        raise http_exception_for(exc.code, exc.message)
+
+
+@router.put("/api/claims/{claim_id}", response_model=ClaimOut)
+async def api_update_claim(claim_id: int, data: ClaimUpdate, db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await svc.update_claim(db, claim_id, data)
+    except CobolError as exc:
+        raise http_exception_for(exc.code, exc.message)
+
+
+# Events
+@router.get("/api/events")
+async def api_list_events(
+    source: Optional[str] = None,
+    level: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0,
+    db: AsyncSession = Depends(get_async_db),
+):
+    return FastJSONResponse(await svc.list_events(db, source=source, level=level, limit=limit, offset=offset, rows=True))
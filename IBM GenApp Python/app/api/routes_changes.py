@@ -0,0 +1,71 @@
+import asyncio
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.api.responses import FastJSONResponse
+from app.api.routing import GenappRoute
+from app.db import outbox
+from app.db.session import SessionLocal, get_db
+from app.schemas.changes import ConsumerOut, ConsumerPosition
+from app.services import changes as svc
+from app.utils.errors import CobolError, http_exception_for
+
+
+router = APIRouter(route_class=GenappRoute, default_response_class=FastJSONResponse)
+
+# Long-poll: upper bound for ?wait=, and how long to keep collecting after the first wake-up
+CHANGES_MAX_WAIT = float(os.getenv("GENAPP_CHANGES_MAX_WAIT_S", "30"))
+CHANGES_BATCH_WINDOW = float(os.getenv("GENAPP_CHANGES_BATCH_MS", "50")) / 1000.0
+# the commit signal is per process: re-read at least this often to see other workers' commits
+CHANGES_POLL = float(os.getenv("GENAPP_CHANGES_POLL_MS", "500")) / 1000.0
+
+
+def _read(after: Optional[int], consumer: Optional[str], limit: int, entity_type: Optional[str]) -> tuple[int, list[dict]]:
+    with SessionLocal() as db:
+        if after is None:
+            stored = svc.get_consumer(db, consumer) if consumer else None
+            after = stored.position if stored else 0
+        return after, svc.list_changes(db, after=after, limit=limit, entity_type=entity_type)
+
+
+@router.get("/api/changes")
+async def api_list_changes(
+    after: Optional[int] = None,
+    consumer: Optional[str] = None,
+    limit: int = 500,
+    wait: float = 0,
+    entity_type: Optional[str] = None,
+):
+    """Change feed after ``after`` (or the stored position of ``consumer``); ``wait`` long-polls when empty."""
+    limit = max(1, min(limit, 5000))
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + min(max(wait, 0), CHANGES_MAX_WAIT)
+    seen = outbox.state.commits
+    try:
+        after, items = await run_in_threadpool(_read, after, consumer, limit, entity_type)
+        while not items and (remaining := deadline - loop.time()) > 0:
+            if await outbox.signal.wait(lambda: outbox.state.commits > seen, min(remaining, CHANGES_POLL)):
+                # let concurrent commits land so the consumer gets one batch instead of many
+                await asyncio.sleep(CHANGES_BATCH_WINDOW)
+            seen = outbox.state.commits
+            after, items = await run_in_threadpool(_read, after, consumer, limit, entity_type)
+    except CobolError as exc:
+        raise http_exception_for(exc.code, exc.message)
+    return {"changes": items, "after": after, "next_after": items[-1]["seq"] if items else after}
+
+
+@router.get("/api/changes/consumers", response_model=list[ConsumerOut])
+def api_list_consumers(db: Session = Depends(get_db)):
+    return svc.list_consumers(db)
+
+
+@router.put("/api/changes/consumers/{name}", response_model=ConsumerOut)
+def api_set_consumer_position(name: str, data: ConsumerPosition, db: Session = Depends(get_db)):
+    try:
+        return svc.set_consumer_position(db, name, data.position)
+    except CobolError as exc:
+        raise http_exception_for(exc.code, exc.message)
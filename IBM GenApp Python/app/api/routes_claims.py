@@ -1,17 +1,22 @@
 from fastapi import APIRouter, Depends, Request, Form, HTTPException
 from fastapi.responses import RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from typing import Optional
 
+from app.api.responses import FastJSONResponse
+from app.api.routing import GenappRoute
+from app.api.templating import templates
 from app.db.session import get_db
+from app.services import bulk as bulk_svc
 from app.services import claims as svc
+from app.services import events as event_svc
+from app.schemas.bulk import BulkChange, BulkUpdateOut
 from app.schemas.claims import ClaimCreate, ClaimOut, ClaimUpdate
+from app.schemas.events import EventOut
 from app.utils.errors import CobolError, http_exception_for
 
 
-router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
+router = APIRouter(route_class=GenappRoute, default_response_class=FastJSONResponse)
 
 
 @router.get("/api/claims", response_model=list[ClaimOut])
@@ -25,7 +30,8 @@ def api_list_claims(
     if page and page > 0:
         offset = (page - 1) * limit
     try:
-        return svc.list_claims(db, policy_id=policy_id, limit=limit, offset=offset)
+        # rows rendered directly (JSON or MessagePack); response_model documents the shape
+        return FastJSONResponse(svc.list_claims(db, policy_id=policy_id, limit=limit, offset=offset, rows=True))
     except CobolError as exc:
         raise http_exception_for(exc.code, exc.message)
 
@@ -46,6 +52,11 @@ def api_get_claim(claim_id: int, db: Session = Depends(get_db)):
         raise http_exception_for(exc.code, exc.message)
 
 
+@router.get("/api/claims/{claim_id}/history", response_model=list[EventOut])
+def api_claim_history(claim_id: int, limit: int = 100, offset: int = 0, db: Session = Depends(get_db)):
+    return event_svc.entity_history(db, "claim", claim_id, limit=limit, offset=offset)
+
+
 @router.put("/api/claims/{claim_id}", response_model=ClaimOut)
 def api_update_claim(claim_id: int, data: ClaimUpdate, db: Session = Depends(get_db)):
     try:
@@ -54,6 +65,14 @@ def api_update_claim(claim_id: int, data: ClaimUpdate, db: Session = Depends(get
         raise http_exception_for(exc.code, exc.message)
 
 
+@router.patch("/api/claims", response_model=BulkUpdateOut, response_model_exclude_none=True)
+def api_bulk_update_claims(items: list[BulkChange], db: Session = Depends(get_db)):
+    try:
+        return bulk_svc.update_claims(db, [item.model_dump() for item in items])
+    except CobolError as exc:
+        raise http_exception_for(exc.code, exc.message)
+
+
 @router.get("/claims")
 def ui_list_claims(
     request: Request,
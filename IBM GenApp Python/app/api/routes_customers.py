@@ -1,17 +1,20 @@
 from fastapi import APIRouter, Depends, Request, Form, HTTPException
 from fastapi.responses import RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from typing import Optional
 
+from app.api.responses import FastJSONResponse
+from app.api.routing import GenappRoute
+from app.api.templating import templates
 from app.db.session import get_db
 from app.schemas.customers import CustomerCreate, CustomerOut, CustomerUpdate, CustomerSecurityIn, CustomerSecurityOut
+from app.schemas.events import EventOut
 from app.services import customers as svc
+from app.services import events as event_svc
 from app.utils.errors import CobolError, http_exception_for
 
 
-router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
+router = APIRouter(route_class=GenappRoute, default_response_class=FastJSONResponse)
 
 
 # JSON API
@@ -48,6 +51,11 @@ def api_get_customer(customer_id: int, db: Session = Depends(get_db)):
     return obj
 
 
+@router.get("/api/customers/{customer_id}/history", response_model=list[EventOut])
+def api_customer_history(customer_id: int, limit: int = 100, offset: int = 0, db: Session = Depends(get_db)):
+    return event_svc.entity_history(db, "customer", customer_id, limit=limit, offset=offset)
+
+
 @router.put("/api/customers/{customer_id}", response_model=CustomerOut)
 def api_update_customer(customer_id: int, data: CustomerUpdate, db: Session = Depends(get_db)):
     try:
@@ -1,14 +1,26 @@
-from fastapi import APIRouter, Depends, Request
-from fastapi.templating import Jinja2Templates
+from fastapi import APIRouter, Depends, Header, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from datetime import date
 from typing import Optional
+import json
+import os
 
-from app.db.session import get_db
+from app.api.responses import FastJSONResponse
+from app.api.routing import GenappRoute
+from app.api.templating import templates
+from app.db import eventbus
+from app.db.session import SessionLocal, get_db
 from app.services import events as svc
 
 
-router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
+router = APIRouter(route_class=GenappRoute, default_response_class=FastJSONResponse)
+
+# SSE: comment line after this many idle seconds, client reconnect delay, rows per gap-fill query
+STREAM_KEEPALIVE = float(os.getenv("GENAPP_SSE_KEEPALIVE_S", "15"))
+STREAM_RETRY_MS = int(os.getenv("GENAPP_SSE_RETRY_MS", "3000"))
+STREAM_FILL_LIMIT = 500
 
 
 @router.get("/events")
@@ -44,5 +56,90 @@ def api_list_events(
     offset: int = 0,
     db: Session = Depends(get_db),
 ):
-    return svc.list_events(db, source=source, level=level, limit=limit, offset=offset)
+    # column dicts rendered directly, without jsonable_encoder
+    return FastJSONResponse(svc.list_events(db, source=source, level=level, limit=limit, offset=offset, rows=True))
+
+
+
+@router.get("/api/events/rollups")
+def api_list_event_rollups(
+    source: Optional[str] = None,
+    level: Optional[str] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    db: Session = Depends(get_db),
+):
+    return svc.list_rollups(db, source=source, level=level, since=since, until=until)
+
+
+def _latest_event_id() -> int:
+    with SessionLocal() as db:
+        return svc.latest_event_id(db)
+
+
+def _stream_fill(last_id: int, source: Optional[str], level: Optional[str]) -> tuple[list[dict], int, bool]:
+    """Events after ``last_id`` from the database, the id they are complete up to and whether the gap is closed."""
+    with SessionLocal() as db:
+        high = svc.latest_event_id(db)
+        rows = svc.events_after(db, last_id, until_id=high, source=source, level=level, limit=STREAM_FILL_LIMIT)
+        items = [eventbus.as_payload(row) for row in rows]
+    if len(items) == STREAM_FILL_LIMIT:
+        return items, items[-1]["id"], False
+    return items, max(high, last_id), True
 
+
+def _sse(item: dict) -> str:
+    return f"id: {item['id']}\nevent: audit\ndata: {json.dumps(item, separators=(',', ':'))}\n\n"
+
+
+@router.get("/api/events/stream")
+async def api_stream_events(
+    request: Request,
+    source: Optional[str] = None,
+    level: Optional[str] = None,
+    last_event_id: Optional[int] = None,
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """Server-Sent Events from the in-process buffer; the database is only read to close gaps."""
+    if last_event_id_header and last_event_id_header.isdigit():
+        last_event_id = int(last_event_id_header)
+    if last_event_id is None:
+        last_event_id = eventbus.buffer.last_id()
+        if last_event_id is None:
+            last_event_id = await run_in_threadpool(_latest_event_id)
+
+    def wanted(item: dict) -> bool:
+        return (not source or item["source"] == source) and (not level or item["level"] == level)
+
+    async def stream():
+        last_id = last_event_id
+        yield f"retry: {STREAM_RETRY_MS}\n\n"
+        stale = False
+        while not await request.is_disconnected():
+            items, covered = eventbus.buffer.since(last_id)
+            if stale or not covered:
+                stale = False
+                rows, last_id, complete = await run_in_threadpool(_stream_fill, last_id, source, level)
+                for row in rows:
+                    yield _sse(row)
+                if not complete:
+                    continue
+                items, covered = eventbus.buffer.since(last_id)
+                if items and not covered:
+                    continue  # another hole after the filled range
+            for item in items:
+                if wanted(item):
+                    yield _sse(item)
+                last_id = max(last_id, item["id"])
+            await eventbus.buffer.wait(last_id, STREAM_KEEPALIVE)
+            if (eventbus.buffer.last_id() or 0) <= last_id:
+                # idle: events written outside this process only show up in the database
+                stale = await run_in_threadpool(_latest_event_id) > last_id
+                if not stale:
+                    yield ": keepalive\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,11 +1,15 @@
 from fastapi import APIRouter, Depends, Request, Form, HTTPException, Query
 from fastapi.responses import RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from typing import Optional
 import json
 
+from app.api.responses import FastJSONResponse
+from app.api.routing import GenappRoute
+from app.api.templating import templates
 from app.db.session import get_db
+from app.schemas.bulk import BulkChange, BulkUpdateOut
+from app.schemas.events import EventOut
 from app.schemas.policies import (
     PolicyCreate,
     PolicyOut,
@@ -16,12 +20,13 @@ from app.schemas.policies import (
     CommercialPolicyCreate,
 )
 from app.services import policies as svc
+from app.services import bulk as bulk_svc
+from app.services import events as event_svc
 from app.services import customers as cust_svc
 from app.utils.errors import CobolError, http_exception_for
 
 
-router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
+router = APIRouter(route_class=GenappRoute, default_response_class=FastJSONResponse)
 
 
 def _parse_optional_int(value: str | int | None, *, field_label: str, raise_error: bool) -> tuple[int | None, str | None]:
@@ -82,14 +87,17 @@ def api_list_policies_detailed(
         offset = (page - 1) * limit
     parsed_customer_id, _ = _parse_optional_int(customer_id, field_label="customer_id", raise_error=True)
     try:
-        return svc.list_policies_detailed(
-            db,
-            policy_type=policy_type,
-            customer_id=parsed_customer_id,
-            active_only=active_only,
-            postcode=postcode,
-            limit=limit,
-            offset=offset,
+        # plain dicts: rendered directly, without jsonable_encoder
+        return FastJSONResponse(
+            svc.list_policies_detailed(
+                db,
+                policy_type=policy_type,
+                customer_id=parsed_customer_id,
+                active_only=active_only,
+                postcode=postcode,
+                limit=limit,
+                offset=offset,
+            )
         )
     except CobolError as exc:
         raise http_exception_for(exc.code, exc.message)
@@ -300,10 +308,10 @@ def ui_policy_edit_submit(
 ):
     try:
         with db.begin():
-            svc.update_policy(
+            current_policy, diff = svc.apply_policy_update(
                 db,
                 policy_id,
-                data=PolicyUpdate(
+                PolicyUpdate(
                     policy_number=policy_number,
                     issue_date=issue_date,
                     expiry_date=expiry_date,
@@ -312,14 +320,9 @@ def ui_policy_edit_submit(
                     payment=payment,
                     commission=commission,
                 ),
-                commit=False,
-                log=False,
             )
-            current_policy = svc.get_policy(db, policy_id)
-            if not current_policy:
-                raise CobolError("01", "Policy not found")
             if current_policy.policy_type == "M":
-                svc.update_policy_motor(
+                diff |= svc.update_policy_motor(
                     db,
                     policy_id,
                     make=make,
@@ -334,7 +337,7 @@ def ui_policy_edit_submit(
                     commit=False,
                 )
             elif current_policy.policy_type == "H":
-                svc.update_policy_house(
+                diff |= svc.update_policy_house(
                     db,
                     policy_id,
                     property_type=property_type,
@@ -346,7 +349,7 @@ def ui_policy_edit_submit(
                     commit=False,
                 )
             elif current_policy.policy_type == "E":
-                svc.update_policy_endowment(
+                diff |= svc.update_policy_endowment(
                     db,
                     policy_id,
                     with_profits=with_profits,
@@ -359,7 +362,7 @@ def ui_policy_edit_submit(
                     commit=False,
                 )
             elif current_policy.policy_type == "C":
-                svc.update_policy_commercial(
+                diff |= svc.update_policy_commercial(
                     db,
                     policy_id,
                     address=address,
@@ -380,7 +383,7 @@ def ui_policy_edit_submit(
                     reject_reason=reject_reason,
                     commit=False,
                 )
-        svc.log_policy_event(db, f"update policy id={policy_id}")
+        svc.log_policy_event(db, f"update policy id={policy_id}", policy_id=policy_id, action="update", diff=diff)
     except CobolError as exc:
         raise http_exception_for(exc.code, exc.message)
     return RedirectResponse(url=f"/policies/{policy_id}", status_code=303)
@@ -395,6 +398,11 @@ def ui_delete_policy(policy_id: int, db: Session = Depends(get_db)):
     return RedirectResponse(url="/policies", status_code=303)
 
 
+@router.get("/api/policies/{policy_id}/history", response_model=list[EventOut])
+def api_policy_history(policy_id: int, limit: int = 100, offset: int = 0, db: Session = Depends(get_db)):
+    return event_svc.entity_history(db, "policy", policy_id, limit=limit, offset=offset)
+
+
 @router.put("/api/policies/{policy_id}", response_model=PolicyOut)
 def api_update_policy(policy_id: int, data: PolicyUpdate, db: Session = Depends(get_db)):
     try:
@@ -403,6 +411,14 @@ def api_update_policy(policy_id: int, data: PolicyUpdate, db: Session = Depends(
         raise http_exception_for(exc.code, exc.message)
 
 
+@router.patch("/api/policies", response_model=BulkUpdateOut, response_model_exclude_none=True)
+def api_bulk_update_policies(items: list[BulkChange], db: Session = Depends(get_db)):
+    try:
+        return bulk_svc.update_policies(db, [item.model_dump() for item in items])
+    except CobolError as exc:
+        raise http_exception_for(exc.code, exc.message)
+
+
 @router.put("/api/policies/motor/{policy_id}")
 def api_update_policy_motor(
     policy_id: int,
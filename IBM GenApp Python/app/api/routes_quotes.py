@@ -0,0 +1,28 @@
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter
+
+from app.api.responses import FastJSONResponse
+from app.api.routing import GenappRoute
+from app.schemas.quotes import MotorQuoteBatch, MotorQuoteOut, MotorRisk
+from app.services import rating as svc
+from app.utils.errors import CobolError, http_exception_for
+
+
+router = APIRouter(route_class=GenappRoute, default_response_class=FastJSONResponse)
+
+
+@router.post("/api/quotes/motor", response_model=MotorQuoteOut)
+def api_quote_motor(risk: MotorRisk, as_of: Optional[date] = None):
+    return svc.quote(risk.model_dump(), as_of=as_of)
+
+
+@router.post("/api/quotes/motor/batch")
+def api_quote_motor_batch(data: MotorQuoteBatch):
+    try:
+        return FastJSONResponse(
+            svc.quote_batch([risk.model_dump() for risk in data.risks], as_of=data.as_of, explain=data.explain)
+        )
+    except CobolError as exc:
+        raise http_exception_for(exc.code, exc.message)
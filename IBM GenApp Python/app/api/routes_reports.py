@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.api.responses import FastJSONResponse
+from app.api.routing import GenappRoute
+from app.db import snapshot
+from app.services import reports as svc
+
+
+router = APIRouter(route_class=GenappRoute, default_response_class=FastJSONResponse)
+
+
+def _freshness(db: Session) -> dict:
+    data = snapshot.state.as_dict()
+    data["source"] = "snapshot" if db.info.get("snapshot") else "live"
+    return data
+
+
+def _freshness_headers(response: Response, db: Session) -> None:
+    info = _freshness(db)
+    response.headers["X-Snapshot-Source"] = info["source"]
+    if info["refreshed_at"]:
+        response.headers["X-Snapshot-Refreshed-At"] = info["refreshed_at"]
+
+
+@router.get("/api/reports/portfolio")
+def api_report_portfolio(response: Response, db: Session = Depends(snapshot.get_snapshot_db)):
+    _freshness_headers(response, db)
+    return {"snapshot": _freshness(db), "items": svc.portfolio_summary(db)}
+
+
+@router.get("/api/reports/claims")
+def api_report_claims(response: Response, db: Session = Depends(snapshot.get_snapshot_db)):
+    _freshness_headers(response, db)
+    return {"snapshot": _freshness(db), "items": svc.claims_summary(db)}
+
+
+@router.get("/api/reports/policies.csv")
+def api_export_policies(policy_type: Optional[str] = None):
+    # the stream outlives the request dependencies, so it owns its session
+    def rows():
+        with snapshot.snapshot_session() as db:
+            yield from svc.iter_policies_csv(db, policy_type=policy_type)
+
+    return StreamingResponse(
+        rows(),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="policies.csv"'},
+    )
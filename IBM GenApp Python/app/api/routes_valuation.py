@@ -0,0 +1,44 @@
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+
+from app.api.responses import FastJSONResponse, dumps
+from app.api.routing import GenappRoute
+from app.db import snapshot
+from app.services import valuation as svc
+
+
+router = APIRouter(route_class=GenappRoute, default_response_class=FastJSONResponse)
+
+
+@router.get("/api/valuation/endowment")
+def api_value_endowments(
+    valuation_date: Optional[date] = None,
+    batch_size: int = Query(default=svc.VALUATION_BATCH, ge=1, le=50_000),
+):
+    """Valued endowment book as NDJSON, one line per policy, written batch by batch."""
+    when = valuation_date or date.today()
+
+    # the stream outlives the request dependencies, so it owns its session
+    def lines():
+        with snapshot.snapshot_session() as db:
+            for batch in svc.iter_valuation(db, when, batch_size=batch_size):
+                yield b"".join(dumps(item) + b"\n" for item in batch)
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"X-Valuation-Date": when.isoformat()},
+    )
+
+
+@router.get("/api/valuation/endowment/summary")
+def api_value_endowments_summary(valuation_date: Optional[date] = None):
+    when = valuation_date or date.today()
+    totals = svc.ValuationTotals(valuation_date=when.isoformat())
+    with snapshot.snapshot_session() as db:
+        for batch in svc.iter_valuation(db, when):
+            totals.add(batch)
+    return totals.as_dict()
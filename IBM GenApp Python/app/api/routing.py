@@ -0,0 +1,32 @@
+from fastapi import Request
+from fastapi.routing import APIRoute
+
+from app.api import responses
+from app.utils import profiling
+
+
+class GenappRoute(APIRoute):
+    """Route class shared by all routers (hooks endpoint execution for profiling, negotiates JSON/MessagePack)."""
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, profiling.instrument(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def negotiated_handler(request: Request):
+            fmt = responses.negotiate(request.headers.get("accept"))
+            if responses.is_msgpack(request.headers.get("content-type")):
+                request = responses.msgpack_request(request)
+            token = responses.negotiated.set(fmt)
+            try:
+                response = await handler(request)
+            finally:
+                responses.negotiated.reset(token)
+            if fmt == responses.MSGPACK:
+                response = responses.transcode(response)
+            if responses.msgpack is not None and response.headers.get("content-type", "").startswith((responses.JSON, responses.MSGPACK)):
+                response.headers.append("vary", "Accept")
+            return response
+
+        return negotiated_handler
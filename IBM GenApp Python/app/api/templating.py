@@ -0,0 +1,7 @@
+"""Jinja2 environment shared by the UI routes."""
+from fastapi.templating import Jinja2Templates
+
+from app.utils.static import static_url
+
+templates = Jinja2Templates(directory="app/templates")
+templates.env.globals["static_url"] = static_url
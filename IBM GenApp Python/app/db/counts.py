@@ -0,0 +1,84 @@
+"""Incrementally maintained row counts (``entity_counts``) for the index page.
+
+An ``after_flush`` hook on every ORM session adds the number of inserted and
+deleted Customer/Policy/Claim/Event objects to ``entity_counts`` in the same
+transaction, so the dashboard reads four rows instead of running ``COUNT(*)``.
+Core bulk inserts and database-side cascades bypass the hook; those paths call
+`reconcile`, and a scheduled job (``GENAPP_COUNTS_RECONCILE_S``) corrects any
+remaining drift.
+"""
+from __future__ import annotations
+
+import os
+from collections import Counter
+
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.db import models
+
+
+RECONCILE_INTERVAL = float(os.getenv("GENAPP_COUNTS_RECONCILE_S", "600"))
+
+TRACKED = {
+    models.Customer: "customers",
+    models.Policy: "policies",
+    models.Claim: "claims",
+    models.Event: "events",
+}
+NAMES = tuple(TRACKED.values())
+
+
+def _count_stmt(model):
+    return select(func.count()).select_from(model).scalar_subquery()
+
+
+def add(db: Session | Connection, name: str, delta: int) -> None:
+    """Adjust a count inside the caller's transaction (for Core bulk writes)."""
+    if delta:
+        db.execute(
+            update(models.EntityCount)
+            .where(models.EntityCount.name == name)
+            .values(value=models.EntityCount.value + delta)
+        )
+
+
+@event.listens_for(Session, "after_flush")
+def _track_counts(session: Session, _flush_context) -> None:
+    deltas: Counter[str] = Counter()
+    for obj in session.new:
+        name = TRACKED.get(type(obj))
+        if name:
+            deltas[name] += 1
+    for obj in session.deleted:
+        name = TRACKED.get(type(obj))
+        if name:
+            deltas[name] -= 1
+    for name, delta in deltas.items():
+        add(session, name, delta)
+
+
+def ensure_rows(bind) -> None:
+    """Create missing count rows from a full count (first start or new table)."""
+    with bind.begin() as conn:
+        existing = set(conn.execute(select(models.EntityCount.name)).scalars())
+        for model, name in TRACKED.items():
+            if name not in existing:
+                conn.execute(insert(models.EntityCount).values(name=name, value=_count_stmt(model)))
+
+
+def reconcile(bind) -> dict[str, int]:
+    """Reset every count to the true row count (one atomic UPDATE per table)."""
+    ensure_rows(bind)
+    with bind.begin() as conn:
+        for model, name in TRACKED.items():
+            conn.execute(
+                update(models.EntityCount).where(models.EntityCount.name == name).values(value=_count_stmt(model))
+            )
+        return dict(conn.execute(select(models.EntityCount.name, models.EntityCount.value)).all())
+
+
+def current(db: Session) -> dict[str, int]:
+    rows = dict(db.execute(select(models.EntityCount.name, models.EntityCount.value)).all())
+    return {name: rows.get(name, 0) for name in NAMES}
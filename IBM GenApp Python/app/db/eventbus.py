@@ -0,0 +1,129 @@
+"""In-process ring buffer of committed audit events for the live stream.
+
+ORM sessions collect the `Event` rows they flush and publish them after the
+outermost COMMIT; rows from a rolled-back transaction or savepoint (a failed
+operation in a writer-queue batch) are dropped. The buffer keeps the newest
+``GENAPP_EVENT_BUFFER`` events, so ``GET /api/events/stream`` serves
+subscribers without touching the database. Older positions (a reconnect after
+a long pause) and holes in the id sequence (events written by Core bulk
+inserts or another process) are filled from the database by the stream route,
+which also checks the newest id in the database whenever the buffer is idle.
+"""
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.session import within
+from app.utils.metrics import registry
+from app.utils.signal import Signal
+
+
+BUFFER_SIZE = int(os.getenv("GENAPP_EVENT_BUFFER", "1000"))
+
+_PENDING = "genapp_pending_events"
+FIELDS = ("id", "created_at", "source", "level", "message", "entity_type", "entity_id", "action", "diff")
+
+
+def as_payload(obj) -> dict:
+    data = {name: getattr(obj, name) for name in FIELDS}
+    created = data["created_at"]
+    # same naive-UTC form the rows have when read back from SQLite
+    data["created_at"] = created.replace(tzinfo=None).isoformat() if created else None
+    data["diff"] = json.loads(data["diff"]) if data["diff"] else None
+    return data
+
+
+class EventBuffer:
+    """The newest ``maxlen`` events in id order.
+
+    Commits can publish out of id order (two sessions flush, the later id
+    commits first), so each event is inserted at its position and the oldest
+    ids are evicted.
+    """
+
+    def __init__(self, maxlen: int = BUFFER_SIZE) -> None:
+        self.maxlen = max(maxlen, 1)
+        self._items: list[dict] = []
+        self._lock = threading.Lock()
+        self._signal = Signal()
+        self.published = 0
+
+    def publish(self, items: list[dict]) -> None:
+        if not items:
+            return
+        with self._lock:
+            for item in sorted(items, key=lambda item: item["id"]):
+                if not self._items or item["id"] > self._items[-1]["id"]:
+                    self._items.append(item)
+                else:
+                    bisect.insort(self._items, item, key=lambda item: item["id"])
+            if len(self._items) > self.maxlen:
+                del self._items[: len(self._items) - self.maxlen]
+            self.published += len(items)
+        self._signal.notify()
+
+    def last_id(self) -> int | None:
+        with self._lock:
+            return self._items[-1]["id"] if self._items else None
+
+    def since(self, last_id: int) -> tuple[list[dict], bool]:
+        """Events after ``last_id`` and whether they are complete.
+
+        Complete means the buffer reaches back to ``last_id`` and the ids after it
+        run without a hole: a missing id is an event this process never saw (Core
+        insert, another worker), so the caller has to read the range from the DB.
+        """
+        with self._lock:
+            items = [item for item in self._items if item["id"] > last_id]
+            covered = bool(self._items) and self._items[0]["id"] <= last_id + 1
+        expected = last_id + 1
+        for item in items:
+            if item["id"] != expected:
+                return items, False
+            expected += 1
+        return items, covered
+
+    async def wait(self, last_id: int, timeout: float) -> None:
+        """Return once an event newer than ``last_id`` is buffered, or after ``timeout`` seconds."""
+        await self._signal.wait(lambda: (self.last_id() or 0) > last_id, timeout)
+
+    def subscribers(self) -> int:
+        return self._signal.waiting()
+
+
+buffer = EventBuffer()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect(session: Session, _flush_context) -> None:
+    new = [obj for obj in session.new if isinstance(obj, models.Event)]
+    if new:
+        transaction = session.get_nested_transaction() or session.get_transaction()
+        session.info.setdefault(_PENDING, []).extend((transaction, as_payload(obj)) for obj in new)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard(session: Session, previous_transaction) -> None:
+    pending = session.info.get(_PENDING)
+    if pending:
+        session.info[_PENDING] = [(t, item) for t, item in pending if not within(t, previous_transaction)]
+
+
+@event.listens_for(Session, "after_commit")
+def _publish(session: Session) -> None:
+    if session.in_nested_transaction():
+        return  # savepoint release; wait for the real COMMIT
+    pending = session.info.pop(_PENDING, None)
+    if pending:
+        buffer.publish([item for _, item in pending])
+
+
+registry.counter("genapp_event_stream_published_total", "Audit events published to the live stream buffer", lambda: buffer.published)
+registry.gauge("genapp_event_stream_subscribers", "Stream subscribers currently waiting for events", buffer.subscribers)
@@ -0,0 +1,71 @@
+from sqlalchemy.engine import Engine
+
+from app.db.session import Base, engine
+from app.db import models  # noqa: F401  (register tables on Base.metadata)
+from app.db import counts
+from app.db import outbox  # noqa: F401  (registers the change feed hook)
+
+
+def _ensure_runtime_migrations(bind: Engine) -> None:
+    """Lightweight, best-effort migrations for SQLite dev DB.
+    - Add commission column to policies if missing.
+    - Ensure the (policy_type, expiry_date) index used by the renewal job.
+    - Ensure unique index on policies.policy_number.
+    - Ensure the structured audit columns and indexes on events.
+    """
+    try:
+        with bind.connect() as conn:
+            # detect columns in policies
+            cols = [row[1] for row in conn.exec_driver_sql("PRAGMA table_info('policies')").fetchall()]
+            if 'commission' not in cols:
+                conn.exec_driver_sql("ALTER TABLE policies ADD COLUMN commission INTEGER")
+            conn.exec_driver_sql(
+                "CREATE INDEX IF NOT EXISTS ix_policies_type_expiry ON policies(policy_type, expiry_date)"
+            )
+            # unique index for policy_number
+            conn.exec_driver_sql(
+                "CREATE UNIQUE INDEX IF NOT EXISTS uq_policies_policy_number ON policies(policy_number)"
+            )
+    except Exception:
+        # non-fatal in dev
+        pass
+    ensure_event_columns(bind)
+
+
+EVENT_COLUMNS = {
+    "entity_type": "VARCHAR(16)",
+    "entity_id": "INTEGER",
+    "action": "VARCHAR(32)",
+    "diff": "TEXT",
+}
+
+
+def ensure_event_columns(bind: Engine) -> None:
+    """Add the structured audit columns and event indexes to older event tables.
+
+    Also used for the monthly archive files of `app.db.retention`.
+    """
+    try:
+        with bind.connect() as conn:
+            cols = [row[1] for row in conn.exec_driver_sql("PRAGMA table_info('events')").fetchall()]
+            for name, ddl in EVENT_COLUMNS.items():
+                if name not in cols:
+                    conn.exec_driver_sql(f"ALTER TABLE events ADD COLUMN {name} {ddl}")
+            conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_events_created_at ON events(created_at)")
+            conn.exec_driver_sql(
+                "CREATE INDEX IF NOT EXISTS ix_events_source_created_at ON events(source, created_at)"
+            )
+            conn.exec_driver_sql(
+                "CREATE INDEX IF NOT EXISTS ix_events_entity ON events(entity_type, entity_id, created_at)"
+            )
+    except Exception:
+        # non-fatal in dev
+        pass
+
+
+def init_db(bind: Engine | None = None) -> None:
+    # Create tables if not exist (simple approach for local dev)
+    bind = bind or engine
+    Base.metadata.create_all(bind=bind)
+    _ensure_runtime_migrations(bind)
+    counts.ensure_rows(bind)
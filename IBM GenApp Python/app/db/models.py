@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Date, Text, UniqueConstraint
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Date, Text, UniqueConstraint, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from datetime import datetime, UTC
 
@@ -55,6 +55,8 @@ class Policy(Base):
 
     __table_args__ = (
         UniqueConstraint("policy_type", "customer_id", "policy_number", name="uq_policy_type_customer_number"),
+        # renewal job: expiring policies of one type in (expiry_date, id) order
+        Index("ix_policies_type_expiry", "policy_type", "expiry_date"),
     )
 
 
@@ -152,6 +154,15 @@ class Counter(Base):
     value = Column(Integer, nullable=False, default=0)
 
 
+class EntityCount(Base):
+    """Row counts for the dashboard, maintained by `app.db.counts` in the writing transaction."""
+
+    __tablename__ = "entity_counts"
+
+    name = Column(String(32), primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+
 class CustomerSecure(Base):
     __tablename__ = "customer_secure"
 
@@ -164,9 +175,83 @@ class CustomerSecure(Base):
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        # list_events pages newest-first, optionally filtered by source
+        Index("ix_events_created_at", "created_at"),
+        Index("ix_events_source_created_at", "source", "created_at"),
+        # entity history: one index range scan per entity
+        Index("ix_events_entity", "entity_type", "entity_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True)
     created_at = Column(DateTime, nullable=False, default=_utc_now)
     source = Column(String(64), nullable=False)
     level = Column(String(16), nullable=False, default="INFO")
     message = Column(Text, nullable=False)
+    # structured audit reference, set by the service layer
+    entity_type = Column(String(16), nullable=True)
+    entity_id = Column(Integer, nullable=True)
+    action = Column(String(32), nullable=True)
+    diff = Column(Text, nullable=True)  # compact JSON {field: [old, new]}
+
+
+class EventRollup(Base):
+    """Daily event counts per source/level; kept after the rows move to the archive."""
+
+    __tablename__ = "event_rollups"
+
+    day = Column(Date, primary_key=True)
+    source = Column(String(64), primary_key=True)
+    level = Column(String(16), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class OutboxEntry(Base):
+    """Change feed row, written by `app.db.outbox` in the transaction of the change."""
+
+    __tablename__ = "outbox"
+    # never reuse a seq after pruning; consumers page by it
+    __table_args__ = (Index("ix_outbox_created_at", "created_at"), {"sqlite_autoincrement": True})
+
+    seq = Column(Integer, primary_key=True)
+    created_at = Column(DateTime, nullable=False, default=_utc_now)
+    entity_type = Column(String(16), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String(8), nullable=False)  # create | update | delete
+    payload = Column(Text, nullable=False)  # JSON row image (after the change; before it for deletes)
+
+
+class OutboxConsumer(Base):
+    __tablename__ = "outbox_consumers"
+
+    name = Column(String(64), primary_key=True)
+    position = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=_utc_now, onupdate=_utc_now)
+
+
+class JobCheckpoint(Base):
+    """Resume position of one part of a chunked batch job (see `app.services.renewals`)."""
+
+    __tablename__ = "job_checkpoints"
+
+    job = Column(String(64), primary_key=True)
+    part = Column(String(16), primary_key=True)
+    position = Column(String(64), nullable=True)  # last processed key, e.g. "2026-01-31:1234"
+    processed = Column(Integer, nullable=False, default=0)
+    finished = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=_utc_now, onupdate=_utc_now)
+
+
+class IdempotencyKey(Base):
+    """Stored first response per ``Idempotency-Key`` (see `app.utils.idempotency`); status_code NULL = in progress."""
+
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (Index("ix_idempotency_keys_expires_at", "expires_at"),)
+
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    headers = Column(Text, nullable=True)  # JSON list of [name, value]
+    body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=_utc_now)
+    expires_at = Column(DateTime, nullable=False)
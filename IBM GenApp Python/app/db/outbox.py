@@ -0,0 +1,141 @@
+"""Transactional outbox for the change feed (``GET /api/changes``).
+
+An ``after_flush`` hook writes one ``outbox`` row per created, changed or
+deleted customer, policy (plus its type-specific detail row) or claim, in the
+same transaction as the change itself: a change is in the feed exactly when it
+is committed. ``seq`` is the feed position; SQLite's AUTOINCREMENT keeps it
+strictly increasing even after `prune` has removed old rows. Core bulk inserts
+(``scripts/generate_portfolio.py``) bypass the hook and are not in the feed;
+set-based updates (`app.services.bulk`) add their rows through `append`.
+
+Committing sessions bump `state.commits` and wake long-polling readers.
+"""
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta, UTC
+
+from sqlalchemy import delete, event, func, insert, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.session import engine
+from app.utils.metrics import registry
+from app.utils.signal import Signal
+
+
+RETENTION_HOURS = float(os.getenv("GENAPP_OUTBOX_RETENTION_H", "168"))
+PRUNE_INTERVAL = float(os.getenv("GENAPP_OUTBOX_PRUNE_INTERVAL_S", "3600"))
+
+# model -> (entity_type, attribute holding the entity id)
+TRACKED = {
+    models.Customer: ("customer", "id"),
+    models.Policy: ("policy", "id"),
+    models.MotorPolicy: ("policy_motor", "policy_id"),
+    models.HousePolicy: ("policy_house", "policy_id"),
+    models.EndowmentPolicy: ("policy_endowment", "policy_id"),
+    models.CommercialPolicy: ("policy_commercial", "policy_id"),
+    models.Claim: ("claim", "id"),
+}
+
+_WROTE = "genapp_outbox_wrote"
+
+
+@dataclass
+class OutboxState:
+    commits: int = 0
+    pruned_total: int = 0
+
+
+state = OutboxState()
+signal = Signal()
+
+
+def row_payload(data: dict) -> str:
+    return json.dumps(data, default=str, separators=(",", ":"))
+
+
+def _row_image(obj) -> str:
+    return row_payload({column.key: getattr(obj, column.key) for column in obj.__mapper__.column_attrs})
+
+
+@event.listens_for(Session, "after_flush")
+def _write_outbox(session: Session, _flush_context) -> None:
+    rows = []
+    for op, objs in (("create", session.new), ("update", session.dirty), ("delete", session.deleted)):
+        for obj in objs:
+            tracked = TRACKED.get(type(obj))
+            if tracked is None or (op == "update" and not session.is_modified(obj, include_collections=False)):
+                continue
+            entity_type, id_attr = tracked
+            rows.append(
+                {
+                    "entity_type": entity_type,
+                    "entity_id": getattr(obj, id_attr),
+                    "op": op,
+                    "payload": _row_image(obj),
+                }
+            )
+    if rows:
+        session.execute(insert(models.OutboxEntry), rows)
+        session.info[_WROTE] = True
+
+
+def append(db: Session, rows: list[dict]) -> None:
+    """Feed rows (entity_type, entity_id, op, payload) for changes made with Core statements, in ``db``'s transaction."""
+    if rows:
+        db.execute(insert(models.OutboxEntry), rows)
+        db.info[_WROTE] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _notify(session: Session) -> None:
+    if session.in_nested_transaction() or not session.info.pop(_WROTE, False):
+        return
+    state.commits += 1
+    signal.notify()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget(session: Session) -> None:
+    session.info.pop(_WROTE, None)
+
+
+def oldest_seq(db: Session) -> int | None:
+    return db.scalar(select(func.min(models.OutboxEntry.seq)))
+
+
+def pruned_through(db: Session) -> int:
+    """Highest feed position that has been removed by `prune` (0 when none).
+
+    With rows left that is the one before the oldest row. An empty table may
+    have been pruned completely, so then SQLite's AUTOINCREMENT high-water mark
+    (``sqlite_sequence``) tells how far the feed had got.
+    """
+    oldest = oldest_seq(db)
+    if oldest is not None:
+        return oldest - 1
+    if db.get_bind().dialect.name != "sqlite":
+        return 0
+    high = db.scalar(
+        text("SELECT seq FROM sqlite_sequence WHERE name = :name"), {"name": models.OutboxEntry.__tablename__}
+    )
+    return high or 0
+
+
+def prune(bind: Engine | None = None, *, retention_hours: float = RETENTION_HOURS) -> int:
+    """Delete feed rows older than the retention window; returns the number removed."""
+    bind = bind or engine
+    cutoff = (datetime.now(UTC) - timedelta(hours=retention_hours)).replace(tzinfo=None)
+    with bind.begin() as conn:
+        removed = conn.execute(delete(models.OutboxEntry).where(models.OutboxEntry.created_at < cutoff)).rowcount
+    state.pruned_total += removed
+    return removed
+
+
+registry.counter("genapp_outbox_commits_total", "Committed transactions that wrote to the change feed", lambda: state.commits)
+registry.counter("genapp_outbox_pruned_total", "Change feed rows removed by retention", lambda: state.pruned_total)
+registry.gauge("genapp_outbox_waiting_consumers", "Long-poll requests waiting on /api/changes", signal.waiting)
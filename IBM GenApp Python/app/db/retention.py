@@ -0,0 +1,214 @@
+"""Event log retention: daily rollups and monthly archive files.
+
+`compact` first rolls every complete day up into ``event_rollups`` (counts per
+source/level), then moves events older than ``GENAPP_EVENTS_RETENTION_DAYS``
+out of the live DB in chunks of ``GENAPP_EVENTS_COMPACT_CHUNK`` rows. Each row
+goes to the SQLite file of its month (``events-YYYY-MM.db`` in
+``GENAPP_EVENTS_ARCHIVE_DIR``), which has the same ``events`` table. A chunk is
+written to the archive before it is deleted from the live DB and the insert
+ignores known ids, so an interrupted run is simply repeated.
+
+`list_archived` pages through the archives newest month first; the events
+service only calls it when a page reaches past the live rows.
+"""
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, asdict
+from datetime import date, datetime, timedelta, UTC
+from pathlib import Path
+
+from sqlalchemy import create_engine, delete, func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.db import counts, models
+from app.db.migrations import ensure_event_columns
+from app.db.session import engine
+from app.db.snapshot import live_path
+from app.utils.metrics import registry
+
+
+RETENTION_DAYS = int(os.getenv("GENAPP_EVENTS_RETENTION_DAYS", "90"))
+ARCHIVE_DIR = os.getenv("GENAPP_EVENTS_ARCHIVE_DIR", "")
+COMPACT_CHUNK = int(os.getenv("GENAPP_EVENTS_COMPACT_CHUNK", "5000"))
+COMPACT_INTERVAL = float(os.getenv("GENAPP_EVENTS_COMPACT_INTERVAL_S", "3600"))
+
+_ARCHIVE_NAME = re.compile(r"^events-(\d{4})-(\d{2})\.db$")
+
+
+@dataclass
+class CompactionState:
+    runs: int = 0
+    archived_total: int = 0
+    last_archived: int = 0
+    last_rolled_days: int = 0
+    last_duration_s: float = 0.0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+state = CompactionState()
+_compact_lock = threading.Lock()
+_engines: dict[Path, Engine] = {}
+_engines_lock = threading.Lock()
+
+
+def archive_dir() -> Path | None:
+    if ARCHIVE_DIR:
+        return Path(ARCHIVE_DIR).resolve()
+    live = live_path()
+    return live.with_name(f"{live.stem}.archive") if live else None
+
+
+def enabled() -> bool:
+    return RETENTION_DAYS > 0 and COMPACT_INTERVAL > 0 and archive_dir() is not None
+
+
+def archive_file(directory: Path, month: tuple[int, int]) -> Path:
+    return directory / f"events-{month[0]:04d}-{month[1]:02d}.db"
+
+
+def archives(directory: Path | None = None) -> list[Path]:
+    """Archive files, newest month first."""
+    directory = directory or archive_dir()
+    if directory is None or not directory.is_dir():
+        return []
+    return sorted((p for p in directory.iterdir() if _ARCHIVE_NAME.match(p.name)), reverse=True)
+
+
+def _archive_engine(path: Path) -> Engine:
+    with _engines_lock:
+        engine = _engines.get(path)
+        if engine is None:
+            engine = create_engine(f"sqlite:///{path}", future=True, connect_args={"check_same_thread": False})
+            models.Event.__table__.create(engine, checkfirst=True)
+            ensure_event_columns(engine)
+            _engines[path] = engine
+        return engine
+
+
+def rollup(bind: Engine, today: date | None = None) -> int:
+    """Add counts for complete days after the last rolled-up day; returns the number of days added."""
+    today = today or datetime.now(UTC).date()
+    with bind.begin() as conn:
+        last = conn.execute(select(func.max(models.EventRollup.day))).scalar()
+        start = datetime.combine(last + timedelta(days=1), datetime.min.time()) if last else None
+        end = datetime.combine(today, datetime.min.time())
+        day = func.date(models.Event.created_at)
+        q = (
+            select(day, models.Event.source, models.Event.level, func.count())
+            .where(models.Event.created_at < end)
+            .group_by(day, models.Event.source, models.Event.level)
+        )
+        if start is not None:
+            q = q.where(models.Event.created_at >= start)
+        rows = [
+            {"day": date.fromisoformat(d), "source": source, "level": level, "count": n}
+            for d, source, level, n in conn.execute(q)
+        ]
+        if rows:
+            conn.execute(models.EventRollup.__table__.insert(), rows)
+        return len({row["day"] for row in rows})
+
+
+def _archive_chunk(bind: Engine, directory: Path, cutoff: datetime, chunk: int) -> int:
+    with bind.begin() as conn:
+        rows = conn.execute(
+            select(models.Event.__table__)
+            .where(models.Event.created_at < cutoff)
+            .order_by(models.Event.created_at, models.Event.id)
+            .limit(chunk)
+        ).mappings().all()
+        if not rows:
+            return 0
+        by_month: dict[tuple[int, int], list[dict]] = defaultdict(list)
+        for row in rows:
+            by_month[(row["created_at"].year, row["created_at"].month)].append(dict(row))
+        for month, batch in by_month.items():
+            with _archive_engine(archive_file(directory, month)).begin() as archive:
+                archive.execute(sqlite_insert(models.Event.__table__).on_conflict_do_nothing(), batch)
+        ids = [row["id"] for row in rows]
+        conn.execute(delete(models.Event.__table__).where(models.Event.id.in_(ids)))
+        counts.add(conn, "events", -len(ids))
+        return len(ids)
+
+
+def compact(
+    bind: Engine | None = None,
+    directory: Path | None = None,
+    *,
+    retention_days: int = RETENTION_DAYS,
+    chunk: int = COMPACT_CHUNK,
+    now: datetime | None = None,
+) -> CompactionState:
+    """Roll up complete days, then archive events older than ``retention_days``."""
+    bind = bind or engine
+    directory = directory or archive_dir()
+    if directory is None:
+        raise RuntimeError("Event archives need GENAPP_EVENTS_ARCHIVE_DIR or a file-based SQLite DATABASE_URL")
+    now = now or datetime.now(UTC)
+    cutoff = (now - timedelta(days=retention_days)).replace(tzinfo=None)
+    with _compact_lock:
+        start = time.perf_counter()
+        directory.mkdir(parents=True, exist_ok=True)
+        state.last_rolled_days = rollup(bind, now.date())
+        moved = 0
+        while True:
+            n = _archive_chunk(bind, directory, cutoff, chunk)
+            moved += n
+            if n < chunk:
+                break
+        state.runs += 1
+        state.last_archived = moved
+        state.archived_total += moved
+        state.last_duration_s = time.perf_counter() - start
+        return state
+
+
+def list_archived(
+    *,
+    limit: int = 100,
+    offset: int = 0,
+    directory: Path | None = None,
+    rows: bool = False,
+    **filters,
+) -> list:
+    """Page through the archives newest-first, continuing where the live table ended.
+
+    ``filters`` are the keyword filters of `app.services.events.list_events_stmt`;
+    ``rows=True`` returns column dicts (see `app.services.events.fetch_events`).
+    """
+    from app.services.events import fetch_events, list_events_stmt
+
+    items: list = []
+    for path in archives(directory):
+        if limit <= 0:
+            break
+        with Session(bind=_archive_engine(path)) as db:
+            if offset:
+                n = db.scalar(
+                    list_events_stmt(**filters, limit=None, offset=None)
+                    .with_only_columns(func.count())
+                    .select_from(models.Event)
+                    .order_by(None)
+                )
+                if n <= offset:
+                    offset -= n
+                    continue
+            page = fetch_events(db, list_events_stmt(**filters, limit=limit, offset=offset), rows=rows)
+            db.expunge_all()
+        items.extend(page)
+        limit -= len(page)
+        offset = 0
+    return items
+
+
+registry.counter("genapp_events_archived_total", "Events moved from the live DB to the monthly archives", lambda: state.archived_total)
+registry.gauge("genapp_events_archive_files", "Monthly event archive files", lambda: len(archives()) if archive_dir() else None)
@@ -1,16 +1,135 @@
+import functools
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
 
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./genapp.db")
+# Optional read engine: a replica URL, or "ro" for a read-only URI on the same SQLite file
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL", "")
+READ_POOL_SIZE = int(os.getenv("GENAPP_READ_POOL_SIZE", "10"))
+# Journal mode of a file-based SQLite DB (persistent in the file); empty = leave it as it is
+SQLITE_JOURNAL_MODE = os.getenv("GENAPP_SQLITE_JOURNAL_MODE", "WAL")
 
 # SQLite needs this flag when used with threads in FastAPI
 connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
 
 engine = create_engine(DATABASE_URL, echo=False, future=True, connect_args=connect_args)
 
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+if SQLITE_JOURNAL_MODE and DATABASE_URL.startswith("sqlite") and make_url(DATABASE_URL).database not in (None, "", ":memory:"):
+
+    @event.listens_for(engine, "connect")
+    def _journal_mode(dbapi_connection, _record):
+        # WAL: readers (reports, the snapshot copy) and the writer do not block each other
+        dbapi_connection.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+
+
+def _read_only_sqlite_url(url: str) -> str:
+    database = make_url(url).database
+    return f"sqlite:///file:{database}?mode=ro&uri=true"
+
+
+def _resolve_read_url(read_url: str, write_url: str) -> str | None:
+    if not read_url:
+        return None
+    if read_url.lower() == "ro":
+        if not write_url.startswith("sqlite") or make_url(write_url).database in (None, "", ":memory:"):
+            raise RuntimeError("READ_DATABASE_URL=ro needs a file-based SQLite DATABASE_URL")
+        return _read_only_sqlite_url(write_url)
+    return read_url
+
+
+def _create_read_engine(url: str | None):
+    if url is None:
+        return None
+    if url.startswith("sqlite"):
+        return create_engine(url, future=True, pool_size=READ_POOL_SIZE, connect_args={"check_same_thread": False})
+    return create_engine(url, future=True, pool_size=READ_POOL_SIZE, pool_pre_ping=True)
+
+
+read_engine = _create_read_engine(_resolve_read_url(READ_DATABASE_URL, DATABASE_URL))
+
+def insert_ignore(table, dialect: str):
+    """``INSERT`` that skips rows whose key already exists (SQLite, PostgreSQL; elsewhere a plain INSERT)."""
+    if dialect == "sqlite":
+        return sqlite.insert(table).on_conflict_do_nothing()
+    if dialect == "postgresql":
+        return postgresql.insert(table).on_conflict_do_nothing()
+    return insert(table)
+
+
+def within(transaction, ancestor) -> bool:
+    """True if ``transaction`` is ``ancestor`` or nested in it (for ``after_soft_rollback`` bookkeeping)."""
+    while transaction is not None:
+        if transaction is ancestor:
+            return True
+        transaction = transaction.parent
+    return False
+
+
+def dispose_after_fork() -> None:
+    """Drop pooled connections inherited from the parent process without closing them."""
+    for bind in (engine, read_engine):
+        if bind is not None:
+            bind.dispose(close=False)
+
+
+# session.info keys used for read routing
+READ_DEPTH = "genapp_read_depth"
+STICKY_WRITER = "genapp_sticky_writer"
+
+
+class RoutingSession(Session):
+    """Sends statements issued inside `read_only` to the read engine.
+
+    Once the session has written anything (flush or a write routed through the
+    writer queue) it stays on the primary for the rest of its life, so a request
+    always reads its own writes even from a lagging replica.
+    """
+
+    read_bind = read_engine
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.read_bind is not None and self.info.get(READ_DEPTH) and not self.info.get(STICKY_WRITER):
+            return self.read_bind
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _stick_to_writer(session, _flush_context):
+    session.info[STICKY_WRITER] = True
+
+
+def mark_written(db) -> None:
+    db.info[STICKY_WRITER] = True
+
+
+@contextmanager
+def read_only(db):
+    info = db.info
+    info[READ_DEPTH] = info.get(READ_DEPTH, 0) + 1
+    try:
+        yield db
+    finally:
+        info[READ_DEPTH] -= 1
+
+
+def reads(fn):
+    """Mark a read-only service ``fn(db, ...)`` so its queries may use the read engine."""
+
+    @functools.wraps(fn)
+    def wrapper(db, *args, **kwargs):
+        with read_only(db):
+            return fn(db, *args, **kwargs)
+
+    return wrapper
+
+
+SessionLocal = sessionmaker(bind=engine, class_=RoutingSession, autoflush=False, autocommit=False, future=True)
 
 Base = declarative_base()
 
@@ -22,3 +141,56 @@ def get_db():
     finally:
         db.close()
 
+
+
+# Optional async stack (aiosqlite locally); built on first use so scripts and the
+# sync routes never need the async driver installed.
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def _async_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(DATABASE_URL)
+
+_async_engine = None
+_async_read_engine = None
+_AsyncSessionLocal = None
+
+
+def get_async_engine():
+    global _async_engine, _async_read_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        _async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=False)
+        read_url = _resolve_read_url(READ_DATABASE_URL, DATABASE_URL)
+        if read_url is not None:
+            _async_read_engine = create_async_engine(_async_url(read_url), echo=False)
+        routing_class = type(
+            "AsyncRoutingSession",
+            (RoutingSession,),
+            {"read_bind": _async_read_engine.sync_engine if _async_read_engine is not None else None},
+        )
+        # services return ORM objects after their final commit; keep them loaded so
+        # response serialisation does not trigger IO outside the event loop
+        _AsyncSessionLocal = async_sessionmaker(
+            bind=_async_engine,
+            sync_session_class=routing_class,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+    return _async_engine
+
+
+def async_session_factory():
+    get_async_engine()
+    return _AsyncSessionLocal
+
+
+# Async dependency for the coroutine routes in app/api/routes_async.py
+async def get_async_db():
+    async with async_session_factory()() as db:
+        yield db
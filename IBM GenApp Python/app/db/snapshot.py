@@ -0,0 +1,187 @@
+"""Reporting snapshot of the live SQLite database.
+
+`refresh` copies the live file with SQLite's online backup API in a single
+step, i.e. inside one read transaction: a stepped backup is restarted by every
+write to the source and could run forever under steady write load. The live DB
+runs in WAL mode (``GENAPP_SQLITE_JOURNAL_MODE``, see `app.db.session`), where
+that read transaction does not block writers; in rollback-journal mode writers
+would wait for the whole copy. The copy is switched back to a rollback journal
+(read-only opens need no ``-wal``/``-shm`` files), goes to a temp file and is
+swapped in with `os.replace`, so readers always see a complete snapshot.
+Reporting routes read from it through `get_snapshot_db`.
+
+Freshness (``refreshed_at``, age, size) comes from the snapshot file itself, so
+every `app.serve` worker reports the same state although only worker 0
+refreshes; duration and counters are those of the current process.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from datetime import datetime, UTC
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.db.session import DATABASE_URL, SessionLocal, read_only
+from app.utils.metrics import registry
+
+
+SNAPSHOT_PATH = os.getenv("GENAPP_SNAPSHOT_PATH", "")
+SNAPSHOT_INTERVAL = float(os.getenv("GENAPP_SNAPSHOT_INTERVAL_S", "300"))
+
+
+@dataclass
+class SnapshotState:
+    duration_s: float = 0.0
+    pages: int = 0
+    refreshes: int = 0
+    failures: int = 0
+    last_error: str | None = None
+
+    def _stat(self) -> os.stat_result | None:
+        path = snapshot_path()
+        try:
+            return path.stat() if path is not None else None
+        except FileNotFoundError:
+            return None
+
+    def refreshed_at(self) -> datetime | None:
+        stat = self._stat()
+        return datetime.fromtimestamp(stat.st_mtime, UTC) if stat else None
+
+    def size_bytes(self) -> int | None:
+        stat = self._stat()
+        return stat.st_size if stat else None
+
+    def age_seconds(self) -> float | None:
+        refreshed = self.refreshed_at()
+        if refreshed is None:
+            return None
+        return (datetime.now(UTC) - refreshed).total_seconds()
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        refreshed = self.refreshed_at()
+        data["refreshed_at"] = refreshed.isoformat() if refreshed else None
+        data["age_s"] = (datetime.now(UTC) - refreshed).total_seconds() if refreshed else None
+        data["size_bytes"] = self.size_bytes()
+        return data
+
+
+state = SnapshotState()
+_refresh_lock = threading.Lock()
+
+
+def live_path() -> Path | None:
+    url = make_url(DATABASE_URL)
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        return None
+    return Path(url.database).resolve()
+
+
+def snapshot_path() -> Path | None:
+    if SNAPSHOT_PATH:
+        return Path(SNAPSHOT_PATH).resolve()
+    live = live_path()
+    return live.with_name(f"{live.stem}.snapshot{live.suffix}") if live else None
+
+
+def enabled() -> bool:
+    return SNAPSHOT_INTERVAL > 0 and live_path() is not None
+
+
+def refresh(source: Path | None = None, target: Path | None = None) -> SnapshotState:
+    """Copy ``source`` (live DB) to ``target`` (snapshot) with the online backup API, in one step."""
+    source = source or live_path()
+    target = target or snapshot_path()
+    if source is None or target is None:
+        raise RuntimeError("Snapshots need a file-based SQLite DATABASE_URL")
+    with _refresh_lock:
+        tmp = target.with_name(target.name + ".tmp")
+        start = time.perf_counter()
+        copied = 0
+
+        def progress(_status, remaining, total):
+            nonlocal copied
+            copied = total - remaining
+
+        try:
+            src = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+            dst = sqlite3.connect(tmp)
+            try:
+                src.backup(dst, pages=-1, progress=progress)
+                dst.execute("PRAGMA journal_mode=DELETE")
+            finally:
+                dst.close()
+                src.close()
+            os.replace(tmp, target)
+        except Exception as exc:
+            state.failures += 1
+            state.last_error = f"{type(exc).__name__}: {exc}"
+            tmp.unlink(missing_ok=True)
+            raise
+        state.duration_s = time.perf_counter() - start
+        state.pages = copied
+        state.refreshes += 1
+        state.last_error = None
+        return state
+
+
+_engine = None
+_SnapshotSession = None
+
+
+def _snapshot_sessionmaker():
+    global _engine, _SnapshotSession
+    if _SnapshotSession is None:
+        # NullPool: every session opens the current file, not one replaced by a later refresh
+        _engine = create_engine(
+            f"sqlite:///file:{snapshot_path()}?mode=ro&uri=true",
+            future=True,
+            poolclass=NullPool,
+            connect_args={"check_same_thread": False},
+        )
+        _SnapshotSession = sessionmaker(bind=_engine, autoflush=False, future=True)
+    return _SnapshotSession
+
+
+@contextmanager
+def snapshot_session():
+    """Session on the reporting snapshot; falls back to the live (read) engine until one exists."""
+    path = snapshot_path()
+    if path is not None and path.exists():
+        db = _snapshot_sessionmaker()()
+        db.info["snapshot"] = True
+        try:
+            yield db
+        finally:
+            db.close()
+        return
+    db = SessionLocal()
+    db.info["snapshot"] = False
+    try:
+        with read_only(db):
+            yield db
+    finally:
+        db.close()
+
+
+# Dependency for the reporting routes
+def get_snapshot_db():
+    with snapshot_session() as db:
+        yield db
+
+
+registry.gauge("genapp_snapshot_age_seconds", "Seconds since the reporting snapshot was refreshed", state.age_seconds)
+registry.gauge("genapp_snapshot_last_duration_seconds", "Duration of the last snapshot refresh", lambda: state.duration_s if state.refreshes else None)
+registry.gauge("genapp_snapshot_size_bytes", "Size of the reporting snapshot file", state.size_bytes)
+registry.counter("genapp_snapshot_refreshes_total", "Completed snapshot refreshes", lambda: state.refreshes)
+registry.counter("genapp_snapshot_failures_total", "Failed snapshot refreshes", lambda: state.failures)
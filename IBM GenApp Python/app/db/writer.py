@@ -0,0 +1,297 @@
+"""Single-writer queue with group commit for SQLite (``GENAPP_WRITE_QUEUE=1``).
+
+Mutating service functions are decorated with `routed`. When the queue is on,
+a call is handed to one dedicated writer thread instead of running on the
+caller's session. The writer collects the operations that arrive within
+``GENAPP_WRITE_WINDOW_MS`` (at most ``GENAPP_WRITE_BATCH``) and runs them in
+one ``BEGIN IMMEDIATE`` transaction. Each operation gets its own savepoint.
+Inside it, the service's own ``commit()``/``rollback()`` act on that savepoint,
+so a failing operation (COBOL error, integrity error) only undoes its own
+changes. After the single COMMIT every caller's future is resolved with the
+detached result or the exception.
+
+Callers wait at most ``GENAPP_WRITE_TIMEOUT_MS`` for their result and get
+COBOL ``89`` after that (an operation still queued is cancelled; one already
+running is committed with its batch). With more than ``GENAPP_WRITE_QUEUE_MAX``
+operations waiting, new ones are rejected right away with COBOL ``88``. Both
+map to 503 like the admission limits.
+
+Calls with ``commit=False`` (callers composing several steps on their own
+session), calls on a session bound to another database than the writer's
+(scripts, jobs and tests with their own engine) and calls made on the writer
+thread itself run directly.
+"""
+from __future__ import annotations
+
+import functools
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db import session as db_session
+from app.utils.errors import CobolError
+from app.utils.metrics import registry
+
+
+WRITE_QUEUE = os.getenv("GENAPP_WRITE_QUEUE", "0").lower() in ("1", "true", "yes")
+WRITE_WINDOW = float(os.getenv("GENAPP_WRITE_WINDOW_MS", "2")) / 1000.0
+WRITE_BATCH = int(os.getenv("GENAPP_WRITE_BATCH", "64"))
+WRITE_TIMEOUT = float(os.getenv("GENAPP_WRITE_TIMEOUT_MS", "10000")) / 1000.0
+WRITE_QUEUE_MAX = int(os.getenv("GENAPP_WRITE_QUEUE_MAX", "1024"))
+
+
+class GroupSession(Session):
+    """Session used on the writer thread; commit/rollback only checkpoint the current operation."""
+
+    _op = None
+
+    def begin_op(self) -> None:
+        self._op = self.begin_nested()
+
+    def _open(self, op) -> bool:
+        # a savepoint whose flush failed is inactive but still open and must be rolled back
+        return op is not None and self.get_nested_transaction() is op
+
+    def end_op(self, ok: bool) -> None:
+        op, self._op = self._op, None
+        if self._open(op):
+            op.commit() if ok and op.is_active else op.rollback()
+
+    def commit(self) -> None:
+        if self._op is None:
+            return super().commit()
+        self._op.commit()
+        self._op = self.begin_nested()
+
+    def rollback(self) -> None:
+        if self._op is None:
+            return super().rollback()
+        if self._open(self._op):
+            self._op.rollback()
+        self._op = self.begin_nested()
+
+
+@dataclass
+class WriteOp:
+    fn: object
+    args: tuple
+    kwargs: dict
+    future: Future = field(default_factory=Future)
+
+
+def writer_engine(url=None):
+    """Engine for the writer thread; SQLite connections start their transactions with BEGIN IMMEDIATE."""
+    if url is None:
+        if db_session.engine.url.get_backend_name() != "sqlite":
+            return db_session.engine
+        url = db_session.engine.url
+    # pysqlite's implicit transaction handling breaks SAVEPOINT; take over BEGIN ourselves
+    engine = create_engine(url, future=True, connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def _autocommit_driver(dbapi_connection, _record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin_immediate(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return engine
+
+
+class WriteCoordinator:
+    def __init__(
+        self,
+        engine=None,
+        *,
+        window: float = WRITE_WINDOW,
+        max_batch: int = WRITE_BATCH,
+        max_queue: int = WRITE_QUEUE_MAX,
+        timeout: float = WRITE_TIMEOUT,
+    ) -> None:
+        self.engine = engine if engine is not None else writer_engine()
+        self.window = window
+        self.max_batch = max(max_batch, 1)
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.factory = sessionmaker(bind=self.engine, class_=GroupSession, autoflush=False, expire_on_commit=False)
+        self.queue: queue.Queue[WriteOp | None] = queue.Queue()
+        self.stats = {"batches": 0, "ops": 0, "failed_ops": 0, "failed_batches": 0}
+        self.shed: Counter[str] = Counter()
+        self._thread = threading.Thread(target=self._run, name="genapp-writer", daemon=True)
+        self._thread.start()
+
+    def on_writer_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        if self.max_queue > 0 and self.queue.qsize() >= self.max_queue:
+            self.shed["88"] += 1
+            raise CobolError("88", "Schreib-Warteschlange ist voll")
+        op = WriteOp(fn, args, kwargs)
+        self.queue.put(op)
+        return op.future
+
+    def expire(self, future: Future) -> CobolError:
+        """Give up waiting for ``future``: cancel it if still queued and return the COBOL 89 error."""
+        future.cancel()
+        self.shed["89"] += 1
+        return CobolError("89", "Schreibvorgang hat das Zeitlimit überschritten")
+
+    def result(self, future: Future):
+        """``future.result()`` bounded by the write timeout."""
+        try:
+            return future.result(self.timeout if self.timeout > 0 else None)
+        except TimeoutError:
+            if future.done():  # raised by the operation itself
+                raise
+            raise self.expire(future) from None
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        self.queue.put(None)
+        self._thread.join(timeout)
+
+    def _collect(self, first: WriteOp) -> tuple[list[WriteOp], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                op = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if op is None:
+                return batch, True
+            batch.append(op)
+        return batch, False
+
+    def _run(self) -> None:
+        while True:
+            first = self.queue.get()
+            if first is None:
+                return
+            batch, stopping = self._collect(first)
+            self._execute(batch)
+            if stopping:
+                return
+
+    def _execute(self, batch: list[WriteOp]) -> None:
+        outcomes: list[tuple[WriteOp, object, BaseException | None]] = []
+        db = self.factory()
+        try:
+            with db.begin():
+                for op in batch:
+                    if not op.future.set_running_or_notify_cancel():
+                        continue
+                    db.begin_op()
+                    try:
+                        result = op.fn(db, *op.args, **op.kwargs)
+                    except Exception as exc:  # the op's own savepoint is rolled back, the batch continues
+                        db.end_op(ok=False)
+                        outcomes.append((op, None, exc))
+                    else:
+                        db.end_op(ok=True)
+                        outcomes.append((op, result, None))
+        except Exception as exc:
+            self.stats["failed_batches"] += 1
+            for op in batch:
+                if not op.future.done():
+                    op.future.set_exception(exc)
+            return
+        finally:
+            db.close()  # detaches results; attributes stay loaded (expire_on_commit=False)
+        self.stats["batches"] += 1
+        for op, result, error in outcomes:
+            self.stats["ops"] += 1
+            if error is not None:
+                self.stats["failed_ops"] += 1
+                op.future.set_exception(error)
+            else:
+                op.future.set_result(result)
+
+
+_coordinator: WriteCoordinator | None = None
+_coordinator_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return WRITE_QUEUE
+
+
+def coordinator() -> WriteCoordinator:
+    global _coordinator
+    if _coordinator is None:
+        with _coordinator_lock:
+            if _coordinator is None:
+                _coordinator = WriteCoordinator()
+    return _coordinator
+
+
+def shutdown() -> None:
+    global _coordinator
+    with _coordinator_lock:
+        if _coordinator is not None:
+            _coordinator.stop()
+            _coordinator = None
+
+
+def _same_database(a, b) -> bool:
+    # sync and async engines of one database differ only in the driver
+    return (a.get_backend_name(), a.host, a.port, a.database) == (b.get_backend_name(), b.host, b.port, b.database)
+
+
+def queued(db) -> bool:
+    """True if writes on ``db`` go through the queue: it is on and ``db`` is bound to the writer's database."""
+    if not WRITE_QUEUE:
+        return False
+    target = _coordinator.engine.url if _coordinator is not None else db_session.engine.url
+    return _same_database(db.get_bind().url, target)
+
+
+def _runs_direct(db, kwargs: dict) -> bool:
+    if not WRITE_QUEUE or kwargs.get("commit", True) is False or isinstance(db, GroupSession):
+        return True
+    if _coordinator is not None and _coordinator.on_writer_thread():
+        return True
+    return not queued(db)
+
+
+def routed(fn):
+    """Route a mutating ``fn(db, ...)`` through the writer queue when it is enabled.
+
+    The decorated function keeps its signature; ``fn.submit(*args, **kwargs)``
+    returns the `Future` directly (used by the async services).
+    """
+
+    @functools.wraps(fn)
+    def wrapper(db, *args, **kwargs):
+        if _runs_direct(db, kwargs):
+            return fn(db, *args, **kwargs)
+        db_session.mark_written(db)  # later reads of this request go to the primary
+        coord = coordinator()
+        return coord.result(coord.submit(fn, *args, **kwargs))
+
+    wrapper.submit = lambda *args, **kwargs: coordinator().submit(fn, *args, **kwargs)
+    return wrapper
+
+
+def _writer_stat(key: str):
+    return _coordinator.stats[key] if _coordinator is not None else None
+
+
+registry.counter("genapp_writer_batches_total", "Group-commit transactions of the writer queue", lambda: _writer_stat("batches"))
+registry.counter("genapp_writer_ops_total", "Operations executed by the writer queue", lambda: _writer_stat("ops"))
+registry.counter("genapp_writer_failed_ops_total", "Writer queue operations that raised", lambda: _writer_stat("failed_ops"))
+registry.counter(
+    "genapp_writer_rejected_total",
+    "Writer queue calls rejected with COBOL 88 (queue full) or 89 (timeout)",
+    lambda: [({"code": code}, value) for code, value in sorted(_coordinator.shed.items())] if _coordinator is not None else None,
+)
+registry.gauge("genapp_writer_queue_depth", "Operations waiting for the writer thread", lambda: _coordinator.queue.qsize() if _coordinator is not None else None)
@@ -1,67 +1,99 @@
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, Depends
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from sqlalchemy import select, func
 from sqlalchemy.orm import Session
 
-from app.db.session import Base, engine, get_db
-from app.db import models
+from app.db import counts, outbox, retention, snapshot, writer
+from app.db.session import engine, get_db
+from app.db.migrations import init_db
 from app.api.routes_customers import router as customers_router
 from app.api.routes_policies import router as policies_router
 from app.api.routes_claims import router as claims_router
 from app.api.routes_events import router as events_router
+from app.api.routes_admin import router as admin_router
+from app.api.routes_reports import router as reports_router
+from app.api.routes_metrics import router as metrics_router
+from app.api.routes_changes import router as changes_router
+from app.api.routes_quotes import router as quotes_router
+from app.api.routes_valuation import router as valuation_router
+from app.api.routing import GenappRoute
+from app.api.templating import templates
+from app.services import dashboard, renewals
+from app.utils import admission, idempotency
+from app.utils.compression import CompressionMiddleware
+from app.utils.profiling import ProfilingMiddleware
+from app.utils.scheduler import scheduler
+from app.utils.static import StaticAssets
 
-
-def _ensure_runtime_migrations() -> None:
-    """Lightweight, best-effort migrations for SQLite dev DB.
-    - Add commission column to policies if missing.
-    - Ensure unique index on policies.policy_number.
-    """
-    try:
-        with engine.connect() as conn:
-            # detect columns in policies
-            cols = [row[1] for row in conn.exec_driver_sql("PRAGMA table_info('policies')").fetchall()]
-            if 'commission' not in cols:
-                conn.exec_driver_sql("ALTER TABLE policies ADD COLUMN commission INTEGER")
-            # unique index for policy_number
-            conn.exec_driver_sql(
-                "CREATE UNIQUE INDEX IF NOT EXISTS uq_policies_policy_number ON policies(policy_number)"
-            )
-    except Exception:
-        # non-fatal in dev
-        pass
+# Serve the JSON API from coroutine handlers on the AsyncEngine (needs aiosqlite)
+ASYNC_API = os.getenv("GENAPP_ASYNC_API", "0").lower() in ("1", "true", "yes")
+# Create/migrate the schema on import; `app.serve` runs it once before starting the workers
+INIT_DB = os.getenv("GENAPP_INIT_DB", "1").lower() in ("1", "true", "yes")
 
 
-def init_db() -> None:
-    # Create tables if not exist (simple approach for local dev)
-    Base.metadata.create_all(bind=engine)
-    _ensure_runtime_migrations()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if snapshot.enabled():
+        scheduler.add("snapshot", snapshot.SNAPSHOT_INTERVAL, snapshot.refresh)
+    if counts.RECONCILE_INTERVAL > 0:
+        scheduler.add("counts", counts.RECONCILE_INTERVAL, lambda: counts.reconcile(engine), run_at_start=False)
+    if retention.enabled():
+        scheduler.add("events_compaction", retention.COMPACT_INTERVAL, retention.compact)
+    if outbox.RETENTION_HOURS > 0 and outbox.PRUNE_INTERVAL > 0:
+        scheduler.add("outbox_prune", outbox.PRUNE_INTERVAL, outbox.prune)
+    if idempotency.PRUNE_INTERVAL > 0:
+        scheduler.add("idempotency_prune", idempotency.PRUNE_INTERVAL, idempotency.key_store.prune)
+    if renewals.RENEWAL_INTERVAL > 0:
+        scheduler.add("renewals", renewals.RENEWAL_INTERVAL, renewals.run_scheduled, run_at_start=False)
+    scheduler.start()
+    try:
+        yield
+    finally:
+        scheduler.stop()
+        writer.shutdown()
 
 
-def create_app() -> FastAPI:
-    app = FastAPI(title="GenApp Python", version="0.1.0")
-    init_db()
+def create_app(async_api: bool | None = None) -> FastAPI:
+    if async_api is None:
+        async_api = ASYNC_API
+    app = FastAPI(title="GenApp Python", version="0.1.0", lifespan=lifespan)
+    app.router.route_class = GenappRoute
+    if INIT_DB:
+        init_db()
+    app.add_middleware(idempotency.IdempotencyMiddleware)
+    app.add_middleware(ProfilingMiddleware)
+    # outside idempotency, so stored responses stay uncompressed and each replay is negotiated again
+    app.add_middleware(CompressionMiddleware)
+    if admission.ADMISSION:
+        # outermost: shed before any other work is done for the request
+        app.add_middleware(admission.AdmissionMiddleware)
 
     # Static & templates
-    app.mount("/static", StaticFiles(directory="app/static"), name="static")
-    templates = Jinja2Templates(directory="app/templates")
+    app.mount("/static", StaticAssets(), name="static")
 
     # Routers
+    if async_api:
+        from app.api.routes_async import router as async_router
+
+        app.include_router(async_router)
     app.include_router(customers_router)
     app.include_router(policies_router)
     app.include_router(claims_router)
     app.include_router(events_router)
+    app.include_router(admin_router)
+    app.include_router(reports_router)
+    app.include_router(metrics_router)
+    app.include_router(changes_router)
+    app.include_router(quotes_router)
+    app.include_router(valuation_router)
 
     @app.get("/")
     def index(request: Request, db: Session = Depends(get_db)):
-        counts = {
-            "customers": db.execute(select(func.count(models.Customer.id))).scalar_one(),
-            "policies": db.execute(select(func.count(models.Policy.id))).scalar_one(),
-            "claims": db.execute(select(func.count(models.Claim.id))).scalar_one(),
-            "events": db.execute(select(func.count(models.Event.id))).scalar_one(),
-        }
-        return templates.TemplateResponse("index.html", {"request": request, "counts": counts})
+        counts = dashboard.counts(db)
+        return templates.TemplateResponse(
+            "index.html",
+            {"request": request, "counts": counts, "snapshot": snapshot.state.as_dict()},
+        )
 
     return app
 
@@ -70,3 +102,5 @@ app = create_app()
 
 # To run locally:
 # uvicorn app.main:app --reload
+# Production (several worker processes):
+# python -m app.serve --workers 4
@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from typing import Any, Optional
+
+
+class BulkChange(BaseModel):
+    id: int
+    changes: dict[str, Any] = Field(default_factory=dict)
+
+
+class BulkItemOut(BaseModel):
+    id: int
+    status: str  # updated | unchanged | error
+    fields: Optional[list[str]] = None
+    code: Optional[str] = None
+    detail: Optional[str] = None
+
+
+class BulkUpdateOut(BaseModel):
+    updated: int
+    unchanged: int
+    failed: int
+    items: list[BulkItemOut]
@@ -0,0 +1,13 @@
+from pydantic import BaseModel, ConfigDict
+import datetime as dt
+
+
+class ConsumerPosition(BaseModel):
+    position: int
+
+
+class ConsumerOut(BaseModel):
+    name: str
+    position: int
+    updated_at: dt.datetime
+    model_config = ConfigDict(from_attributes=True)
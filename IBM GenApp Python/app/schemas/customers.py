@@ -19,7 +19,7 @@ class CustomerOut(BaseModel):
     id: int
     first_name: str
     last_name: str
-    date_of_birth: Optional[str]
+    date_of_birth: Optional[date]
     postcode: Optional[str]
     model_config = ConfigDict(from_attributes=True)
 
@@ -0,0 +1,23 @@
+from pydantic import BaseModel, ConfigDict, field_validator
+from typing import Any, Optional
+import datetime as dt
+import json
+
+
+class EventOut(BaseModel):
+    id: int
+    created_at: dt.datetime
+    source: str
+    level: str
+    message: str
+    entity_type: Optional[str] = None
+    entity_id: Optional[int] = None
+    action: Optional[str] = None
+    diff: Optional[dict[str, Any]] = None
+    model_config = ConfigDict(from_attributes=True)
+
+    @field_validator("diff", mode="before")
+    @classmethod
+    def _decode_diff(cls, value):
+        # stored as compact JSON text
+        return json.loads(value) if isinstance(value, str) else value
@@ -0,0 +1,21 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+import datetime as dt
+
+
+class MotorRisk(BaseModel):
+    value: Optional[int] = Field(None, ge=0)
+    cc: Optional[int] = Field(None, ge=0)
+    manufactured: Optional[str] = Field(None, max_length=10)
+    accidents: Optional[int] = Field(None, ge=0)
+
+
+class MotorQuoteBatch(BaseModel):
+    risks: list[MotorRisk]
+    as_of: Optional[dt.date] = None
+    explain: bool = False
+
+
+class MotorQuoteOut(BaseModel):
+    premium: int
+    factors: dict[str, float]
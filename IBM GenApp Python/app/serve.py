@@ -0,0 +1,208 @@
+"""Production entry point: ``python -m app.serve --workers 4``.
+
+The parent process creates/migrates the schema once, binds the listening
+socket with a large backlog and imports the app (preload), then forks the
+workers. They share the socket and the already imported code (copy-on-write)
+and each run their own uvicorn server with uvloop and httptools when those
+are installed (``pip install uvloop httptools``), asyncio/h11 otherwise.
+
+Process-wide resources are coordinated here:
+
+- schema setup runs only in the parent (workers start with ``GENAPP_INIT_DB=0``)
+- pooled DB connections inherited from the parent are dropped in every worker
+- maintenance tasks of the scheduler run in worker 0 only
+- with several workers each reserves customer/policy numbers in blocks of
+  ``GENAPP_COUNTER_BLOCK`` (default 100 here, see `app.services.counters`)
+- the writer queue (``GENAPP_WRITE_QUEUE``) is one thread per process, so it
+  is refused together with several workers: N queues would be N writers
+
+Everything else in memory is per worker: the event stream buffer and the
+change-feed signal (both re-read the database for other workers' commits),
+the idempotency in-flight map (other workers poll the key row) and the
+admission gates (limits apply per worker).
+
+Workers that die are restarted with the same index. Without ``os.fork``
+(Windows) or with ``--no-preload`` uvicorn's own multi-process mode is used;
+then every worker runs the maintenance tasks.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+
+import uvicorn
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+HOST = os.getenv("GENAPP_HOST", "127.0.0.1")
+PORT = int(os.getenv("GENAPP_PORT", "8000"))
+# 0: one worker per CPU
+WORKERS = int(os.getenv("GENAPP_WORKERS", "0"))
+KEEPALIVE = float(os.getenv("GENAPP_KEEPALIVE_S", "75"))
+BACKLOG = int(os.getenv("GENAPP_BACKLOG", "2048"))
+GRACEFUL_TIMEOUT = float(os.getenv("GENAPP_GRACEFUL_TIMEOUT_S", "30"))
+WORKER_COUNTER_BLOCK = "100"
+
+logger = logging.getLogger("genapp.serve")
+
+
+def event_loop() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_protocol() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def server_options(args: argparse.Namespace) -> dict:
+    return {
+        "loop": event_loop(),
+        "http": http_protocol(),
+        "lifespan": "on",
+        "backlog": args.backlog,
+        "timeout_keep_alive": args.keepalive,
+        "timeout_graceful_shutdown": GRACEFUL_TIMEOUT,
+        "access_log": args.access_log,
+        "log_level": args.log_level,
+        "server_header": False,
+    }
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock: socket.socket, index: int, options: dict) -> None:
+    from app.db.session import dispose_after_fork
+    from app.utils.scheduler import scheduler
+
+    for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+        signal.signal(signum, signal.SIG_DFL)
+    dispose_after_fork()
+    scheduler.enabled = index == 0
+    uvicorn.Server(uvicorn.Config(app, **options)).run(sockets=[sock])
+
+
+class Supervisor:
+    """Forks the workers from the preloaded parent and restarts the ones that exit."""
+
+    def __init__(self, app, sock: socket.socket, workers: int, options: dict) -> None:
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.options = options
+        self.children: dict[int, tuple[int, float]] = {}  # pid -> (index, started)
+        self.stopping = False
+
+    def spawn(self, index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(self.app, self.sock, index, self.options)
+            except BaseException:
+                logger.exception("worker %d failed", index)
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = (index, time.monotonic())
+        logger.info("worker %d started (pid %d)", index, pid)
+
+    def stop(self, signum=None, _frame=None) -> None:
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> int:
+        for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+            signal.signal(signum, self.stop)
+        for index in range(self.workers):
+            self.spawn(index)
+        deadline = None
+        while self.children:
+            if self.stopping and deadline is None:
+                deadline = time.monotonic() + GRACEFUL_TIMEOUT + 5
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                if deadline is not None and time.monotonic() > deadline:
+                    for child in self.children:
+                        os.kill(child, signal.SIGKILL)
+                time.sleep(0.2)
+                continue
+            index, started = self.children.pop(pid)
+            if self.stopping:
+                continue
+            logger.warning("worker %d (pid %d) exited with status %d, restarting", index, pid, os.waitstatus_to_exitcode(status))
+            if time.monotonic() - started < 1.0:
+                time.sleep(1.0)  # do not spin on a worker that fails right at start
+            self.spawn(index)
+        self.sock.close()
+        return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Worker processes (0: one per CPU)")
+    parser.add_argument("--keepalive", type=float, default=KEEPALIVE, help="Keep-alive timeout in seconds")
+    parser.add_argument("--backlog", type=int, default=BACKLOG, help="Listen backlog")
+    parser.add_argument("--access-log", action="store_true", help="Log every request (costs throughput)")
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--no-preload", action="store_true", help="Let uvicorn spawn and import per worker")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    workers = args.workers or os.cpu_count() or 1
+    # templates and static files are resolved relative to the project folder
+    os.chdir(BASE_DIR)
+    if str(BASE_DIR) not in sys.path:
+        sys.path.insert(0, str(BASE_DIR))
+    from app.db import writer
+
+    if workers > 1 and writer.enabled():
+        parser.error("GENAPP_WRITE_QUEUE=1 needs a single worker (--workers 1): every worker would run its own writer")
+    if workers > 1:
+        os.environ.setdefault("GENAPP_COUNTER_BLOCK", WORKER_COUNTER_BLOCK)
+
+    from app.db.migrations import init_db
+    from app.db.session import engine
+
+    init_db()
+    engine.dispose()
+    os.environ["GENAPP_INIT_DB"] = "0"
+    options = server_options(args)
+    logger.info("serving on %s:%d with %d worker(s), loop=%s, http=%s", args.host, args.port, workers, options["loop"], options["http"])
+
+    if workers == 1 or args.no_preload or not hasattr(os, "fork"):
+        uvicorn.run("app.main:app", host=args.host, port=args.port, workers=workers if workers > 1 else None, **options)
+        return 0
+
+    sock = bind_socket(args.host, args.port, args.backlog)
+    from app.main import app
+
+    engine.dispose()
+    return Supervisor(app, sock, workers, options).run()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,187 @@
+"""Async variants of the service functions for the coroutine API routes.
+
+Reads run natively on the `AsyncSession` and reuse the statement builders of the
+sync services. Writes delegate to the sync functions through
+`AsyncSession.run_sync` (or await the writer queue, see `app.db.writer`), so
+counters, validation, COBOL codes and event logging stay in one place.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import models, retention, writer
+from app.db.session import mark_written, read_only
+from app.schemas.claims import ClaimCreate, ClaimUpdate
+from app.schemas.customers import CustomerCreate, CustomerSecurityIn, CustomerUpdate
+from app.schemas.policies import (
+    PolicyCreate,
+    PolicyUpdate,
+    MotorPolicyCreate,
+    HousePolicyCreate,
+    EndowmentPolicyCreate,
+    CommercialPolicyCreate,
+)
+from app.services import claims, customers, events, policies
+from app.utils.errors import CobolError
+
+
+async def _write(db: AsyncSession, fn, *args):
+    if writer.queued(db.sync_session):
+        # the writer thread has its own session; just await its future
+        mark_written(db.sync_session)
+        coord = writer.coordinator()
+        future = fn.submit(*args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), coord.timeout if coord.timeout > 0 else None)
+        except TimeoutError:
+            if future.done():
+                raise
+            raise coord.expire(future) from None
+    return await db.run_sync(fn, *args)
+
+
+# Customers
+async def list_customers(
+    db: AsyncSession,
+    limit: int = 100,
+    offset: int = 0,
+    name: str | None = None,
+    postcode: str | None = None,
+) -> List[models.Customer]:
+    with read_only(db.sync_session):
+        result = await db.execute(customers.list_customers_stmt(limit, offset, name, postcode))
+    return list(result.scalars())
+
+
+async def get_customer(db: AsyncSession, customer_id: int) -> Optional[models.Customer]:
+    with read_only(db.sync_session):
+        return await db.get(models.Customer, customer_id)
+
+
+async def create_customer(db: AsyncSession, data: CustomerCreate) -> models.Customer:
+    return await _write(db, customers.create_customer, data)
+
+
+async def update_customer(db: AsyncSession, customer_id: int, data: CustomerUpdate) -> Optional[models.Customer]:
+    return await _write(db, customers.update_customer, customer_id, data)
+
+
+async def get_customer_security(db: AsyncSession, customer_id: int) -> Optional[models.CustomerSecure]:
+    with read_only(db.sync_session):
+        cust = await db.get(models.Customer, customer_id)
+        if not cust:
+            raise CobolError("01", "Customer not found")
+        return await db.get(models.CustomerSecure, cust.customer_number)
+
+
+async def set_customer_security(db: AsyncSession, customer_id: int, data: CustomerSecurityIn) -> Optional[models.CustomerSecure]:
+    return await _write(db, customers.set_customer_security, customer_id, data)
+
+
+async def rotate_customer_security(db: AsyncSession, customer_id: int) -> Optional[models.CustomerSecure]:
+    return await _write(db, customers.rotate_customer_security, customer_id)
+
+
+# Policies
+async def list_policies(
+    db: AsyncSession,
+    limit: int = 100,
+    offset: int = 0,
+    policy_type: str | None = None,
+    customer_id: int | None = None,
+    active_only: bool = False,
+    postcode: str | None = None,
+) -> List[models.Policy]:
+    stmt = policies.list_policies_stmt(limit, offset, policy_type, customer_id, active_only, postcode)
+    with read_only(db.sync_session):
+        result = await db.execute(stmt)
+    return list(result.scalars())
+
+
+async def list_policies_detailed(db: AsyncSession, **filters) -> list[dict]:
+    return await db.run_sync(lambda session: policies.list_policies_detailed(session, **filters))
+
+
+async def create_policy(db: AsyncSession, data: PolicyCreate) -> models.Policy:
+    return await _write(db, policies.create_policy, data)
+
+
+async def create_policy_motor(db: AsyncSession, data: MotorPolicyCreate) -> models.Policy:
+    return await _write(db, policies.create_policy_motor, data)
+
+
+async def create_policy_house(db: AsyncSession, data: HousePolicyCreate) -> models.Policy:
+    return await _write(db, policies.create_policy_house, data)
+
+
+async def create_policy_endowment(db: AsyncSession, data: EndowmentPolicyCreate) -> models.Policy:
+    return await _write(db, policies.create_policy_endowment, data)
+
+
+async def create_policy_commercial(db: AsyncSession, data: CommercialPolicyCreate) -> models.Policy:
+    return await _write(db, policies.create_policy_commercial, data)
+
+
+async def update_policy(db: AsyncSession, policy_id: int, data: PolicyUpdate) -> models.Policy:
+    return await _write(db, policies.update_policy, policy_id, data)
+
+
+# Claims
+async def list_claims(
+    db: AsyncSession, policy_id: int | None = None, limit: int = 100, offset: int = 0, *, rows: bool = False
+) -> list:
+    stmt = claims.list_claims_stmt(policy_id, limit, offset)
+    with read_only(db.sync_session):
+        if rows:
+            result = await db.execute(stmt.with_only_columns(*claims.LIST_COLUMNS))
+            return [dict(row) for row in result.mappings()]
+        result = await db.execute(stmt)
+    return list(result.scalars())
+
+
+async def get_claim(db: AsyncSession, claim_id: int) -> models.Claim:
+    with read_only(db.sync_session):
+        obj = await db.get(models.Claim, claim_id)
+    if not obj:
+        raise CobolError("01", "Claim not found")
+    return obj
+
+
+async def create_claim(db: AsyncSession, data: ClaimCreate) -> models.Claim:
+    return await _write(db, claims.create_claim, data)
+
+
+async def update_claim(db: AsyncSession, claim_id: int, data: ClaimUpdate) -> models.Claim:
+    return await _write(db, claims.update_claim, claim_id, data)
+
+
+# Events
+async def list_events(
+    db: AsyncSession,
+    *,
+    source: Optional[str] = None,
+    level: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0,
+    rows: bool = False,
+) -> list:
+    filters = {"source": source, "level": level}
+    with read_only(db.sync_session):
+        stmt = events.list_events_stmt(**filters, limit=limit, offset=offset)
+        if rows:
+            result = await db.execute(stmt.with_only_columns(*models.Event.__table__.columns))
+            items = [dict(row) for row in result.mappings()]
+        else:
+            items = list((await db.execute(stmt)).scalars())
+        if len(items) >= limit or not retention.archives():
+            return items
+        live_total = None if items else await db.scalar(events.live_count_stmt(**filters))
+    archive_limit, archive_offset = events.archive_window(len(items), limit=limit, offset=offset, live_total=live_total)
+    # archive files are read with the sync driver; keep that off the event loop
+    items.extend(
+        await asyncio.to_thread(retention.list_archived, **filters, limit=archive_limit, offset=archive_offset, rows=rows)
+    )
+    return items
@@ -0,0 +1,357 @@
+"""Set-based bulk updates for policies (incl. type-specific detail fields) and claims.
+
+`update_policies` / `update_claims` take ``{id, changes}`` items and apply them
+in chunks of ``GENAPP_BULK_CHUNK`` items, one transaction per chunk. Per chunk
+the current rows are read with one ``SELECT ... WHERE id IN``; items setting
+identical values are written with one ``UPDATE ... WHERE id IN``, the rest
+with one ``executemany`` per set of changed columns. Audit events and change
+feed rows are inserted in the same transaction. Each chunk is one `routed`
+operation, so with ``GENAPP_WRITE_QUEUE`` it runs on the writer thread (inside
+its own savepoint of a group commit) like every other mutating service.
+
+Every item gets an outcome: ``updated``, ``unchanged`` or ``error`` with the
+COBOL code (``01`` unknown id, ``98`` invalid field/value, ``90`` policy number
+in use or the chunk's transaction failed). Invalid items never stop the
+others; a failing chunk is rolled back as a whole while earlier chunks stay
+committed.
+"""
+from __future__ import annotations
+
+import json
+import os
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Annotated, Any, Iterable
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from sqlalchemy import Table, bindparam, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.db import counts as entity_counts
+from app.db import models, outbox
+from app.db.writer import routed
+from app.schemas.claims import ClaimUpdate
+from app.schemas.policies import (
+    PolicyUpdate,
+    MotorPolicyCreate,
+    HousePolicyCreate,
+    EndowmentPolicyCreate,
+    CommercialPolicyCreate,
+)
+from app.utils.errors import CobolError
+
+BULK_CHUNK = int(os.getenv("GENAPP_BULK_CHUNK", "500"))
+BULK_MAX_ITEMS = int(os.getenv("GENAPP_BULK_MAX_ITEMS", "10000"))
+
+# policy_type -> (detail model, create schema carrying the field constraints, outbox entity type)
+DETAIL_TYPES = {
+    "M": (models.MotorPolicy, MotorPolicyCreate, "policy_motor"),
+    "H": (models.HousePolicy, HousePolicyCreate, "policy_house"),
+    "E": (models.EndowmentPolicy, EndowmentPolicyCreate, "policy_endowment"),
+    "C": (models.CommercialPolicy, CommercialPolicyCreate, "policy_commercial"),
+}
+
+
+@dataclass
+class BulkResult:
+    items: list[dict] = field(default_factory=list)
+
+    def outcome(self, item_id: int, status: str, *, code: str | None = None, detail: str | None = None, fields: list[str] | None = None) -> None:
+        entry: dict[str, Any] = {"id": item_id, "status": status}
+        if fields is not None:
+            entry["fields"] = fields
+        if code is not None:
+            entry["code"] = code
+            entry["detail"] = detail
+        self.items.append(entry)
+
+    def as_dict(self) -> dict:
+        totals = defaultdict(int)
+        for item in self.items:
+            totals[item["status"]] += 1
+        return {
+            "updated": totals["updated"],
+            "unchanged": totals["unchanged"],
+            "failed": totals["error"],
+            "items": self.items,
+        }
+
+
+@lru_cache(maxsize=None)
+def _detail_adapters(policy_type: str) -> dict[str, TypeAdapter]:
+    """Validators for the updatable detail columns of ``policy_type`` (constraints of its create schema)."""
+    model, schema, _entity = DETAIL_TYPES[policy_type]
+    adapters = {}
+    for column in model.__table__.columns:
+        info = schema.model_fields.get(column.name)
+        if info is None or column.name in ("id", "policy_id"):
+            continue
+        annotation = Annotated[(info.annotation, *info.metadata)] if info.metadata else info.annotation
+        adapters[column.name] = TypeAdapter(annotation)
+    return adapters
+
+
+def _validate_base(schema: type[BaseModel], changes: dict) -> dict:
+    unknown = sorted(set(changes) - set(schema.model_fields))
+    if unknown:
+        raise ValueError(f"unbekannte Felder: {', '.join(unknown)}")
+    return schema.model_validate(changes).model_dump(exclude_unset=True)
+
+
+def _error_text(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        err = exc.errors()[0]
+        where = ".".join(str(part) for part in err.get("loc", ()))
+        return f"{where}: {err.get('msg', 'invalid value')}" if where else err.get("msg", "invalid value")
+    return str(exc)
+
+
+def _diff(current: dict, changes: dict) -> dict[str, list]:
+    return {name: [current[name], value] for name, value in changes.items() if current[name] != value}
+
+
+def _chunks(items: list, size: int) -> Iterable[list]:
+    for start in range(0, len(items), max(size, 1)):
+        yield items[start : start + size]
+
+
+def _fetch(db: Session, table: Table, key: str, ids: Iterable[int]) -> dict[int, dict]:
+    ids = list(ids)
+    if not ids:
+        return {}
+    rows = db.execute(select(table).where(table.c[key].in_(ids))).mappings()
+    return {row[key]: dict(row) for row in rows}
+
+
+def apply_updates(db: Session, table: Table, key: str, updates: list[tuple[int, dict]]) -> int:
+    """Write ``(key value, {column: value})`` pairs set-based; returns the number of statements issued.
+
+    Items with identical changes share one ``UPDATE ... WHERE key IN (...)``; the
+    rest are grouped by their set of columns into one executemany each.
+    """
+    same: dict[tuple, list[int]] = defaultdict(list)
+    for key_value, changes in updates:
+        same[tuple(sorted(changes.items(), key=lambda kv: kv[0]))].append(key_value)
+    by_columns: dict[tuple[str, ...], list[dict]] = defaultdict(list)
+    statements = 0
+    for items, key_values in same.items():
+        if len(key_values) > 1:
+            db.execute(update(table).where(table.c[key].in_(key_values)).values(dict(items)))
+            statements += 1
+        else:
+            by_columns[tuple(name for name, _ in items)].append({"b_key": key_values[0], **dict(items)})
+    for columns, params in by_columns.items():
+        stmt = update(table).where(table.c[key] == bindparam("b_key")).values({name: bindparam(name) for name in columns})
+        db.execute(stmt, params)
+        statements += 1
+    return statements
+
+
+def _dedupe(items: list[dict], result: BulkResult) -> list[dict]:
+    if len(items) > BULK_MAX_ITEMS:
+        raise CobolError("98", f"höchstens {BULK_MAX_ITEMS} Einträge pro Anfrage")
+    seen: set[int] = set()
+    unique = []
+    for item in items:
+        if item["id"] in seen:
+            result.outcome(item["id"], "error", code="98", detail="id mehrfach in der Anfrage")
+            continue
+        seen.add(item["id"])
+        unique.append(item)
+    return unique
+
+
+def _commit_chunk(
+    db: Session,
+    result: BulkResult,
+    writes: list[tuple[Table, str, list[tuple[int, dict]]]],
+    pending: list[tuple[int, list[str]]],
+    events: list[dict],
+    feed: list[dict],
+) -> None:
+    """Apply one chunk's updates with its audit and change feed rows in one transaction."""
+    try:
+        for table, key, updates in writes:
+            apply_updates(db, table, key, updates)
+        if events:
+            db.execute(insert(models.Event), events)
+            entity_counts.add(db, "events", len(events))
+        outbox.append(db, feed)
+        db.commit()
+    except Exception as exc:
+        db.rollback()
+        for item_id, _fields in pending:
+            result.outcome(item_id, "error", code="90", detail=f"Transaktion fehlgeschlagen: {type(exc).__name__}")
+        return
+    for item_id, fields in pending:
+        result.outcome(item_id, "updated", fields=fields)
+
+
+def _event(source: str, entity_type: str, entity_id: int, diff: dict) -> dict:
+    return {
+        "source": source,
+        "level": "INFO",
+        "message": f"update {entity_type} id={entity_id}",
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "action": "update",
+        "diff": json.dumps(diff, default=str, separators=(",", ":")),
+    }
+
+
+def _feed(entity_type: str, entity_id: int, image: dict) -> dict:
+    return {"entity_type": entity_type, "entity_id": entity_id, "op": "update", "payload": outbox.row_payload(image)}
+
+
+@routed
+def _update_claims_chunk(db: Session, chunk: list[dict]) -> list[dict]:
+    """One chunk of `update_claims` (one writer-queue operation); returns its item outcomes."""
+    result = BulkResult()
+    table = models.Claim.__table__
+    current = _fetch(db, table, "id", (item["id"] for item in chunk))
+    updates, pending, events, feed = [], [], [], []
+    for item in chunk:
+        row = current.get(item["id"])
+        if row is None:
+            result.outcome(item["id"], "error", code="01", detail="Claim not found")
+            continue
+        try:
+            changes = _validate_base(ClaimUpdate, item["changes"])
+        except (ValueError, ValidationError) as exc:
+            result.outcome(item["id"], "error", code="98", detail=_error_text(exc))
+            continue
+        diff = _diff(row, changes)
+        if not diff:
+            result.outcome(item["id"], "unchanged", fields=[])
+            continue
+        changed = {name: changes[name] for name in diff}
+        updates.append((item["id"], changed))
+        pending.append((item["id"], sorted(diff)))
+        events.append(_event("claims", "claim", item["id"], diff))
+        feed.append(_feed("claim", item["id"], {**row, **changed}))
+    if updates:
+        _commit_chunk(db, result, [(table, "id", updates)], pending, events, feed)
+    return result.items
+
+
+def update_claims(db: Session, items: list[dict], *, chunk_size: int = BULK_CHUNK) -> dict:
+    """Apply ``[{"id": ..., "changes": {...}}]`` to claims; returns counts and per-item outcomes."""
+    result = BulkResult()
+    for chunk in _chunks(_dedupe(items, result), chunk_size):
+        result.items.extend(_update_claims_chunk(db, chunk))
+    return result.as_dict()
+
+
+def _split_policy_changes(policy_type: str, changes: dict) -> tuple[dict, dict]:
+    base_fields = set(PolicyUpdate.model_fields)
+    adapters = _detail_adapters(policy_type) if policy_type in DETAIL_TYPES else {}
+    unknown = sorted(name for name in changes if name not in base_fields and name not in adapters)
+    if unknown:
+        raise ValueError(f"unbekannte Felder für Typ {policy_type}: {', '.join(unknown)}")
+    base = _validate_base(PolicyUpdate, {k: v for k, v in changes.items() if k in base_fields})
+    if "policy_number" in base:
+        number = base["policy_number"]
+        if number is None:
+            raise ValueError("policy_number darf nicht leer sein")
+        if number <= 0:
+            raise ValueError("policy_number muss positiv sein")
+    detail = {}
+    for name, value in changes.items():
+        if name in adapters:
+            try:
+                detail[name] = adapters[name].validate_python(value)
+            except ValidationError as exc:
+                raise ValueError(f"{name}: {exc.errors()[0].get('msg', 'invalid value')}") from exc
+    return base, detail
+
+
+def _taken_numbers(db: Session, wanted: dict[int, int]) -> set[int]:
+    """Policy ids in ``wanted`` (id -> new number) whose number is used by another policy."""
+    if not wanted:
+        return set()
+    owners: dict[int, list[int]] = defaultdict(list)
+    for policy_id, number in wanted.items():
+        owners[number].append(policy_id)
+    table = models.Policy.__table__
+    rows = db.execute(select(table.c.id, table.c.policy_number).where(table.c.policy_number.in_(list(owners))))
+    taken = {policy_id for ids in owners.values() if len(ids) > 1 for policy_id in ids}
+    for existing_id, number in rows:
+        taken.update(policy_id for policy_id in owners[number] if policy_id != existing_id)
+    return taken
+
+
+@routed
+def _update_policies_chunk(db: Session, chunk: list[dict]) -> list[dict]:
+    """One chunk of `update_policies` (one writer-queue operation); returns its item outcomes."""
+    result = BulkResult()
+    base_table = models.Policy.__table__
+    current = _fetch(db, base_table, "id", (item["id"] for item in chunk))
+    ids_by_type: dict[str, list[int]] = defaultdict(list)
+    for policy_id, row in current.items():
+        ids_by_type[row["policy_type"]].append(policy_id)
+    details = {
+        policy_type: _fetch(db, DETAIL_TYPES[policy_type][0].__table__, "policy_id", ids)
+        for policy_type, ids in ids_by_type.items()
+        if policy_type in DETAIL_TYPES
+    }
+
+    validated: list[tuple[dict, dict, dict]] = []
+    for item in chunk:
+        row = current.get(item["id"])
+        if row is None:
+            result.outcome(item["id"], "error", code="01", detail="Policy not found")
+            continue
+        try:
+            base, detail = _split_policy_changes(row["policy_type"], item["changes"])
+        except (ValueError, ValidationError) as exc:
+            result.outcome(item["id"], "error", code="98", detail=_error_text(exc))
+            continue
+        if detail and item["id"] not in details.get(row["policy_type"], {}):
+            result.outcome(item["id"], "error", code="01", detail="Policy detail not found")
+            continue
+        validated.append((row, base, detail))
+
+    wanted = {row["id"]: base["policy_number"] for row, base, _ in validated if base.get("policy_number", row["policy_number"]) != row["policy_number"]}
+    taken = _taken_numbers(db, wanted)
+
+    base_updates: list[tuple[int, dict]] = []
+    detail_updates: dict[str, list[tuple[int, dict]]] = defaultdict(list)
+    pending, events, feed = [], [], []
+    for row, base, detail in validated:
+        policy_id = row["id"]
+        if policy_id in taken:
+            result.outcome(policy_id, "error", code="90", detail="Policy number already in use")
+            continue
+        base_diff = _diff(row, base)
+        detail_row = details.get(row["policy_type"], {}).get(policy_id)
+        detail_diff = _diff(detail_row, detail) if detail else {}
+        if not base_diff and not detail_diff:
+            result.outcome(policy_id, "unchanged", fields=[])
+            continue
+        if base_diff:
+            changed = {name: base[name] for name in base_diff}
+            base_updates.append((policy_id, changed))
+            feed.append(_feed("policy", policy_id, {**row, **changed}))
+        if detail_diff:
+            changed = {name: detail[name] for name in detail_diff}
+            detail_updates[row["policy_type"]].append((policy_id, changed))
+            feed.append(_feed(DETAIL_TYPES[row["policy_type"]][2], policy_id, {**detail_row, **changed}))
+        diff = {**base_diff, **detail_diff}
+        pending.append((policy_id, sorted(diff)))
+        events.append(_event("policies", "policy", policy_id, diff))
+    if pending:
+        writes = [(base_table, "id", base_updates)] + [
+            (DETAIL_TYPES[policy_type][0].__table__, "policy_id", updates)
+            for policy_type, updates in detail_updates.items()
+        ]
+        _commit_chunk(db, result, writes, pending, events, feed)
+    return result.items
+
+
+def update_policies(db: Session, items: list[dict], *, chunk_size: int = BULK_CHUNK) -> dict:
+    """Apply ``[{"id": ..., "changes": {...}}]`` to policies; ``changes`` may mix base and detail fields."""
+    result = BulkResult()
+    for chunk in _chunks(_dedupe(items, result), chunk_size):
+        result.items.extend(_update_policies_chunk(db, chunk))
+    return result.as_dict()
@@ -0,0 +1,67 @@
+"""Change feed over the transactional outbox (see `app.db.outbox`)."""
+import json
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db import models, outbox
+from app.db.session import reads
+from app.db.writer import routed
+from app.utils.errors import CobolError
+
+
+def _as_dict(entry: models.OutboxEntry) -> dict:
+    return {
+        "seq": entry.seq,
+        "created_at": entry.created_at,
+        "entity_type": entry.entity_type,
+        "entity_id": entry.entity_id,
+        "op": entry.op,
+        "data": json.loads(entry.payload),
+    }
+
+
+@reads
+def list_changes(
+    db: Session,
+    after: int = 0,
+    limit: int = 500,
+    entity_type: Optional[str] = None,
+) -> List[dict]:
+    """Feed rows with ``seq > after`` in commit order (primary key range scan)."""
+    if after > 0:
+        pruned = outbox.pruned_through(db)
+        if after < pruned:
+            # rows after this position were pruned (possibly all of them); the consumer has to resync from a full read
+            raise CobolError("91", f"Position {after} liegt vor dem ältesten Eintrag {pruned + 1} (Retention)")
+    q = select(models.OutboxEntry).where(models.OutboxEntry.seq > after)
+    if entity_type:
+        q = q.where(models.OutboxEntry.entity_type.startswith(entity_type))
+    return [_as_dict(e) for e in db.execute(q.order_by(models.OutboxEntry.seq).limit(limit)).scalars()]
+
+
+@reads
+def get_consumer(db: Session, name: str) -> Optional[models.OutboxConsumer]:
+    return db.get(models.OutboxConsumer, name)
+
+
+@reads
+def list_consumers(db: Session) -> List[models.OutboxConsumer]:
+    return list(db.execute(select(models.OutboxConsumer).order_by(models.OutboxConsumer.name)).scalars())
+
+
+@routed
+def set_consumer_position(db: Session, name: str, position: int) -> models.OutboxConsumer:
+    """Store a consumer's acknowledged position; positions never move backwards."""
+    if position < 0:
+        raise CobolError("98", "position darf nicht negativ sein")
+    consumer = db.get(models.OutboxConsumer, name)
+    if consumer is None:
+        consumer = models.OutboxConsumer(name=name, position=position)
+        db.add(consumer)
+    else:
+        consumer.position = max(consumer.position, position)
+    db.commit()
+    db.refresh(consumer)
+    return consumer
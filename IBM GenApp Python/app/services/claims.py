@@ -1,18 +1,38 @@
+from sqlalchemy import Select, select
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Optional
 
 from app.db import models
+from app.db.session import reads
+from app.db.writer import routed
 from app.schemas.claims import ClaimCreate, ClaimUpdate
+from app.services.events import apply_changes, record_event
 from app.utils.errors import CobolError
 
 
-def list_claims(db: Session, policy_id: int | None = None, limit: int = 100, offset: int = 0) -> List[models.Claim]:
-    q = db.query(models.Claim)
+def list_claims_stmt(policy_id: int | None = None, limit: int = 100, offset: int = 0) -> Select:
+    q = select(models.Claim)
     if policy_id:
-        q = q.filter(models.Claim.policy_id == policy_id)
-    return q.order_by(models.Claim.id.asc()).offset(offset).limit(limit).all()
+        q = q.where(models.Claim.policy_id == policy_id)
+    return q.order_by(models.Claim.id.asc()).offset(offset).limit(limit)
 
 
+# the fields of ClaimOut, for row-based list output
+LIST_COLUMNS = (models.Claim.id, models.Claim.policy_id, models.Claim.number, models.Claim.date, models.Claim.value)
+
+
+@reads
+def list_claims(
+    db: Session, policy_id: int | None = None, limit: int = 100, offset: int = 0, *, rows: bool = False
+) -> list:
+    """Claims by id; ``rows=True`` returns `LIST_COLUMNS` dicts for direct JSON/MessagePack output."""
+    stmt = list_claims_stmt(policy_id, limit, offset)
+    if rows:
+        return [dict(row) for row in db.execute(stmt.with_only_columns(*LIST_COLUMNS)).mappings()]
+    return list(db.execute(stmt).scalars())
+
+
+@routed
 def create_claim(db: Session, data: ClaimCreate) -> models.Claim:
     # ensure policy exists
     if not db.get(models.Policy, data.policy_id):
@@ -29,20 +49,36 @@ def create_claim(db: Session, data: ClaimCreate) -> models.Claim:
     db.add(obj)
     db.commit()
     db.refresh(obj)
-    _log_event(db, source="claims", message=f"create claim id={obj.id} policy_id={obj.policy_id}")
+    record_event(
+        db,
+        source="claims",
+        message=f"create claim id={obj.id} policy_id={obj.policy_id}",
+        entity_type="claim",
+        entity_id=obj.id,
+        action="create",
+    )
     return obj
 
 
+@routed
 def delete_claim(db: Session, claim_id: int) -> bool:
     obj = db.get(models.Claim, claim_id)
     if not obj:
         raise CobolError("01", "Claim not found")
     db.delete(obj)
     db.commit()
-    _log_event(db, source="claims", message=f"delete claim id={claim_id}")
+    record_event(
+        db,
+        source="claims",
+        message=f"delete claim id={claim_id}",
+        entity_type="claim",
+        entity_id=claim_id,
+        action="delete",
+    )
     return True
 
 
+@reads
 def get_claim(db: Session, claim_id: int) -> models.Claim:
     obj = db.get(models.Claim, claim_id)
     if not obj:
@@ -50,6 +86,7 @@ def get_claim(db: Session, claim_id: int) -> models.Claim:
     return obj
 
 
+@routed
 def update_claim(
     db: Session,
     claim_id: int,
@@ -60,21 +97,21 @@ def update_claim(
     obj = db.get(models.Claim, claim_id)
     if not obj:
         raise CobolError("01", "Claim not found")
-    for field, value in data.model_dump(exclude_unset=True).items():
-        setattr(obj, field, value)
+    diff = apply_changes(obj, data.model_dump(exclude_unset=True))
     db.add(obj)
     if commit:
         db.commit()
         db.refresh(obj)
-        _log_event(db, source="claims", message=f"update claim id={obj.id}")
+        record_event(
+            db,
+            source="claims",
+            message=f"update claim id={obj.id}",
+            entity_type="claim",
+            entity_id=obj.id,
+            action="update",
+            diff=diff,
+        )
     else:
         db.flush()
     return obj
 
-
-def _log_event(db: Session, *, source: str, message: str, level: str = "INFO") -> None:
-    try:
-        db.add(models.Event(source=source, level=level, message=message))
-        db.commit()
-    except Exception:
-        db.rollback()
@@ -0,0 +1,114 @@
+"""Named counters (analogue of the CICS Named Counter Server).
+
+`next_value` hands out customer and policy numbers. With
+``GENAPP_COUNTER_BLOCK`` > 1 a process reserves that many numbers at once and
+serves the following calls from memory, so several worker processes
+(``python -m app.serve --workers N``) do not update the same counter row for
+every insert. Numbers then stay unique but are no longer ascending across
+workers, and the unused rest of a block is skipped when the process exits.
+
+A block only becomes usable for other sessions once the transaction that
+reserved it has committed; if that transaction (or the writer-queue savepoint)
+rolls back, the reservation is undone in the database and forgotten here too.
+"""
+from __future__ import annotations
+
+import os
+import threading
+
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+from app.db import models
+from app.db.session import insert_ignore, within
+from app.utils.metrics import registry
+
+COUNTER_BLOCK = int(os.getenv("GENAPP_COUNTER_BLOCK", "0"))
+
+_PENDING = "genapp_counter_blocks"
+
+
+def reserve_block(db: Session, name: str, size: int) -> int:
+    """Advance named counter ``name`` by ``size`` and return the first reserved value.
+
+    The caller owns the values ``first .. first + size - 1``; the row update is part
+    of the caller's transaction, like `_next_counter` in the services. It is a
+    single ``UPDATE ... RETURNING``, so concurrent sessions never read the same
+    value before writing it back.
+    """
+    table = models.Counter.__table__
+    advance = update(table).where(table.c.name == name).values(value=table.c.value + size).returning(table.c.value)
+    last = db.execute(advance).scalar()
+    if last is None:
+        db.execute(insert_ignore(table, db.get_bind().dialect.name).values(name=name, value=0))
+        last = db.execute(advance).scalar()
+    return last - size + 1
+
+
+class BlockPool:
+    """Committed, not yet used counter ranges of this process: name -> [next, end)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._blocks: dict[str, list[int]] = {}
+        self.reserved = 0
+
+    def take(self, name: str) -> int | None:
+        with self._lock:
+            block = self._blocks.get(name)
+            if not block or block[0] >= block[1]:
+                return None
+            value = block[0]
+            block[0] += 1
+            return value
+
+    def put(self, name: str, block: list[int]) -> None:
+        with self._lock:
+            current = self._blocks.get(name)
+            if block[0] < block[1] and (not current or current[0] >= current[1]):
+                self._blocks[name] = block
+
+    def clear(self) -> None:
+        with self._lock:
+            self._blocks.clear()
+
+
+pool = BlockPool()
+
+
+def next_value(db: Session, name: str, block: int | None = None) -> int:
+    """Next number of counter ``name``, from a per-process block when blocks are enabled."""
+    block = COUNTER_BLOCK if block is None else block
+    if block <= 1:
+        return reserve_block(db, name, 1)
+    value = pool.take(name)
+    if value is not None:
+        return value
+    # a block reserved earlier in this still open transaction
+    for _transaction, pending_name, pending in db.info.get(_PENDING, ()):
+        if pending_name == name and pending[0] < pending[1]:
+            pending[0] += 1
+            return pending[0] - 1
+    first = reserve_block(db, name, block)
+    pool.reserved += 1
+    transaction = db.get_nested_transaction() or db.get_transaction()
+    db.info.setdefault(_PENDING, []).append((transaction, name, [first + 1, first + block]))
+    return first
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_blocks(session: Session, previous_transaction) -> None:
+    pending = session.info.get(_PENDING)
+    if pending:
+        session.info[_PENDING] = [entry for entry in pending if not within(entry[0], previous_transaction)]
+
+
+@event.listens_for(Session, "after_commit")
+def _release_blocks(session: Session) -> None:
+    if session.in_nested_transaction():
+        return  # savepoint release; the reservation is not durable yet
+    for _transaction, name, block in session.info.pop(_PENDING, ()):
+        pool.put(name, block)
+
+
+registry.counter("genapp_counter_blocks_reserved_total", "Counter blocks reserved by this process", lambda: pool.reserved)
@@ -1,3 +1,4 @@
+from sqlalchemy import Select, select
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import os
@@ -5,6 +6,10 @@ import secrets
 import hashlib
 
 from app.db import models
+from app.db.session import reads
+from app.db.writer import routed
+from app.services import counters
+from app.services.events import apply_changes, record_event
 from app.schemas.customers import CustomerCreate, CustomerUpdate, CustomerSecurityIn
 from app.utils.errors import CobolError
 
@@ -17,18 +22,10 @@ DEFAULT_SECURITY_LENGTH = int(os.getenv("GENAPP_SECURITY_RANDOM_BYTES", "8"))
 
 
 def _next_counter(db: Session, name: str) -> int:
-    # simple counter using a single-row table, serialized by transaction
-    ctr = db.get(models.Counter, name)
-    if not ctr:
-        ctr = models.Counter(name=name, value=0)
-        db.add(ctr)
-        db.flush()
-    ctr.value += 1
-    db.add(ctr)
-    db.flush()
-    return ctr.value
+    return counters.next_value(db, name)
 
 
+@routed
 def create_customer(db: Session, data: CustomerCreate) -> models.Customer:
     cust_num = _next_counter(db, "GENACUSTNUM")
     obj = models.Customer(
@@ -56,71 +53,114 @@ def create_customer(db: Session, data: CustomerCreate) -> models.Customer:
     db.commit()
     db.refresh(obj)
     # audit
-    _log_event(db, source="customers", message=f"create customer id={obj.id} cnum={obj.customer_number}")
+    record_event(
+        db,
+        source="customers",
+        message=f"create customer id={obj.id} cnum={obj.customer_number}",
+        entity_type="customer",
+        entity_id=obj.id,
+        action="create",
+    )
     return obj
 
 
-def list_customers(
-    db: Session,
+def list_customers_stmt(
     limit: int = 100,
     offset: int = 0,
     name: str | None = None,
     postcode: str | None = None,
-) -> List[models.Customer]:
-    q = db.query(models.Customer)
+) -> Select:
+    # shared with the async variant in app/services/aio.py
+    q = select(models.Customer)
     if name:
         like = f"%{name}%"
-        q = q.filter((models.Customer.first_name.ilike(like)) | (models.Customer.last_name.ilike(like)))
+        q = q.where((models.Customer.first_name.ilike(like)) | (models.Customer.last_name.ilike(like)))
     if postcode:
-        q = q.filter(models.Customer.postcode.ilike(f"%{postcode}%"))
-    return q.order_by(models.Customer.id.asc()).offset(offset).limit(limit).all()
+        q = q.where(models.Customer.postcode.ilike(f"%{postcode}%"))
+    return q.order_by(models.Customer.id.asc()).offset(offset).limit(limit)
+
+
+@reads
+def list_customers(
+    db: Session,
+    limit: int = 100,
+    offset: int = 0,
+    name: str | None = None,
+    postcode: str | None = None,
+) -> List[models.Customer]:
+    return list(db.execute(list_customers_stmt(limit, offset, name, postcode)).scalars())
 
 
+@reads
 def get_customer(db: Session, customer_id: int) -> Optional[models.Customer]:
     return db.get(models.Customer, customer_id)
 
 
+@routed
 def delete_customer(db: Session, customer_id: int) -> bool:
     obj = db.get(models.Customer, customer_id)
     if not obj:
         raise CobolError("01", "Customer not found")
     db.delete(obj)
     db.commit()
-    _log_event(db, source="customers", message=f"delete customer id={customer_id}")
+    record_event(
+        db,
+        source="customers",
+        message=f"delete customer id={customer_id}",
+        entity_type="customer",
+        entity_id=customer_id,
+        action="delete",
+    )
     return True
 
 
+@routed
 def update_customer(db: Session, customer_id: int, data: CustomerUpdate) -> Optional[models.Customer]:
     obj = db.get(models.Customer, customer_id)
     if not obj:
         raise CobolError("01", "Customer not found")
-    for field, value in data.model_dump(exclude_unset=True).items():
-        if field == "email_address" and value is not None:
-            setattr(obj, field, str(value))
-        else:
-            setattr(obj, field, value)
+    payload = data.model_dump(exclude_unset=True)
+    if payload.get("email_address") is not None:
+        payload["email_address"] = str(payload["email_address"])
+    diff = apply_changes(obj, payload)
     db.add(obj)
     db.commit()
     db.refresh(obj)
-    _log_event(db, source="customers", message=f"update customer id={customer_id}")
+    record_event(
+        db,
+        source="customers",
+        message=f"update customer id={customer_id}",
+        entity_type="customer",
+        entity_id=customer_id,
+        action="update",
+        diff=diff,
+    )
     return obj
 
 
+@routed
 def set_customer_security(db: Session, customer_id: int, data: CustomerSecurityIn) -> Optional[models.CustomerSecure]:
     cust = db.get(models.Customer, customer_id)
     if not cust:
         raise CobolError("01", "Customer not found")
     sec = _ensure_customer_security(db, customer=cust)
-    payload = data.model_dump(exclude_unset=True)
-    for k, v in payload.items():
-        setattr(sec, k, v)
+    diff = apply_changes(sec, data.model_dump(exclude_unset=True), redact=("customer_pass",))
     db.add(sec)
     db.commit()
     db.refresh(sec)
-    _log_event(db, source="customers", message=f"set security customer_number={cust.customer_number}")
+    record_event(
+        db,
+        source="customers",
+        message=f"set security customer_number={cust.customer_number}",
+        entity_type="customer",
+        entity_id=customer_id,
+        action="set_security",
+        diff=diff,
+    )
     return sec
 
 
+@reads
 def get_customer_security(db: Session, customer_id: int) -> Optional[models.CustomerSecure]:
     cust = db.get(models.Customer, customer_id)
     if not cust:
@@ -128,6 +168,7 @@ def get_customer_security(db: Session, customer_id: int) -> Optional[models.Cust
     return db.get(models.CustomerSecure, cust.customer_number)
 
 
+@routed
 def rotate_customer_security(db: Session, customer_id: int) -> Optional[models.CustomerSecure]:
     cust = db.get(models.Customer, customer_id)
     if not cust:
@@ -142,18 +183,17 @@ def rotate_customer_security(db: Session, customer_id: int) -> Optional[models.C
     db.add(sec)
     db.commit()
     db.refresh(sec)
-    _log_event(db, source="customers", message=f"rotate security customer_number={cust.customer_number}")
+    record_event(
+        db,
+        source="customers",
+        message=f"rotate security customer_number={cust.customer_number}",
+        entity_type="customer",
+        entity_id=customer_id,
+        action="rotate_security",
+    )
     return sec
 
 
-def _log_event(db: Session, *, source: str, message: str, level: str = "INFO") -> None:
-    try:
-        db.add(models.Event(source=source, level=level, message=message))
-        db.commit()
-    except Exception:
-        db.rollback()
-
-
 def _ensure_customer_security(
     db: Session,
     *,
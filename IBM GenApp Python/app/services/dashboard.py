@@ -0,0 +1,10 @@
+from sqlalchemy.orm import Session
+
+from app.db import counts as entity_counts
+from app.db.session import reads
+
+
+@reads
+def counts(db: Session) -> dict[str, int]:
+    # maintained incrementally by app.db.counts; O(1) regardless of table sizes
+    return entity_counts.current(db)
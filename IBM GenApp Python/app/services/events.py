@@ -1,21 +1,173 @@
+from datetime import date
+import json
+
+from sqlalchemy import Select, func, select
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, List, Optional
+
+from app.db import eventbus  # noqa: F401  (registers the live stream publish hooks)
+from app.db import models, retention
+from app.db.session import reads
+
+
+REDACTED = "***"
+
+
+def apply_changes(obj, payload: dict[str, Any], *, redact: tuple[str, ...] = ()) -> dict[str, list]:
+    """Set ``payload`` on ``obj`` and return ``{field: [old, new]}`` for the values that changed."""
+    diff: dict[str, list] = {}
+    for field, value in payload.items():
+        old = getattr(obj, field)
+        if old != value:
+            diff[field] = [REDACTED, REDACTED] if field in redact else [old, value]
+        setattr(obj, field, value)
+    return diff
+
+
+def record_event(
+    db: Session,
+    *,
+    source: str,
+    message: str,
+    level: str = "INFO",
+    entity_type: Optional[str] = None,
+    entity_id: Optional[int] = None,
+    action: Optional[str] = None,
+    diff: Optional[dict] = None,
+) -> None:
+    """Audit entry committed after the business change; failures never undo that change."""
+    try:
+        db.add(
+            models.Event(
+                source=source,
+                level=level,
+                message=message,
+                entity_type=entity_type,
+                entity_id=entity_id,
+                action=action,
+                diff=json.dumps(diff, default=str, separators=(",", ":")) if diff else None,
+            )
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+
+
+def list_events_stmt(
+    *,
+    source: Optional[str] = None,
+    level: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    entity_id: Optional[int] = None,
+    limit: int | None = 100,
+    offset: int | None = 0,
+) -> Select:
+    q = select(models.Event)
+    if source:
+        q = q.where(models.Event.source == source)
+    if level:
+        q = q.where(models.Event.level == level)
+    if entity_type:
+        # served by ix_events_entity (entity_type, entity_id, created_at)
+        q = q.where(models.Event.entity_type == entity_type, models.Event.entity_id == entity_id)
+    return q.order_by(models.Event.created_at.desc()).offset(offset).limit(limit)
+
+
+def fetch_events(db: Session, stmt: Select, *, rows: bool = False) -> list:
+    """Run a `list_events_stmt` query; ``rows=True`` returns plain column dicts instead of ORM objects."""
+    if rows:
+        return [dict(row) for row in db.execute(stmt.with_only_columns(*models.Event.__table__.columns)).mappings()]
+    return list(db.execute(stmt).scalars())
+
 
-from app.db import models
+def live_count_stmt(**filters) -> Select:
+    """Number of live events matching the `list_events_stmt` filters."""
+    live = list_events_stmt(**filters, limit=None, offset=None)
+    return live.with_only_columns(func.count()).select_from(models.Event).order_by(None)
 
 
+def archive_window(filled: int, *, limit: int, offset: int, live_total: int | None = None) -> tuple[int, int]:
+    """``(limit, offset)`` for the archive part of a page that got ``filled`` live rows.
+
+    A partly filled page continues with the newest archived event; an empty one skips
+    the archived events earlier pages already showed, which needs ``live_total``.
+    """
+    if filled:
+        return limit - filled, 0
+    return limit, max(offset - (live_total or 0), 0)
+
+
+@reads
 def list_events(
     db: Session,
     *,
     source: Optional[str] = None,
     level: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    entity_id: Optional[int] = None,
     limit: int = 100,
     offset: int = 0,
+    rows: bool = False,
+) -> list:
+    """Newest events first, continuing in the archives; ``rows=True`` for JSON output (dicts, no ORM objects)."""
+    filters = {"source": source, "level": level, "entity_type": entity_type, "entity_id": entity_id}
+    items = fetch_events(db, list_events_stmt(**filters, limit=limit, offset=offset), rows=rows)
+    if len(items) >= limit or not retention.archives():
+        return items
+    # the page reaches past the live rows: continue in the monthly archives
+    live_total = None if items else db.scalar(live_count_stmt(**filters))
+    archive_limit, archive_offset = archive_window(len(items), limit=limit, offset=offset, live_total=live_total)
+    items.extend(retention.list_archived(**filters, limit=archive_limit, offset=archive_offset, rows=rows))
+    return items
+
+
+@reads
+def latest_event_id(db: Session) -> int:
+    return db.scalar(select(func.max(models.Event.id))) or 0
+
+
+@reads
+def events_after(
+    db: Session,
+    last_id: int,
+    *,
+    until_id: Optional[int] = None,
+    source: Optional[str] = None,
+    level: Optional[str] = None,
+    limit: int = 500,
 ) -> List[models.Event]:
-    q = db.query(models.Event)
+    """Live events with ``last_id < id <= until_id`` in id order (primary key range scan); gap fill for the stream."""
+    q = select(models.Event).where(models.Event.id > last_id)
+    if until_id is not None:
+        q = q.where(models.Event.id <= until_id)
     if source:
-        q = q.filter(models.Event.source == source)
+        q = q.where(models.Event.source == source)
     if level:
-        q = q.filter(models.Event.level == level)
-    return q.order_by(models.Event.created_at.desc()).offset(offset).limit(limit).all()
+        q = q.where(models.Event.level == level)
+    return list(db.execute(q.order_by(models.Event.id).limit(limit)).scalars())
+
+
+def entity_history(db: Session, entity_type: str, entity_id: int, limit: int = 100, offset: int = 0) -> List[models.Event]:
+    return list_events(db, entity_type=entity_type, entity_id=entity_id, limit=limit, offset=offset)
 
+
+@reads
+def list_rollups(
+    db: Session,
+    *,
+    source: Optional[str] = None,
+    level: Optional[str] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+) -> List[models.EventRollup]:
+    q = select(models.EventRollup)
+    if source:
+        q = q.where(models.EventRollup.source == source)
+    if level:
+        q = q.where(models.EventRollup.level == level)
+    if since:
+        q = q.where(models.EventRollup.day >= since)
+    if until:
+        q = q.where(models.EventRollup.day <= until)
+    order = (models.EventRollup.day.desc(), models.EventRollup.source, models.EventRollup.level)
+    return list(db.execute(q.order_by(*order)).scalars())
@@ -0,0 +1,367 @@
+"""Seed/import of customers, policies and claims from JSON or NDJSON records.
+
+Records use the layout of `data/seed_data.json`: customers carry a ``key``,
+policies reference them via ``customer_key`` (or ``customer_id``) and carry a
+``type`` plus ``motor_detail``/``house_detail``/``endowment_detail``/
+``commercial_detail``; claims reference policies via ``policy_key`` (or
+``policy_id``). NDJSON lines additionally carry ``"kind": "customer" | "policy" | "claim"``.
+
+`import_bulk` validates with the same schemas as the per-row service path but
+writes each chunk in a single transaction with pre-allocated numbers and
+deferred event rows, expunging the session afterwards so memory stays flat.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from datetime import date
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.db import counts as entity_counts
+from app.db import models
+from app.schemas.claims import ClaimCreate
+from app.schemas.customers import CustomerCreate
+from app.schemas.policies import (
+    MotorPolicyCreate,
+    HousePolicyCreate,
+    EndowmentPolicyCreate,
+    CommercialPolicyCreate,
+)
+from app.services.counters import reserve_block
+from app.services.customers import _generate_default_security_values
+from app.utils.errors import CobolError
+
+KINDS = ("customer", "policy", "claim")
+SEED_SECTIONS = {"customers": "customer", "policies": "policy", "claims": "claim"}
+
+# detail defaults the per-row seed path has always applied
+DETAIL_DEFAULTS = {"H": {"bedrooms": 0, "value": 0}}
+DETAIL_KEYS = {
+    "M": ("motor_detail", MotorPolicyCreate, models.MotorPolicy),
+    "H": ("house_detail", HousePolicyCreate, models.HousePolicy),
+    "E": ("endowment_detail", EndowmentPolicyCreate, models.EndowmentPolicy),
+    "C": ("commercial_detail", CommercialPolicyCreate, models.CommercialPolicy),
+}
+TYPE_NAMES = {"M": "motor", "H": "house", "E": "endowment", "C": "commercial"}
+BASE_POLICY_FIELDS = (
+    "customer_id",
+    "policy_number",
+    "issue_date",
+    "expiry_date",
+    "last_changed",
+    "broker_id",
+    "brokers_ref",
+    "payment",
+)
+
+
+@dataclass
+class ImportStats:
+    customers: int = 0
+    policies: int = 0
+    claims: int = 0
+    chunks: int = 0
+    customer_ids: dict[str, int] = field(default_factory=dict)
+    policy_ids: dict[str, int] = field(default_factory=dict)
+
+
+def _parse_date(value: str | None) -> date | None:
+    if not value:
+        return None
+    return date.fromisoformat(value)
+
+
+# --- record -> schema mapping (shared with the per-row seed path) -------------
+
+def customer_payload(record: dict) -> CustomerCreate:
+    return CustomerCreate(
+        first_name=record["first_name"],
+        last_name=record["last_name"],
+        date_of_birth=_parse_date(record.get("date_of_birth")),
+        house_name=record.get("house_name") or None,
+        house_number=record.get("house_number") or None,
+        postcode=record.get("postcode") or None,
+        phone_mobile=record.get("phone_mobile") or None,
+        phone_home=record.get("phone_home") or None,
+        email_address=record.get("email_address") or None,
+    )
+
+
+def policy_payload(record: dict, customer_id: int) -> tuple[str, BaseModel]:
+    """Return (policy_type, type-specific create schema) for a seed policy record."""
+    policy_type = record["type"].upper()
+    if policy_type not in DETAIL_KEYS:
+        raise ValueError(f"Unsupported policy type {policy_type}")
+    detail_key, schema, _ = DETAIL_KEYS[policy_type]
+    payload = schema(
+        customer_id=customer_id,
+        policy_number=record.get("policy_number"),
+        issue_date=_parse_date(record.get("issue_date")),
+        expiry_date=_parse_date(record.get("expiry_date")),
+        broker_id=record.get("broker_id"),
+        brokers_ref=record.get("brokers_ref"),
+        payment=record.get("payment"),
+        **{**DETAIL_DEFAULTS.get(policy_type, {}), **record[detail_key]},
+    )
+    return policy_type, payload
+
+
+def claim_payload(record: dict, policy_id: int) -> ClaimCreate:
+    return ClaimCreate(
+        policy_id=policy_id,
+        number=record.get("number"),
+        date=_parse_date(record.get("date")),
+        paid=record.get("paid"),
+        value=record.get("value"),
+        cause=record.get("cause"),
+        observations=record.get("observations"),
+    )
+
+
+def resolve_ref(record: dict, key_field: str, id_field: str, mapping: dict[str, int]) -> int:
+    if record.get(key_field) is not None:
+        try:
+            return mapping[record[key_field]]
+        except KeyError:
+            raise CobolError("70", f"Unknown {key_field} {record[key_field]!r}") from None
+    if record.get(id_field) is not None:
+        return int(record[id_field])
+    raise CobolError("98", f"{key_field} oder {id_field} fehlt")
+
+
+# --- readers ------------------------------------------------------------------
+
+def iter_seed_records(data: dict) -> Iterator[tuple[str, dict]]:
+    for section, kind in SEED_SECTIONS.items():
+        for record in data.get(section, []):
+            yield kind, record
+
+
+def iter_file_records(path: str | Path) -> Iterator[tuple[str, dict]]:
+    """Yield (kind, record) from a seed-style JSON file or an NDJSON file."""
+    path = Path(path)
+    if path.suffix.lower() in (".ndjson", ".jsonl"):
+        with path.open("r", encoding="utf-8") as fh:
+            for lineno, line in enumerate(fh, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                kind = record.pop("kind", None)
+                if kind not in KINDS:
+                    raise CobolError("98", f"line {lineno}: kind muss customer, policy oder claim sein")
+                yield kind, record
+        return
+    with path.open("r", encoding="utf-8") as fh:
+        yield from iter_seed_records(json.load(fh))
+
+
+def _runs(records: Iterable[tuple[str, dict]], chunk_size: int) -> Iterator[tuple[str, list[dict]]]:
+    """Group consecutive records of the same kind into chunks of at most ``chunk_size``."""
+    iterator = iter(records)
+    pending: tuple[str, dict] | None = None
+    while True:
+        if pending is None:
+            pending = next(iterator, None)
+            if pending is None:
+                return
+        kind, first = pending
+        chunk = [first]
+        pending = None
+        for item in islice(iterator, chunk_size - 1):
+            if item[0] != kind:
+                pending = item
+                break
+            chunk.append(item[1])
+        yield kind, chunk
+
+
+# --- bulk writer --------------------------------------------------------------
+
+def _existing_ids(db: Session, model, ids: set[int]) -> set[int]:
+    if not ids:
+        return set()
+    return set(db.execute(select(model.id).where(model.id.in_(ids))).scalars())
+
+
+def _allocate_policy_numbers(db: Session, count: int, taken: set[int]) -> list[int]:
+    numbers: list[int] = []
+    while len(numbers) < count:
+        need = count - len(numbers)
+        first = reserve_block(db, "GENAPOLICYNUM", need)
+        block = range(first, first + need)
+        in_use = set(
+            db.execute(
+                select(models.Policy.policy_number).where(models.Policy.policy_number.between(block.start, block.stop - 1))
+            ).scalars()
+        )
+        numbers.extend(n for n in block if n not in in_use and n not in taken)
+    return numbers
+
+
+def _import_customers(db: Session, chunk: list[dict], stats: ImportStats, events: list[dict]) -> None:
+    payloads = [customer_payload(record) for record in chunk]
+    first_number = reserve_block(db, "GENACUSTNUM", len(payloads))
+    objs = []
+    for offset, data in enumerate(payloads):
+        objs.append(
+            models.Customer(
+                customer_number=first_number + offset,
+                first_name=data.first_name,
+                last_name=data.last_name,
+                date_of_birth=data.date_of_birth,
+                house_name=data.house_name,
+                house_number=data.house_number,
+                postcode=data.postcode,
+                phone_mobile=data.phone_mobile,
+                phone_home=data.phone_home,
+                email_address=str(data.email_address) if data.email_address else None,
+            )
+        )
+    db.add_all(objs)
+    secure = []
+    for obj in objs:
+        password, state, count = _generate_default_security_values()
+        secure.append(
+            models.CustomerSecure(
+                customer_number=obj.customer_number,
+                customer_pass=password,
+                state_indicator=state,
+                pass_changes=count if count is not None else 0,
+            )
+        )
+    db.add_all(secure)
+    db.flush()
+    for record, obj in zip(chunk, objs):
+        if record.get("key"):
+            stats.customer_ids[record["key"]] = obj.id
+        events.append(
+            {
+                "source": "customers",
+                "message": f"create customer id={obj.id} cnum={obj.customer_number}",
+                "entity_type": "customer",
+                "entity_id": obj.id,
+                "action": "create",
+            }
+        )
+    stats.customers += len(objs)
+
+
+def _import_policies(db: Session, chunk: list[dict], stats: ImportStats, events: list[dict]) -> None:
+    parsed = []
+    for record in chunk:
+        customer_id = resolve_ref(record, "customer_key", "customer_id", stats.customer_ids)
+        parsed.append((record, *policy_payload(record, customer_id)))
+
+    wanted = {payload.customer_id for _, _, payload in parsed}
+    missing = wanted - _existing_ids(db, models.Customer, wanted)
+    if missing:
+        raise CobolError("70", f"Customer not found: {sorted(missing)[:10]}")
+
+    explicit = [payload.policy_number for _, _, payload in parsed if payload.policy_number is not None]
+    if any(n <= 0 for n in explicit):
+        raise CobolError("98", "policy_number muss positiv sein")
+    if len(set(explicit)) != len(explicit) or (
+        explicit
+        and db.execute(select(models.Policy.id).where(models.Policy.policy_number.in_(explicit)).limit(1)).first()
+    ):
+        raise CobolError("90", "Policy number already in use")
+    generated = iter(_allocate_policy_numbers(db, len(parsed) - len(explicit), set(explicit)))
+
+    bases = []
+    for _, policy_type, payload in parsed:
+        bases.append(
+            models.Policy(
+                policy_type=policy_type,
+                policy_number=payload.policy_number if payload.policy_number is not None else next(generated),
+                commission=None,
+                **{name: getattr(payload, name) for name in BASE_POLICY_FIELDS if name != "policy_number"},
+            )
+        )
+    db.add_all(bases)
+    db.flush()
+
+    details = []
+    for (record, policy_type, payload), base in zip(parsed, bases):
+        _, _, detail_model = DETAIL_KEYS[policy_type]
+        detail_fields = payload.model_dump(exclude=set(BASE_POLICY_FIELDS))
+        details.append(detail_model(policy_id=base.id, **detail_fields))
+        if record.get("key"):
+            stats.policy_ids[record["key"]] = base.id
+        events.append(
+            {
+                "source": "policies",
+                "message": f"create {TYPE_NAMES[policy_type]} policy id={base.id}",
+                "entity_type": "policy",
+                "entity_id": base.id,
+                "action": "create",
+            }
+        )
+    db.add_all(details)
+    stats.policies += len(bases)
+
+
+def _import_claims(db: Session, chunk: list[dict], stats: ImportStats, events: list[dict]) -> None:
+    payloads = [claim_payload(record, resolve_ref(record, "policy_key", "policy_id", stats.policy_ids)) for record in chunk]
+    wanted = {payload.policy_id for payload in payloads}
+    missing = wanted - _existing_ids(db, models.Policy, wanted)
+    if missing:
+        raise CobolError("70", f"Policy not found: {sorted(missing)[:10]}")
+    objs = [models.Claim(**payload.model_dump()) for payload in payloads]
+    db.add_all(objs)
+    db.flush()
+    for obj in objs:
+        events.append(
+            {
+                "source": "claims",
+                "message": f"create claim id={obj.id} policy_id={obj.policy_id}",
+                "entity_type": "claim",
+                "entity_id": obj.id,
+                "action": "create",
+            }
+        )
+    stats.claims += len(objs)
+
+
+_WRITERS = {"customer": _import_customers, "policy": _import_policies, "claim": _import_claims}
+
+
+def import_bulk(
+    db: Session,
+    records: Iterable[tuple[str, dict]],
+    *,
+    chunk_size: int = 1000,
+    progress=None,
+) -> ImportStats:
+    """Import (kind, record) pairs chunk-wise; each chunk is one transaction.
+
+    Raises `CobolError` (``98`` for invalid records, ``70``/``90`` like the services);
+    chunks committed before the failing one stay committed.
+    """
+    stats = ImportStats()
+    for kind, chunk in _runs(records, chunk_size):
+        events: list[dict] = []
+        try:
+            _WRITERS[kind](db, chunk, stats, events)
+            if events:
+                db.execute(insert(models.Event), [{"level": "INFO", **event} for event in events])
+                entity_counts.add(db, "events", len(events))
+            db.commit()
+        except ValidationError as exc:
+            db.rollback()
+            raise CobolError("98", f"{kind}: {exc.errors()[0].get('msg', 'invalid record')}") from exc
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.expunge_all()
+        stats.chunks += 1
+        if progress:
+            progress(stats)
+    return stats
@@ -0,0 +1,287 @@
+"""Commercial peril pricing: premiums, status and reject reason from perils and location.
+
+Per policy a risk score is built from ``base_score`` plus the score of its
+property type and of its postcode area (leading letters of the postcode). Each
+peril premium is ``score x rate x peril / 10``; the weather premium is
+additionally scaled by a latitude band (`app.services.rating.Band`) and all
+premiums get ``all_perils_discount`` when every peril is covered (> 0). A score
+from ``refer_score`` on is referred (status 1), from ``reject_score`` on
+rejected (status 2, premiums 0); the reasons come from the tables too. The
+built-in tables can be replaced by a JSON file with the same layout
+(``GENAPP_PERIL_TABLES``).
+
+`recalculate_portfolio` reprices every commercial policy: the parent reads
+chunks of ``GENAPP_PERIL_CHUNK`` policies, a process pool prices them as
+NumPy columns, and the parent writes the changed rows back with set-based
+updates (plus audit events and change feed rows), one transaction per chunk.
+Pricing runs in the workers while the parent reads and writes, so the single
+SQLite writer is never shared.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from functools import lru_cache
+from typing import Callable, Iterator
+
+import numpy as np
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.db import counts as entity_counts
+from app.db import models, outbox
+from app.db.session import SessionLocal
+from app.services.bulk import apply_updates
+from app.services.rating import Band
+
+
+PERIL_TABLES_PATH = os.getenv("GENAPP_PERIL_TABLES", "")
+PERIL_CHUNK = int(os.getenv("GENAPP_PERIL_CHUNK", "20000"))
+PERIL_WORKERS = int(os.getenv("GENAPP_PERIL_WORKERS", str(os.cpu_count() or 1)))
+
+PERILS = ("fire", "crime", "flood", "weather")
+PRICED_COLUMNS = tuple(f"{p}_premium" for p in PERILS) + ("status", "reject_reason")
+
+DEFAULT_TABLES = {
+    "base_score": 100,
+    "prop_type_score": {"WAREHOUSE": 50, "FACTORY": 75, "OFFICE": 25, "SHOP": 40, "RESTAURANT": 45, "HOTEL": 35},
+    "other_prop_type_score": 30,
+    # postcode area (leading letters) -> extra score
+    "postcode_score": {"FL": 30, "CR": 30, "HU": 20, "YO": 15, "PO": 10},
+    "rates": {"fire": 0.8, "crime": 0.6, "flood": 1.2, "weather": 0.9},
+    "weather_latitude": {"bounds": [52.0, 55.0], "factors": [1.0, 1.1, 1.25], "missing": 1.0},
+    "all_perils_discount": 0.9,
+    "refer_score": 200,
+    "reject_score": 230,
+    "refer_reason": "Medium Risk - Pending Review",
+    "reject_reason": "High Risk Score - Manual Review Required",
+}
+
+
+@dataclass(frozen=True)
+class PerilTables:
+    base_score: float
+    prop_type_score: dict[str, float]
+    other_prop_type_score: float
+    postcode_score: dict[str, float]
+    rates: np.ndarray  # in PERILS order
+    weather_latitude: Band
+    all_perils_discount: float
+    refer_score: float
+    reject_score: float
+    refer_reason: str
+    reject_reason: str
+
+    @classmethod
+    def from_spec(cls, spec: dict) -> "PerilTables":
+        missing = [p for p in PERILS if p not in spec["rates"]]
+        if missing:
+            raise ValueError(f"peril tables: no rate for {', '.join(missing)}")
+        if spec["reject_score"] < spec["refer_score"]:
+            raise ValueError("peril tables: reject_score must not be below refer_score")
+        return cls(
+            base_score=float(spec["base_score"]),
+            prop_type_score={k.upper(): float(v) for k, v in spec["prop_type_score"].items()},
+            other_prop_type_score=float(spec.get("other_prop_type_score", 0)),
+            postcode_score={k.upper(): float(v) for k, v in spec.get("postcode_score", {}).items()},
+            rates=np.asarray([spec["rates"][p] for p in PERILS], dtype=float),
+            weather_latitude=Band.from_spec("weather_latitude", spec["weather_latitude"]),
+            all_perils_discount=float(spec.get("all_perils_discount", 1.0)),
+            refer_score=float(spec["refer_score"]),
+            reject_score=float(spec["reject_score"]),
+            refer_reason=spec.get("refer_reason", "Pending Review"),
+            reject_reason=spec.get("reject_reason", "Rejected"),
+        )
+
+
+@lru_cache(maxsize=1)
+def table_spec() -> dict:
+    """The active table spec (``GENAPP_PERIL_TABLES`` or the built-in defaults); plain data for the workers."""
+    if PERIL_TABLES_PATH:
+        with open(PERIL_TABLES_PATH, encoding="utf-8") as fh:
+            return json.load(fh)
+    return DEFAULT_TABLES
+
+
+@lru_cache(maxsize=4)
+def _tables(spec_json: str) -> PerilTables:
+    return PerilTables.from_spec(json.loads(spec_json))
+
+
+def _lookup(keys: np.ndarray, scores: dict[str, float], default: float) -> np.ndarray:
+    """Map each key through ``scores`` once per distinct value."""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return np.array([scores.get(k, default) for k in unique], dtype=float)[inverse]
+
+
+def _area(postcode: str | None) -> str:
+    head = (postcode or "").strip().upper()[:2]
+    return head[:1] if head[1:].isdigit() else head
+
+
+def _latitude(value: str | None) -> float:
+    text = (value or "").strip().upper()
+    if not text:
+        return np.nan
+    sign = -1.0 if text.endswith("S") else 1.0
+    try:
+        return sign * float(text.rstrip("NS"))
+    except ValueError:
+        return np.nan
+
+
+def price(columns: dict, spec: dict | None = None) -> dict[str, np.ndarray]:
+    """Price one chunk given as columns (``prop_type``, ``postcode``, ``latitude``, ``<peril>_peril``)."""
+    t = _tables(json.dumps(spec or table_spec(), sort_keys=True))
+    n = len(columns["prop_type"])
+    prop = np.array([(v or "").strip().upper() for v in columns["prop_type"]], dtype=object)
+    area = np.array([_area(v) for v in columns["postcode"]], dtype=object)
+    score = (
+        t.base_score
+        + _lookup(prop.astype(str), t.prop_type_score, t.other_prop_type_score)
+        + _lookup(area.astype(str), t.postcode_score, 0.0)
+    )
+    perils = np.array(
+        [[0 if v is None else v for v in columns[f"{p}_peril"]] for p in PERILS], dtype=float
+    ).reshape(len(PERILS), n).clip(min=0)
+    factors = np.ones((len(PERILS), n))
+    factors[PERILS.index("weather")] = t.weather_latitude.apply(
+        np.array([_latitude(v) for v in columns["latitude"]], dtype=float)
+    )
+    discount = np.where((perils > 0).all(axis=0), t.all_perils_discount, 1.0)
+    premiums = np.rint(score * t.rates[:, None] * perils / 10 * factors * discount).astype(np.int64)
+
+    status = np.where(score >= t.reject_score, 2, np.where(score >= t.refer_score, 1, 0)).astype(np.int64)
+    premiums[:, status == 2] = 0
+    reasons = np.array([None, t.refer_reason, t.reject_reason], dtype=object)[status]
+    out = {f"{p}_premium": premiums[i] for i, p in enumerate(PERILS)}
+    out.update(status=status, reject_reason=reasons, score=score)
+    return out
+
+
+@dataclass
+class PerilStats:
+    priced: int = 0
+    changed: int = 0
+    chunks: int = 0
+    workers: int = 1
+    dry_run: bool = False
+    duration_s: float = 0.0
+    policies_per_s: float = 0.0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+_INPUTS = ("prop_type", "postcode", "latitude") + tuple(f"{p}_peril" for p in PERILS)
+
+
+def _read_chunks(db: Session, chunk_size: int) -> Iterator[tuple[list[dict], dict]]:
+    table = models.CommercialPolicy.__table__
+    after = 0
+    while True:
+        rows = [
+            dict(row)
+            for row in db.execute(select(table).where(table.c.id > after).order_by(table.c.id).limit(chunk_size)).mappings()
+        ]
+        if not rows:
+            return
+        after = rows[-1]["id"]
+        yield rows, {name: [row[name] for row in rows] for name in _INPUTS}
+
+
+def _differs(name: str, old, new) -> bool:
+    if name == "reject_reason":  # a stored "" means no reason, like None
+        return (old or None) != (new or None)
+    return old != new
+
+
+def _changes(rows: list[dict], priced: dict) -> list[tuple[dict, dict]]:
+    """(row, new values) for the rows whose priced columns differ."""
+    columns = {name: priced[name].tolist() for name in PRICED_COLUMNS}
+    changed = []
+    for i, row in enumerate(rows):
+        new = {name: columns[name][i] for name in PRICED_COLUMNS}
+        if any(_differs(name, row[name], new[name]) for name in PRICED_COLUMNS):
+            changed.append((row, new))
+    return changed
+
+
+def _write_chunk(db: Session, changed: list[tuple[dict, dict]]) -> None:
+    updates, events, feed = [], [], []
+    for row, new in changed:
+        policy_id = row["policy_id"]
+        diff = {name: [row[name], new[name]] for name in PRICED_COLUMNS if _differs(name, row[name], new[name])}
+        updates.append((policy_id, new))
+        events.append(
+            {
+                "source": "perils",
+                "level": "INFO",
+                "message": f"reprice commercial policy id={policy_id}",
+                "entity_type": "policy",
+                "entity_id": policy_id,
+                "action": "reprice",
+                "diff": json.dumps(diff, separators=(",", ":")),
+            }
+        )
+        feed.append({"entity_type": "policy_commercial", "entity_id": policy_id, "op": "update", "payload": outbox.row_payload({**row, **new})})
+    apply_updates(db, models.CommercialPolicy.__table__, "policy_id", updates)
+    db.execute(insert(models.Event), events)
+    entity_counts.add(db, "events", len(events))
+    outbox.append(db, feed)
+
+
+def recalculate_portfolio(
+    factory: Callable[[], Session] = SessionLocal,
+    *,
+    workers: int = PERIL_WORKERS,
+    chunk_size: int = PERIL_CHUNK,
+    dry_run: bool = False,
+    progress: Callable[[PerilStats], None] | None = None,
+) -> PerilStats:
+    """Reprice every commercial policy; ``workers`` > 1 prices the chunks in a process pool."""
+    spec = table_spec()
+    PerilTables.from_spec(spec)  # fail on bad tables before starting any worker
+    stats = PerilStats(workers=max(workers, 1), dry_run=dry_run)
+    began = time.perf_counter()
+
+    def consume(db: Session, rows: list[dict], priced: dict) -> None:
+        changed = _changes(rows, priced)
+        if changed and not dry_run:
+            try:
+                _write_chunk(db, changed)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+        stats.priced += len(rows)
+        stats.changed += len(changed)
+        stats.chunks += 1
+        stats.duration_s = time.perf_counter() - began
+        stats.policies_per_s = stats.priced / stats.duration_s if stats.duration_s else 0.0
+        if progress:
+            progress(stats)
+
+    with factory() as db:
+        if workers <= 1:
+            for rows, columns in _read_chunks(db, chunk_size):
+                consume(db, rows, price(columns, spec))
+        else:
+            # bounded window of chunks in flight, consumed (and written) in read order
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending: deque = deque()
+                for rows, columns in _read_chunks(db, chunk_size):
+                    pending.append((rows, pool.submit(price, columns, spec)))
+                    if len(pending) >= workers * 2:
+                        rows_done, future = pending.popleft()
+                        consume(db, rows_done, future.result())
+                while pending:
+                    rows_done, future = pending.popleft()
+                    consume(db, rows_done, future.result())
+    stats.duration_s = time.perf_counter() - began
+    stats.policies_per_s = stats.priced / stats.duration_s if stats.duration_s else 0.0
+    return stats
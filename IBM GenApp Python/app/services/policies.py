@@ -1,10 +1,14 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from sqlalchemy import Select, func, or_, select
 from typing import List, Optional
 from datetime import date
 import json
 
 from app.db import models
+from app.db.session import reads
+from app.db.writer import routed
+from app.services import counters
+from app.services.events import apply_changes, record_event
 from app.utils.errors import CobolError
 from app.schemas.policies import (
     PolicyCreate,
@@ -17,17 +21,10 @@ from app.schemas.policies import (
 
 
 def _next_counter(db: Session, name: str) -> int:
-    ctr = db.get(models.Counter, name)
-    if not ctr:
-        ctr = models.Counter(name=name, value=0)
-        db.add(ctr)
-        db.flush()
-    ctr.value += 1
-    db.add(ctr)
-    db.flush()
-    return ctr.value
+    return counters.next_value(db, name)
 
 
+@routed
 def create_policy(db: Session, data: PolicyCreate) -> models.Policy:
     # Ensure customer exists
     customer = db.get(models.Customer, data.customer_id)
@@ -62,40 +59,61 @@ def create_policy(db: Session, data: PolicyCreate) -> models.Policy:
     db.add(obj)
     db.commit()
     db.refresh(obj)
-    _log_event(db, source="policies", message=f"create policy id={obj.id} pnum={obj.policy_number} type={obj.policy_type}")
+    record_event(
+        db,
+        source="policies",
+        message=f"create policy id={obj.id} pnum={obj.policy_number} type={obj.policy_type}",
+        entity_type="policy",
+        entity_id=obj.id,
+        action="create",
+    )
     return obj
 
 
-def list_policies(
-    db: Session,
+def list_policies_stmt(
     limit: int = 100,
     offset: int = 0,
     policy_type: str | None = None,
     customer_id: int | None = None,
     active_only: bool = False,
     postcode: str | None = None,
-) -> List[models.Policy]:
-    q = db.query(models.Policy)
+) -> Select:
+    q = select(models.Policy)
     if postcode:
         like = f"%{postcode}%"
         q = q.join(models.Customer)
         q = q.outerjoin(models.CommercialPolicy, models.Policy.id == models.CommercialPolicy.policy_id)
-        q = q.filter(
+        q = q.where(
             or_(
                 models.Customer.postcode.ilike(like),
                 models.CommercialPolicy.postcode.ilike(like),
             )
         )
     if policy_type:
-        q = q.filter(models.Policy.policy_type == policy_type.upper())
+        q = q.where(models.Policy.policy_type == policy_type.upper())
     if customer_id:
-        q = q.filter(models.Policy.customer_id == customer_id)
+        q = q.where(models.Policy.customer_id == customer_id)
     if active_only:
         today = date.today()
-        q = q.filter((models.Policy.expiry_date == None) | (models.Policy.expiry_date >= today))
-    return q.order_by(models.Policy.id.asc()).offset(offset).limit(limit).all()
+        q = q.where((models.Policy.expiry_date == None) | (models.Policy.expiry_date >= today))
+    return q.order_by(models.Policy.id.asc()).offset(offset).limit(limit)
 
 
+@reads
+def list_policies(
+    db: Session,
+    limit: int = 100,
+    offset: int = 0,
+    policy_type: str | None = None,
+    customer_id: int | None = None,
+    active_only: bool = False,
+    postcode: str | None = None,
+) -> List[models.Policy]:
+    stmt = list_policies_stmt(limit, offset, policy_type, customer_id, active_only, postcode)
+    return list(db.execute(stmt).scalars())
+
+
+@reads
 def get_policy(db: Session, policy_id: int) -> Optional[models.Policy]:
     return db.get(models.Policy, policy_id)
 
@@ -106,6 +124,7 @@ def _model_to_dict(obj) -> dict | None:
     return {column.name: getattr(obj, column.name) for column in obj.__table__.columns}
 
 
+@reads
 def get_policy_detail(db: Session, policy_id: int) -> Optional[dict]:
     p = db.get(models.Policy, policy_id)
     if not p:
@@ -122,24 +141,26 @@ def get_policy_detail(db: Session, policy_id: int) -> Optional[dict]:
     return {"policy": p, "detail": detail, "detail_dict": _model_to_dict(detail)}
 
 
+@routed
 def delete_policy(db: Session, policy_id: int) -> bool:
     obj = db.get(models.Policy, policy_id)
     if not obj:
         raise CobolError("01", "Policy not found")
     db.delete(obj)
     db.commit()
-    _log_event(db, source="policies", message=f"delete policy id={policy_id}")
+    record_event(
+        db,
+        source="policies",
+        message=f"delete policy id={policy_id}",
+        entity_type="policy",
+        entity_id=policy_id,
+        action="delete",
+    )
     return True
 
 
-def update_policy(
-    db: Session,
-    policy_id: int,
-    data: PolicyUpdate,
-    *,
-    commit: bool = True,
-    log: bool = True,
-) -> models.Policy:
+def apply_policy_update(db: Session, policy_id: int, data: PolicyUpdate) -> tuple[models.Policy, dict[str, list]]:
+    """Validate and set ``data`` on the policy without committing; returns it with the field diff."""
     obj = db.get(models.Policy, policy_id)
     if not obj:
         raise CobolError("01", "Policy not found")
@@ -157,21 +178,50 @@ def update_policy(
         )
         if existing:
             raise CobolError("90", "Policy number already in use")
-    for field, value in payload.items():
-        if field == "policy_number" and value is None:
-            continue
-        setattr(obj, field, value)
+    if payload.get("policy_number", 0) is None:
+        del payload["policy_number"]
+    diff = apply_changes(obj, payload)
     db.add(obj)
+    return obj, diff
+
+
+@routed
+def update_policy(
+    db: Session,
+    policy_id: int,
+    data: PolicyUpdate,
+    *,
+    commit: bool = True,
+    log: bool = True,
+) -> models.Policy:
+    obj, diff = apply_policy_update(db, policy_id, data)
     if commit:
         db.commit()
         db.refresh(obj)
         if log:
-            _log_event(db, source="policies", message=f"update policy id={policy_id}")
+            log_policy_event(db, f"update policy id={policy_id}", policy_id=policy_id, action="update", diff=diff)
     else:
         db.flush()
     return obj
 
 
+def _update_detail(db: Session, model, policy_id: int, fields: dict, *, commit: bool, log: bool) -> dict[str, list]:
+    """Set the given (non-None) detail fields; returns ``{field: [old, new]}`` of what changed."""
+    det = db.query(model).filter_by(policy_id=policy_id).first()
+    if not det:
+        raise CobolError("01", "Policy detail not found")
+    diff = apply_changes(det, {k: v for k, v in fields.items() if v is not None})
+    db.add(det)
+    if commit:
+        db.commit()
+        if log:
+            log_policy_event(db, f"update policy id={policy_id}", policy_id=policy_id, action="update", diff=diff)
+    else:
+        db.flush()
+    return diff
+
+
+@routed
 def update_policy_motor(
     db: Session,
     policy_id: int,
@@ -186,31 +236,29 @@ def update_policy_motor(
     premium: int | None = None,
     accidents: int | None = None,
     commit: bool = True,
-) -> bool:
-    det = db.query(models.MotorPolicy).filter_by(policy_id=policy_id).first()
-    if not det:
-        raise CobolError("01", "Policy detail not found")
-    for k, v in {
-        "make": make,
-        "model": model,
-        "value": value,
-        "reg_number": reg_number,
-        "colour": colour,
-        "cc": cc,
-        "manufactured": manufactured,
-        "premium": premium,
-        "accidents": accidents,
-    }.items():
-        if v is not None:
-            setattr(det, k, v)
-    db.add(det)
-    if commit:
-        db.commit()
-    else:
-        db.flush()
-    return True
+    log: bool = True,
+) -> dict[str, list]:
+    return _update_detail(
+        db,
+        models.MotorPolicy,
+        policy_id,
+        {
+            "make": make,
+            "model": model,
+            "value": value,
+            "reg_number": reg_number,
+            "colour": colour,
+            "cc": cc,
+            "manufactured": manufactured,
+            "premium": premium,
+            "accidents": accidents,
+        },
+        commit=commit,
+        log=log,
+    )
 
 
+@routed
 def update_policy_house(
     db: Session,
     policy_id: int,
@@ -222,28 +270,26 @@ def update_policy_house(
     house_number: str | None = None,
     postcode: str | None = None,
     commit: bool = True,
-) -> bool:
-    det = db.query(models.HousePolicy).filter_by(policy_id=policy_id).first()
-    if not det:
-        raise CobolError("01", "Policy detail not found")
-    for k, v in {
-        "property_type": property_type,
-        "bedrooms": bedrooms,
-        "value": value,
-        "house_name": house_name,
-        "house_number": house_number,
-        "postcode": postcode,
-    }.items():
-        if v is not None:
-            setattr(det, k, v)
-    db.add(det)
-    if commit:
-        db.commit()
-    else:
-        db.flush()
-    return True
+    log: bool = True,
+) -> dict[str, list]:
+    return _update_detail(
+        db,
+        models.HousePolicy,
+        policy_id,
+        {
+            "property_type": property_type,
+            "bedrooms": bedrooms,
+            "value": value,
+            "house_name": house_name,
+            "house_number": house_number,
+            "postcode": postcode,
+        },
+        commit=commit,
+        log=log,
+    )
 
 
+@routed
 def update_policy_endowment(
     db: Session,
     policy_id: int,
@@ -256,29 +302,27 @@ def update_policy_endowment(
     sum_assured: int | None = None,
     life_assured: str | None = None,
     commit: bool = True,
-) -> bool:
-    det = db.query(models.EndowmentPolicy).filter_by(policy_id=policy_id).first()
-    if not det:
-        raise CobolError("01", "Policy detail not found")
-    for k, v in {
-        "with_profits": with_profits,
-        "equities": equities,
-        "managed_fund": managed_fund,
-        "fund_name": fund_name,
-        "term": term,
-        "sum_assured": sum_assured,
-        "life_assured": life_assured,
-    }.items():
-        if v is not None:
-            setattr(det, k, v)
-    db.add(det)
-    if commit:
-        db.commit()
-    else:
-        db.flush()
-    return True
+    log: bool = True,
+) -> dict[str, list]:
+    return _update_detail(
+        db,
+        models.EndowmentPolicy,
+        policy_id,
+        {
+            "with_profits": with_profits,
+            "equities": equities,
+            "managed_fund": managed_fund,
+            "fund_name": fund_name,
+            "term": term,
+            "sum_assured": sum_assured,
+            "life_assured": life_assured,
+        },
+        commit=commit,
+        log=log,
+    )
 
 
+@routed
 def update_policy_commercial(
     db: Session,
     policy_id: int,
@@ -300,38 +344,36 @@ def update_policy_commercial(
     status: int | None = None,
     reject_reason: str | None = None,
     commit: bool = True,
-) -> bool:
-    det = db.query(models.CommercialPolicy).filter_by(policy_id=policy_id).first()
-    if not det:
-        raise CobolError("01", "Policy detail not found")
-    for k, v in {
-        "address": address,
-        "postcode": postcode,
-        "latitude": latitude,
-        "longitude": longitude,
-        "customer": customer,
-        "prop_type": prop_type,
-        "fire_peril": fire_peril,
-        "fire_premium": fire_premium,
-        "crime_peril": crime_peril,
-        "crime_premium": crime_premium,
-        "flood_peril": flood_peril,
-        "flood_premium": flood_premium,
-        "weather_peril": weather_peril,
-        "weather_premium": weather_premium,
-        "status": status,
-        "reject_reason": reject_reason,
-    }.items():
-        if v is not None:
-            setattr(det, k, v)
-    db.add(det)
-    if commit:
-        db.commit()
-    else:
-        db.flush()
-    return True
+    log: bool = True,
+) -> dict[str, list]:
+    return _update_detail(
+        db,
+        models.CommercialPolicy,
+        policy_id,
+        {
+            "address": address,
+            "postcode": postcode,
+            "latitude": latitude,
+            "longitude": longitude,
+            "customer": customer,
+            "prop_type": prop_type,
+            "fire_peril": fire_peril,
+            "fire_premium": fire_premium,
+            "crime_peril": crime_peril,
+            "crime_premium": crime_premium,
+            "flood_peril": flood_peril,
+            "flood_premium": flood_premium,
+            "weather_peril": weather_peril,
+            "weather_premium": weather_premium,
+            "status": status,
+            "reject_reason": reject_reason,
+        },
+        commit=commit,
+        log=log,
+    )
 
 
+@routed
 def create_policy_motor(db: Session, data: MotorPolicyCreate) -> models.Policy:
     policy_number = data.policy_number
     if policy_number is None:
@@ -368,10 +410,18 @@ def create_policy_motor(db: Session, data: MotorPolicyCreate) -> models.Policy:
     db.add(detail)
     db.commit()
     db.refresh(base)
-    _log_event(db, source="policies", message=f"create motor policy id={base.id}")
+    record_event(
+        db,
+        source="policies",
+        message=f"create motor policy id={base.id}",
+        entity_type="policy",
+        entity_id=base.id,
+        action="create",
+    )
     return base
 
 
+@routed
 def create_policy_house(db: Session, data: HousePolicyCreate) -> models.Policy:
     policy_number = data.policy_number
     if policy_number is None:
@@ -405,10 +455,18 @@ def create_policy_house(db: Session, data: HousePolicyCreate) -> models.Policy:
     db.add(detail)
     db.commit()
     db.refresh(base)
-    _log_event(db, source="policies", message=f"create house policy id={base.id}")
+    record_event(
+        db,
+        source="policies",
+        message=f"create house policy id={base.id}",
+        entity_type="policy",
+        entity_id=base.id,
+        action="create",
+    )
     return base
 
 
+@routed
 def create_policy_endowment(db: Session, data: EndowmentPolicyCreate) -> models.Policy:
     policy_number = data.policy_number
     if policy_number is None:
@@ -443,10 +501,18 @@ def create_policy_endowment(db: Session, data: EndowmentPolicyCreate) -> models.
     db.add(detail)
     db.commit()
     db.refresh(base)
-    _log_event(db, source="policies", message=f"create endowment policy id={base.id}")
+    record_event(
+        db,
+        source="policies",
+        message=f"create endowment policy id={base.id}",
+        entity_type="policy",
+        entity_id=base.id,
+        action="create",
+    )
     return base
 
 
+@routed
 def create_policy_commercial(db: Session, data: CommercialPolicyCreate) -> models.Policy:
     policy_number = data.policy_number
     if policy_number is None:
@@ -490,10 +556,40 @@ def create_policy_commercial(db: Session, data: CommercialPolicyCreate) -> model
     db.add(detail)
     db.commit()
     db.refresh(base)
-    _log_event(db, source="policies", message=f"create commercial policy id={base.id}")
+    record_event(
+        db,
+        source="policies",
+        message=f"create commercial policy id={base.id}",
+        entity_type="policy",
+        entity_id=base.id,
+        action="create",
+    )
     return base
 
 
+# policy_type -> model of the type-specific detail row
+DETAIL_MODELS = {
+    "M": models.MotorPolicy,
+    "H": models.HousePolicy,
+    "E": models.EndowmentPolicy,
+    "C": models.CommercialPolicy,
+}
+DETAILED_COLUMNS = (
+    models.Policy.id,
+    models.Policy.policy_type,
+    models.Policy.policy_number,
+    models.Policy.customer_id,
+    models.Policy.issue_date,
+    models.Policy.expiry_date,
+    models.Policy.last_changed,
+    models.Policy.broker_id,
+    models.Policy.brokers_ref,
+    models.Policy.payment,
+    models.Policy.commission,
+)
+
+
+@reads
 def list_policies_detailed(
     db: Session,
     limit: int = 100,
@@ -503,43 +599,41 @@ def list_policies_detailed(
     active_only: bool = False,
     postcode: str | None = None,
 ) -> list[dict]:
-    base = list_policies(
-        db,
-        limit=limit,
-        offset=offset,
-        policy_type=policy_type,
-        customer_id=customer_id,
-        active_only=active_only,
-        postcode=postcode,
-    )
-    result: list[dict] = []
-    for p in base:
-        det = get_policy_detail(db, p.id)
-        payload = {
-            "id": p.id,
-            "policy_type": p.policy_type,
-            "policy_number": p.policy_number,
-            "customer_id": p.customer_id,
-            "issue_date": p.issue_date,
-            "expiry_date": p.expiry_date,
-            "last_changed": p.last_changed,
-            "broker_id": p.broker_id,
-            "brokers_ref": p.brokers_ref,
-            "payment": p.payment,
-            "commission": p.commission,
-            "detail": det["detail_dict"] if det else None,
-        }
-        result.append(payload)
+    """Policies with their detail row as plain dicts: one query for the page, one per policy type present."""
+    stmt = list_policies_stmt(limit, offset, policy_type, customer_id, active_only, postcode)
+    result = [dict(row) for row in db.execute(stmt.with_only_columns(*DETAILED_COLUMNS)).mappings()]
+    ids_by_type: dict[str, list[int]] = {}
+    for payload in result:
+        ids_by_type.setdefault(payload["policy_type"], []).append(payload["id"])
+    details: dict[int, dict] = {}
+    for kind, ids in ids_by_type.items():
+        model = DETAIL_MODELS.get(kind)
+        if model is None:
+            continue
+        table = model.__table__
+        for row in db.execute(select(table).where(table.c.policy_id.in_(ids))).mappings():
+            details.setdefault(row["policy_id"], dict(row))  # first row per policy, like get_policy_detail
+    for payload in result:
+        payload["detail"] = details.get(payload["id"])
     return result
 
 
-def _log_event(db: Session, *, source: str, message: str, level: str = "INFO") -> None:
-    try:
-        db.add(models.Event(source=source, level=level, message=message))
-        db.commit()
-    except Exception:
-        db.rollback()
-
-
-def log_policy_event(db: Session, message: str, level: str = "INFO") -> None:
-    _log_event(db, source="policies", message=message, level=level)
+def log_policy_event(
+    db: Session,
+    message: str,
+    level: str = "INFO",
+    *,
+    policy_id: int | None = None,
+    action: str | None = None,
+    diff: dict | None = None,
+) -> None:
+    record_event(
+        db,
+        source="policies",
+        message=message,
+        level=level,
+        entity_type="policy" if policy_id is not None else None,
+        entity_id=policy_id,
+        action=action,
+        diff=diff,
+    )
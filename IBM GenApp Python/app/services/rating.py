@@ -0,0 +1,261 @@
+"""Motor rating engine: premiums from rating tables over NumPy arrays.
+
+premium = max(minimum, base_rate x value factor x cc factor x vehicle age factor x accident factor)
+
+Each factor comes from a band table: ``bounds`` are the lower limits of the
+second, third, ... band (ascending), ``factors`` has one entry more than
+``bounds``, ``missing`` applies when the risk has no value for it. The
+accident table lists factors by count; counts beyond the list use its last
+entry. Vehicle age is the rating date's year minus the year in
+``manufactured`` (``YYYY...``).
+
+The built-in tables can be replaced by a JSON file with the same layout
+(``GENAPP_MOTOR_RATING_TABLES``). Single quotes, the batch endpoint and
+`rerate_book` all go through `rate`, so a premium never depends on the path
+that computed it.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import dataclass, asdict
+from datetime import date, datetime, UTC
+from functools import lru_cache
+from typing import Callable, Iterable, Sequence
+
+import numpy as np
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.db import counts as entity_counts
+from app.db import models, outbox
+from app.db.session import SessionLocal
+from app.services.bulk import apply_updates
+from app.utils.errors import CobolError
+
+
+RATING_TABLES_PATH = os.getenv("GENAPP_MOTOR_RATING_TABLES", "")
+QUOTE_BATCH_MAX = int(os.getenv("GENAPP_QUOTE_BATCH_MAX", "10000"))
+RERATE_CHUNK = int(os.getenv("GENAPP_RERATE_CHUNK", "5000"))
+
+DEFAULT_TABLES = {
+    "base_rate": 400,
+    "minimum": 100,
+    "value": {"bounds": [5000, 10000, 20000, 35000, 60000], "factors": [0.7, 1.0, 1.4, 1.9, 2.6, 3.5], "missing": 1.0},
+    "cc": {"bounds": [1000, 1400, 1800, 2500], "factors": [0.85, 1.0, 1.15, 1.35, 1.6], "missing": 1.0},
+    "vehicle_age": {"bounds": [3, 8, 15, 25], "factors": [1.2, 1.0, 0.9, 0.95, 1.1], "missing": 1.0},
+    "accidents": {"factors": [1.0, 1.25, 1.6, 2.1]},
+}
+
+
+@dataclass(frozen=True)
+class Band:
+    bounds: np.ndarray
+    factors: np.ndarray
+    missing: float = 1.0
+
+    @classmethod
+    def from_spec(cls, name: str, spec: dict) -> "Band":
+        bounds = np.asarray(spec.get("bounds", []), dtype=float)
+        factors = np.asarray(spec["factors"], dtype=float)
+        if len(factors) != len(bounds) + 1 or np.any(np.diff(bounds) <= 0):
+            raise ValueError(f"rating table {name!r}: needs ascending bounds and one factor more than bounds")
+        return cls(bounds, factors, float(spec.get("missing", 1.0)))
+
+    def apply(self, values: np.ndarray) -> np.ndarray:
+        known = ~np.isnan(values)
+        out = np.full(len(values), self.missing)
+        out[known] = self.factors[np.searchsorted(self.bounds, values[known], side="right")]
+        return out
+
+
+@dataclass(frozen=True)
+class RatingTables:
+    base_rate: float
+    minimum: float
+    value: Band
+    cc: Band
+    vehicle_age: Band
+    accidents: np.ndarray
+
+    @classmethod
+    def from_spec(cls, spec: dict) -> "RatingTables":
+        accidents = np.asarray(spec["accidents"]["factors"], dtype=float)
+        if not len(accidents):
+            raise ValueError("rating table 'accidents': needs at least one factor")
+        return cls(
+            base_rate=float(spec["base_rate"]),
+            minimum=float(spec.get("minimum", 0)),
+            value=Band.from_spec("value", spec["value"]),
+            cc=Band.from_spec("cc", spec["cc"]),
+            vehicle_age=Band.from_spec("vehicle_age", spec["vehicle_age"]),
+            accidents=accidents,
+        )
+
+
+@lru_cache(maxsize=1)
+def tables() -> RatingTables:
+    """The active tables (``GENAPP_MOTOR_RATING_TABLES`` or the built-in defaults), loaded once."""
+    if RATING_TABLES_PATH:
+        with open(RATING_TABLES_PATH, encoding="utf-8") as fh:
+            return RatingTables.from_spec(json.load(fh))
+    return RatingTables.from_spec(DEFAULT_TABLES)
+
+
+@dataclass
+class Rating:
+    premiums: np.ndarray  # int64
+    factors: dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.premiums)
+
+
+def _column(values: Iterable[float | None]) -> np.ndarray:
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def _years(manufactured: Iterable[str | None]) -> np.ndarray:
+    return np.array(
+        [float(m[:4]) if m and len(m) >= 4 and m[:4].isdigit() else np.nan for m in manufactured], dtype=float
+    )
+
+
+def rate(
+    value: Sequence[int | None],
+    cc: Sequence[int | None],
+    manufactured: Sequence[str | None],
+    accidents: Sequence[int | None],
+    *,
+    as_of: date | None = None,
+    rating_tables: RatingTables | None = None,
+) -> Rating:
+    """Rate equally long columns of motor risks in one pass."""
+    t = rating_tables or tables()
+    as_of = as_of or datetime.now(UTC).date()
+    age = np.maximum(as_of.year - _years(manufactured), 0)
+    claims = np.nan_to_num(_column(accidents), nan=0.0).clip(0, len(t.accidents) - 1).astype(np.int64)
+    factors = {
+        "value": t.value.apply(_column(value)),
+        "cc": t.cc.apply(_column(cc)),
+        "vehicle_age": t.vehicle_age.apply(age),
+        "accidents": t.accidents[claims],
+    }
+    premium = t.base_rate * factors["value"] * factors["cc"] * factors["vehicle_age"] * factors["accidents"]
+    return Rating(np.rint(np.maximum(premium, t.minimum)).astype(np.int64), factors)
+
+
+def rate_risks(risks: Sequence[dict], *, as_of: date | None = None) -> Rating:
+    """Rate risk dicts (``value``, ``cc``, ``manufactured``, ``accidents``)."""
+    return rate(
+        [r.get("value") for r in risks],
+        [r.get("cc") for r in risks],
+        [r.get("manufactured") for r in risks],
+        [r.get("accidents") for r in risks],
+        as_of=as_of,
+    )
+
+
+def quote_batch(risks: Sequence[dict], *, as_of: date | None = None, explain: bool = False) -> dict:
+    """Premiums for up to ``GENAPP_QUOTE_BATCH_MAX`` risks; ``explain`` adds the factor columns."""
+    if len(risks) > QUOTE_BATCH_MAX:
+        raise CobolError("98", f"höchstens {QUOTE_BATCH_MAX} Risiken pro Anfrage")
+    rating = rate_risks(risks, as_of=as_of)
+    out: dict = {"count": len(rating), "premiums": rating.premiums.tolist()}
+    if explain:
+        out["factors"] = {name: column.tolist() for name, column in rating.factors.items()}
+    return out
+
+
+def quote(risk: dict, *, as_of: date | None = None) -> dict:
+    """One quote through the batch path: ``{"premium": ..., "factors": {...}}``."""
+    rating = rate_risks([risk], as_of=as_of)
+    return {"premium": int(rating.premiums[0]), "factors": {name: float(col[0]) for name, col in rating.factors.items()}}
+
+
+@dataclass
+class RerateStats:
+    rated: int = 0
+    changed: int = 0
+    chunks: int = 0
+    dry_run: bool = False
+    duration_s: float = 0.0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def _rerate_chunk(db: Session, rows: list[dict], rating: Rating) -> int:
+    updates, events, feed = [], [], []
+    for row, premium in zip(rows, rating.premiums.tolist()):
+        if row["premium"] == premium:
+            continue
+        policy_id = row["policy_id"]
+        updates.append((policy_id, {"premium": premium}))
+        events.append(
+            {
+                "source": "rating",
+                "level": "INFO",
+                "message": f"rerate motor policy id={policy_id}",
+                "entity_type": "policy",
+                "entity_id": policy_id,
+                "action": "rerate",
+                "diff": json.dumps({"premium": [row["premium"], premium]}, separators=(",", ":")),
+            }
+        )
+        feed.append(
+            {"entity_type": "policy_motor", "entity_id": policy_id, "op": "update", "payload": outbox.row_payload({**row, "premium": premium})}
+        )
+    if updates:
+        apply_updates(db, models.MotorPolicy.__table__, "policy_id", updates)
+        db.execute(insert(models.Event), events)
+        entity_counts.add(db, "events", len(events))
+        outbox.append(db, feed)
+    return len(updates)
+
+
+def rerate_book(
+    factory: Callable[[], Session] = SessionLocal,
+    *,
+    chunk_size: int = RERATE_CHUNK,
+    as_of: date | None = None,
+    dry_run: bool = False,
+) -> RerateStats:
+    """Re-rate every motor policy in place, one transaction per chunk; only changed premiums are written."""
+    stats = RerateStats(dry_run=dry_run)
+    began = time.perf_counter()
+    table = models.MotorPolicy.__table__
+    after = 0
+    with factory() as db:
+        while True:
+            rows = [
+                dict(row)
+                for row in db.execute(
+                    select(table).where(table.c.id > after).order_by(table.c.id).limit(chunk_size)
+                ).mappings()
+            ]
+            if not rows:
+                break
+            rating = rate(
+                [r["value"] for r in rows],
+                [r["cc"] for r in rows],
+                [r["manufactured"] for r in rows],
+                [r["accidents"] for r in rows],
+                as_of=as_of,
+            )
+            if dry_run:
+                stats.changed += int(np.count_nonzero(rating.premiums != _column(r["premium"] for r in rows)))
+                db.rollback()
+            else:
+                try:
+                    stats.changed += _rerate_chunk(db, rows, rating)
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                    raise
+            stats.rated += len(rows)
+            stats.chunks += 1
+            after = rows[-1]["id"]
+    stats.duration_s = time.perf_counter() - began
+    return stats
@@ -0,0 +1,323 @@
+"""Renewal batch job for policies expiring in a date window.
+
+`renew_expiring` runs one worker thread per policy type. Each worker walks the
+policies of its type with ``start <= expiry_date <= end`` in ``(expiry_date,
+id)`` order over ``ix_policies_type_expiry``, ``GENAPP_RENEWAL_CHUNK`` rows at
+a time. New dates and premiums are computed with numpy for the whole chunk and
+written set-based (`app.services.bulk.apply_updates`) together with audit
+events, change feed rows and the type's checkpoint in ``job_checkpoints``, one
+transaction per chunk. Starting the same window again resumes after the last
+committed chunk; finished types are skipped.
+
+A renewal starts the day after the old expiry and runs for
+``GENAPP_RENEWAL_TERM_MONTHS``. ``payment`` and the type premiums (motor
+``premium``, the commercial peril premiums) grow by
+``GENAPP_RENEWAL_UPLIFT_PCT``; motor premiums add
+``GENAPP_RENEWAL_ACCIDENT_PCT`` per recorded accident.
+
+On SQLite the workers read and compute concurrently but take turns for the
+write transaction, so they never fight over the database lock.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict, field
+from datetime import date, datetime, timedelta, UTC
+from typing import Callable, Iterable
+
+import numpy as np
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.db import counts as entity_counts
+from app.db import models, outbox
+from app.db.session import SessionLocal
+from app.services.bulk import apply_updates
+from app.utils.errors import CobolError
+from app.utils.metrics import registry
+
+
+RENEWAL_CHUNK = int(os.getenv("GENAPP_RENEWAL_CHUNK", "2000"))
+RENEWAL_WORKERS = int(os.getenv("GENAPP_RENEWAL_WORKERS", "4"))
+TERM_MONTHS = int(os.getenv("GENAPP_RENEWAL_TERM_MONTHS", "12"))
+UPLIFT_PCT = float(os.getenv("GENAPP_RENEWAL_UPLIFT_PCT", "3"))
+ACCIDENT_PCT = float(os.getenv("GENAPP_RENEWAL_ACCIDENT_PCT", "10"))
+# Scheduled run: policies expiring within the next LEAD_DAYS days; interval 0 = off
+RENEWAL_INTERVAL = float(os.getenv("GENAPP_RENEWAL_INTERVAL_S", "0"))
+LEAD_DAYS = int(os.getenv("GENAPP_RENEWAL_LEAD_DAYS", "30"))
+
+POLICY_TYPES = ("M", "H", "E", "C")
+# policy_type -> (detail model, premium columns renewed with the policy, change feed entity type)
+PREMIUMS = {
+    "M": (models.MotorPolicy, ("premium",), "policy_motor"),
+    "C": (
+        models.CommercialPolicy,
+        ("fire_premium", "crime_premium", "flood_premium", "weather_premium"),
+        "policy_commercial",
+    ),
+}
+
+
+@dataclass
+class RenewalStats:
+    job: str = ""
+    renewed: dict[str, int] = field(default_factory=dict)
+    chunks: int = 0
+    resumed: bool = False
+    duration_s: float = 0.0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class _Totals:
+    runs: int = 0
+    renewed: int = 0
+
+
+totals = _Totals()
+_totals_lock = threading.Lock()
+
+
+def job_name(start: date, end: date) -> str:
+    return f"renewal:{start.isoformat()}:{end.isoformat()}"
+
+
+def add_months(days: np.ndarray, months: int) -> np.ndarray:
+    """``datetime64[D]`` dates shifted by ``months``, clamped to the end of the target month."""
+    month_start = days.astype("datetime64[M]")
+    target = month_start + months
+    last_day = (target + 1).astype("datetime64[D]") - 1
+    return np.minimum(target.astype("datetime64[D]") + (days - month_start.astype("datetime64[D]")), last_day)
+
+
+def _scaled(values: Iterable[int | None], factors: np.ndarray) -> list[int | None]:
+    amounts = np.array([np.nan if v is None else v for v in values], dtype=float)
+    scaled = np.rint(amounts * factors)
+    return [None if np.isnan(v) else int(v) for v in scaled]
+
+
+def compute_renewals(
+    policy_type: str,
+    rows: list[dict],
+    details: dict[int, dict],
+    *,
+    term_months: int = TERM_MONTHS,
+    uplift_pct: float = UPLIFT_PCT,
+    accident_pct: float = ACCIDENT_PCT,
+) -> tuple[list[tuple[int, dict]], list[tuple[int, dict]]]:
+    """New base and detail values for one chunk: ``([(policy id, base changes)], [(policy id, detail changes)])``."""
+    expiry = np.array([row["expiry_date"] for row in rows], dtype="datetime64[D]")
+    issue = (expiry + 1).astype(object)
+    new_expiry = add_months(expiry, term_months).astype(object)
+    factor = np.full(len(rows), 1 + uplift_pct / 100)
+    payments = _scaled((row["payment"] for row in rows), factor)
+    base = [
+        (row["id"], {"issue_date": issue[i], "expiry_date": new_expiry[i], "payment": payments[i]})
+        for i, row in enumerate(rows)
+    ]
+    if policy_type not in PREMIUMS:
+        return base, []
+    _model, columns, _entity = PREMIUMS[policy_type]
+    present = [row["id"] for row in rows if row["id"] in details]
+    detail_rows = [details[policy_id] for policy_id in present]
+    if policy_type == "M":
+        accidents = np.array([row["accidents"] or 0 for row in detail_rows], dtype=float)
+        factor = 1 + (uplift_pct + accidents * accident_pct) / 100
+    else:
+        factor = np.full(len(detail_rows), 1 + uplift_pct / 100)
+    scaled = {name: _scaled((row[name] for row in detail_rows), factor) for name in columns}
+    detail = [(policy_id, {name: scaled[name][i] for name in columns}) for i, policy_id in enumerate(present)]
+    return base, detail
+
+
+def _parse_position(position: str | None) -> tuple[date, int] | None:
+    if not position:
+        return None
+    day, policy_id = position.split(":")
+    return date.fromisoformat(day), int(policy_id)
+
+
+def _read_chunk(db: Session, policy_type: str, start: date, end: date, after: tuple[date, int] | None, limit: int):
+    table = models.Policy.__table__
+    q = (
+        select(table)
+        .where(table.c.policy_type == policy_type, table.c.expiry_date >= start, table.c.expiry_date <= end)
+        .order_by(table.c.expiry_date, table.c.id)
+        .limit(limit)
+    )
+    if after is not None:
+        q = q.where(tuple_(table.c.expiry_date, table.c.id) > tuple_(*after))
+    rows = [dict(row) for row in db.execute(q).mappings()]
+    details: dict[int, dict] = {}
+    if rows and policy_type in PREMIUMS:
+        detail_table = PREMIUMS[policy_type][0].__table__
+        ids = [row["id"] for row in rows]
+        details = {
+            row["policy_id"]: dict(row)
+            for row in db.execute(select(detail_table).where(detail_table.c.policy_id.in_(ids))).mappings()
+        }
+    return rows, details
+
+
+def _audit_rows(rows: list[dict], base: list[tuple[int, dict]], details: dict[int, dict], detail: list[tuple[int, dict]], entity: str | None):
+    by_id = {row["id"]: row for row in rows}
+    detail_changes = dict(detail)
+    events, feed = [], []
+    for policy_id, changes in base:
+        row = by_id[policy_id]
+        diff = {name: [row[name], value] for name, value in changes.items() if row[name] != value}
+        old_detail = details.get(policy_id, {})
+        diff.update(
+            {name: [old_detail[name], value] for name, value in detail_changes.get(policy_id, {}).items() if old_detail[name] != value}
+        )
+        events.append(
+            {
+                "source": "renewals",
+                "level": "INFO",
+                "message": f"renew policy id={policy_id}",
+                "entity_type": "policy",
+                "entity_id": policy_id,
+                "action": "renew",
+                "diff": json.dumps(diff, default=str, separators=(",", ":")),
+            }
+        )
+        feed.append({"entity_type": "policy", "entity_id": policy_id, "op": "update", "payload": outbox.row_payload({**row, **changes})})
+        if policy_id in detail_changes:
+            feed.append(
+                {
+                    "entity_type": entity,
+                    "entity_id": policy_id,
+                    "op": "update",
+                    "payload": outbox.row_payload({**old_detail, **detail_changes[policy_id]}),
+                }
+            )
+    return events, feed
+
+
+def _checkpoint(db: Session, job: str, policy_type: str) -> models.JobCheckpoint:
+    cp = db.get(models.JobCheckpoint, (job, policy_type))
+    if cp is None:
+        cp = models.JobCheckpoint(job=job, part=policy_type, processed=0, finished=0)
+        db.add(cp)
+    return cp
+
+
+def _renew_type(
+    factory: Callable[[], Session],
+    policy_type: str,
+    job: str,
+    start: date,
+    end: date,
+    chunk_size: int,
+    write_lock: threading.Lock | None,
+    stats: RenewalStats,
+) -> None:
+    lock = write_lock or threading.Lock()
+    with factory() as db:
+        cp = db.get(models.JobCheckpoint, (job, policy_type))
+        if cp is not None and cp.finished:
+            stats.renewed[policy_type] = cp.processed
+            stats.resumed = True
+            return
+        after = _parse_position(cp.position if cp else None)
+        stats.resumed = stats.resumed or after is not None
+        db.rollback()  # end the read transaction before computing
+        entity = PREMIUMS[policy_type][2] if policy_type in PREMIUMS else None
+        while True:
+            rows, details = _read_chunk(db, policy_type, start, end, after, chunk_size)
+            db.rollback()
+            if rows:
+                base, detail = compute_renewals(policy_type, rows, details)
+                now = datetime.now(UTC).replace(tzinfo=None)
+                for _policy_id, changes in base:
+                    changes["last_changed"] = now
+                events, feed = _audit_rows(rows, base, details, detail, entity)
+            with lock:
+                try:
+                    if rows:
+                        apply_updates(db, models.Policy.__table__, "id", base)
+                        if detail:
+                            apply_updates(db, PREMIUMS[policy_type][0].__table__, "policy_id", detail)
+                        db.execute(insert(models.Event), events)
+                        entity_counts.add(db, "events", len(events))
+                        outbox.append(db, feed)
+                    cp = _checkpoint(db, job, policy_type)
+                    if rows:
+                        after = (rows[-1]["expiry_date"], rows[-1]["id"])
+                        cp.position = f"{after[0].isoformat()}:{after[1]}"
+                        cp.processed += len(rows)
+                    if len(rows) < chunk_size:
+                        cp.finished = 1
+                    processed = cp.processed
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                    raise
+            stats.renewed[policy_type] = processed
+            if rows:
+                stats.chunks += 1
+                with _totals_lock:
+                    totals.renewed += len(rows)
+            if len(rows) < chunk_size:
+                return
+
+
+def renew_expiring(
+    start: date,
+    end: date,
+    *,
+    policy_types: Iterable[str] = POLICY_TYPES,
+    factory: Callable[[], Session] = SessionLocal,
+    chunk_size: int = RENEWAL_CHUNK,
+    workers: int = RENEWAL_WORKERS,
+    restart: bool = False,
+) -> RenewalStats:
+    """Renew all policies of ``policy_types`` expiring in ``[start, end]``; resumable per window.
+
+    Raises `CobolError` ``98`` for an empty window, unknown types or a window
+    reaching past the first renewed expiry date (the job would renew twice).
+    """
+    policy_types = tuple(dict.fromkeys(policy_types))
+    unknown = [t for t in policy_types if t not in POLICY_TYPES]
+    if unknown:
+        raise CobolError("98", f"unbekannte Policentypen: {', '.join(unknown)}")
+    if end < start:
+        raise CobolError("98", "Ende des Zeitfensters liegt vor dem Anfang")
+    if add_months(np.array([start], dtype="datetime64[D]"), TERM_MONTHS)[0] <= np.datetime64(end):
+        raise CobolError("98", f"Zeitfenster muss kürzer als {TERM_MONTHS} Monate sein")
+    job = job_name(start, end)
+    stats = RenewalStats(job=job, renewed={t: 0 for t in policy_types})
+    began = time.perf_counter()
+    if restart:
+        with factory() as db:
+            db.query(models.JobCheckpoint).filter(models.JobCheckpoint.job == job).delete()
+            db.commit()
+    with factory() as db:
+        sqlite = db.get_bind().dialect.name == "sqlite"
+    write_lock = threading.Lock() if sqlite else None
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(policy_types))), thread_name_prefix="renewal") as pool:
+        futures = [
+            pool.submit(_renew_type, factory, t, job, start, end, chunk_size, write_lock, stats) for t in policy_types
+        ]
+        for future in futures:
+            future.result()
+    stats.duration_s = time.perf_counter() - began
+    with _totals_lock:
+        totals.runs += 1
+    return stats
+
+
+def run_scheduled() -> RenewalStats:
+    """Scheduler entry: renew everything expiring within the next ``GENAPP_RENEWAL_LEAD_DAYS`` days."""
+    today = datetime.now(UTC).date()
+    return renew_expiring(today, today + timedelta(days=LEAD_DAYS))
+
+
+registry.counter("genapp_renewals_total", "Policies renewed by the renewal job", lambda: totals.renewed)
+registry.counter("genapp_renewal_runs_total", "Completed renewal job runs", lambda: totals.runs)
@@ -0,0 +1,86 @@
+"""Aggregations for the reporting endpoints (run against the snapshot DB)."""
+import csv
+import io
+from datetime import date
+from typing import Iterator
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from app.db import models
+
+
+def portfolio_summary(db: Session) -> list[dict]:
+    today = date.today()
+    active = case(((models.Policy.expiry_date == None) | (models.Policy.expiry_date >= today), 1), else_=0)
+    stmt = (
+        select(
+            models.Policy.policy_type,
+            func.count(models.Policy.id),
+            func.sum(active),
+            func.coalesce(func.sum(models.Policy.payment), 0),
+            func.avg(models.Policy.payment),
+        )
+        .group_by(models.Policy.policy_type)
+        .order_by(models.Policy.policy_type)
+    )
+    return [
+        {
+            "policy_type": policy_type,
+            "policies": count,
+            "active": active_count or 0,
+            "payment_total": total,
+            "payment_avg": round(avg, 2) if avg is not None else None,
+        }
+        for policy_type, count, active_count, total, avg in db.execute(stmt)
+    ]
+
+
+def claims_summary(db: Session) -> list[dict]:
+    stmt = (
+        select(
+            models.Claim.cause,
+            func.count(models.Claim.id),
+            func.coalesce(func.sum(models.Claim.value), 0),
+            func.coalesce(func.sum(models.Claim.paid), 0),
+        )
+        .group_by(models.Claim.cause)
+        .order_by(func.count(models.Claim.id).desc())
+    )
+    return [
+        {"cause": cause, "claims": count, "value_total": value, "paid_total": paid}
+        for cause, count, value, paid in db.execute(stmt)
+    ]
+
+
+POLICY_EXPORT_COLUMNS = (
+    models.Policy.id,
+    models.Policy.policy_number,
+    models.Policy.policy_type,
+    models.Policy.customer_id,
+    models.Customer.customer_number,
+    models.Customer.postcode,
+    models.Policy.issue_date,
+    models.Policy.expiry_date,
+    models.Policy.broker_id,
+    models.Policy.payment,
+    models.Policy.commission,
+)
+
+
+def iter_policies_csv(db: Session, policy_type: str | None = None, batch_size: int = 1000) -> Iterator[str]:
+    """Yield the policy export as CSV chunks of ``batch_size`` rows."""
+    stmt = select(*POLICY_EXPORT_COLUMNS).join(models.Customer, models.Customer.id == models.Policy.customer_id)
+    if policy_type:
+        stmt = stmt.where(models.Policy.policy_type == policy_type.upper())
+    stmt = stmt.order_by(models.Policy.id).execution_options(yield_per=batch_size)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.key for column in POLICY_EXPORT_COLUMNS])
+    for partition in db.execute(stmt).partitions():
+        writer.writerows(partition)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import os
+import secrets
+
+from fastapi import Header, HTTPException
+
+# Admin features (profiling, maintenance jobs) stay disabled unless a token is configured.
+ADMIN_TOKEN = os.getenv("GENAPP_ADMIN_TOKEN", "")
+
+
+def admin_enabled() -> bool:
+    return bool(ADMIN_TOKEN)
+
+
+def is_admin_token(token: str | None) -> bool:
+    if not ADMIN_TOKEN or not token:
+        return False
+    return secrets.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
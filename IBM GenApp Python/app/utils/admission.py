@@ -0,0 +1,171 @@
+"""Admission control: per route group concurrency limits with bounded wait queues.
+
+Requests are classified into groups (``read``: single-entity GETs, ``heavy``:
+listings, reports, exports and batch quotes, ``write``: POST/PUT/PATCH/DELETE). Each group
+admits up to ``limit`` concurrent requests and lets up to ``queue`` more wait
+for a slot (FIFO) for at most ``GENAPP_ADMIT_QUEUE_TIMEOUT_MS``. Anything
+beyond is shed right away with 503 and ``Retry-After`` instead of piling up
+in the threadpool:
+
+- COBOL ``88``: the group's wait queue is full
+- COBOL ``89``: the request waited for the timeout without getting a slot
+
+A burst of exports therefore cannot delay the single-entity endpoints, which
+have their own, larger budget. Long-lived streams, ``/metrics`` and static
+files are never limited.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+from collections import Counter, deque
+
+from app.utils.errors import COBOL_HTTP_MAP
+from app.utils.metrics import registry
+
+ADMISSION = os.getenv("GENAPP_ADMISSION", "1").lower() in ("1", "true", "yes")
+ADMIT_LIMITS = os.getenv("GENAPP_ADMIT_LIMITS", "read=32/128,heavy=4/16,write=8/64")
+ADMIT_QUEUE_TIMEOUT = float(os.getenv("GENAPP_ADMIT_QUEUE_TIMEOUT_MS", "2000")) / 1000.0
+RETRY_AFTER = os.getenv("GENAPP_ADMIT_RETRY_AFTER_S", "1")
+
+EXEMPT = ("/static/", "/metrics", "/api/events/stream", "/api/changes", "/api/admin/")
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+# POSTs that only compute (rating) and never write
+COMPUTE_PATHS = ("/api/quotes/",)
+# single-entity paths: an optional type segment (/api/policies/motor/42), the id, optionally followed by
+# one sub-resource (/history, /security, /edit)
+_ENTITY = re.compile(r"^(/api)?/[a-z_]+(/[a-z_]+)?/\d+(/[a-z_]+)?/?$")
+
+
+def parse_limits(spec: str) -> dict[str, tuple[int, int]]:
+    """``read=32/128,heavy=4/16`` -> ``{"read": (32, 128), "heavy": (4, 16)}``."""
+    limits = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, value = part.partition("=")
+        limit, _, queue = value.partition("/")
+        limits[name.strip()] = (max(int(limit), 1), max(int(queue or 0), 0))
+    return limits
+
+
+def classify(method: str, path: str) -> str | None:
+    if path.startswith(EXEMPT):
+        return None
+    if path.startswith(COMPUTE_PATHS):
+        return "heavy"
+    if method in WRITE_METHODS:
+        return "write"
+    # the index page only reads the maintained counts
+    return "read" if path == "/" or _ENTITY.match(path) else "heavy"
+
+
+class Gate:
+    """FIFO semaphore with a bounded number of waiters (one event loop per process)."""
+
+    def __init__(self, name: str, limit: int, queue: int) -> None:
+        self.name = name
+        self.limit = limit
+        self.queue = queue
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self.shed: Counter[str] = Counter()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, timeout: float) -> str | None:
+        """Take a slot; returns None when admitted, else the COBOL code to shed with."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return None
+        if len(self._waiters) >= self.queue:
+            self.shed["88"] += 1
+            return "88"
+        granted = asyncio.get_running_loop().create_future()
+        self._waiters.append(granted)
+        try:
+            await asyncio.wait_for(asyncio.shield(granted), timeout)
+        except asyncio.TimeoutError:
+            pass
+        except BaseException:
+            self._abandon(granted)
+            raise
+        if granted.done() and not granted.cancelled():
+            return None
+        self._abandon(granted)
+        self.shed["89"] += 1
+        return "89"
+
+    def _abandon(self, granted: asyncio.Future) -> None:
+        if granted.done() and not granted.cancelled():
+            self.release()  # the slot was handed over just now; pass it on
+            return
+        granted.cancel()
+        try:
+            self._waiters.remove(granted)
+        except ValueError:
+            pass
+
+    def release(self) -> None:
+        while self._waiters:
+            granted = self._waiters.popleft()
+            if not granted.done():
+                granted.set_result(True)  # hand the slot over; active stays the same
+                return
+        self.active -= 1
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, limits: dict[str, tuple[int, int]] | None = None, timeout: float = ADMIT_QUEUE_TIMEOUT) -> None:
+        self.app = app
+        self.timeout = timeout
+        self.gates = {name: Gate(name, *value) for name, value in (limits or parse_limits(ADMIT_LIMITS)).items()}
+        gates.update(self.gates)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        gate = self.gates.get(classify(scope["method"], scope["path"]) or "")
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+        code = await gate.acquire(self.timeout)
+        if code is not None:
+            await _shed(send, code)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
+
+
+async def _shed(send, code: str) -> None:
+    status, detail = COBOL_HTTP_MAP[code]
+    body = json.dumps({"detail": detail, "code": code}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"retry-after", RETRY_AFTER.encode()),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+# gates of the running app, for /metrics
+gates: dict[str, Gate] = {}
+
+registry.gauge("genapp_admission_active", "Admitted requests in flight per route group", lambda: [({"group": g.name}, g.active) for g in gates.values()])
+registry.gauge("genapp_admission_waiting", "Requests waiting for a slot per route group", lambda: [({"group": g.name}, g.waiting) for g in gates.values()])
+registry.counter(
+    "genapp_admission_shed_total",
+    "Requests rejected with 503 per route group and COBOL code",
+    lambda: [({"group": g.name, "code": code}, n) for g in gates.values() for code, n in g.shed.items()],
+)
@@ -0,0 +1,157 @@
+"""Response compression (gzip, brotli when installed) with a size threshold.
+
+`CompressionMiddleware` picks the best encoding the client accepts from
+``GENAPP_COMPRESSION`` (default ``br,gzip``; ``0`` switches it off). Bodies
+below ``GENAPP_COMPRESS_MIN_BYTES`` go out unchanged, as do responses that are
+already encoded (precompressed static files), event streams, and content types
+that do not shrink (images, archives). Streamed responses are compressed chunk
+by chunk with a sync flush, so NDJSON and CSV exports still arrive
+incrementally.
+"""
+from __future__ import annotations
+
+import os
+import zlib
+from collections import Counter
+
+from app.utils.metrics import registry
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+COMPRESSION = os.getenv("GENAPP_COMPRESSION", "br,gzip")
+COMPRESS_MIN_BYTES = int(os.getenv("GENAPP_COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GENAPP_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("GENAPP_BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE = ("text/", "application/json", "application/msgpack", "application/javascript", "application/xml", "application/x-ndjson", "image/svg+xml")
+SKIP_TYPES = ("text/event-stream",)
+
+stats: Counter[str] = Counter()
+
+
+def enabled_encodings(spec: str = COMPRESSION) -> tuple[str, ...]:
+    if spec.strip().lower() in ("", "0", "false", "no", "off"):
+        return ()
+    available = {"gzip"} | ({"br"} if brotli is not None else set())
+    return tuple(name for name in (part.strip().lower() for part in spec.split(",")) if name in available)
+
+
+def choose_encoding(accept: str, offered: tuple[str, ...]) -> str | None:
+    """Best of ``offered`` (in server preference order) for an ``Accept-Encoding`` value."""
+    weights: dict[str, float] = {}
+    for part in accept.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    wildcard = weights.get("*", 0.0)
+    for encoding in offered:
+        if weights.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+class _Encoder:
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._gz = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._br.process(data)
+            return out + (self._br.finish() if final else self._br.flush())
+        out = self._gz.compress(data)
+        return out + self._gz.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+def _header(headers, name: bytes) -> bytes | None:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _compressible(headers) -> bool:
+    if _header(headers, b"content-encoding") is not None:
+        return False
+    content_type = (_header(headers, b"content-type") or b"").decode("latin-1").lower()
+    return content_type.startswith(COMPRESSIBLE) and not content_type.startswith(SKIP_TYPES)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, encodings: tuple[str, ...] | None = None, minimum_size: int = COMPRESS_MIN_BYTES) -> None:
+        self.app = app
+        self.encodings = enabled_encodings() if encodings is None else encodings
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.encodings or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        accept = (_header(scope.get("headers", []), b"accept-encoding") or b"").decode("latin-1")
+        encoding = choose_encoding(accept, self.encodings) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        encoder: _Encoder | None = None
+        passthrough = False
+
+        async def wrapped(message):
+            nonlocal start, encoder, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                passthrough = not _compressible(message.get("headers", []))
+                if passthrough:
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if encoder is None:
+                if not more and len(body) < self.minimum_size:
+                    passthrough = True
+                    stats["skipped_small"] += 1
+                    await send(start)
+                    await send(message)
+                    return
+                encoder = _Encoder(encoding)
+                headers = [(k, v) for k, v in start.get("headers", []) if k.lower() != b"content-length"]
+                vary = _header(headers, b"vary")
+                headers = [(k, v) for k, v in headers if k.lower() != b"vary"]
+                headers.append((b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+                headers.append((b"content-encoding", encoding.encode()))
+                await send({**start, "headers": headers})
+                stats[encoding] += 1
+            stats["bytes_in"] += len(body)
+            out = encoder.chunk(body, final=not more)
+            stats["bytes_out"] += len(out)
+            await send({"type": "http.response.body", "body": out, "more_body": more})
+
+        await self.app(scope, receive, wrapped)
+
+
+registry.counter(
+    "genapp_compression_responses_total",
+    "Responses by compression outcome",
+    lambda: [({"encoding": name}, stats[name]) for name in ("gzip", "br", "skipped_small")],
+)
+registry.counter(
+    "genapp_compression_bytes_total",
+    "Body bytes before and after compression",
+    lambda: [({"stage": "in"}, stats["bytes_in"]), ({"stage": "out"}, stats["bytes_out"])],
+)
@@ -9,6 +9,7 @@ COBOL_HTTP_MAP: dict[str, tuple[int, str]] = {
     "88": (503, "Backend temporarily unavailable"),
     "89": (503, "Backend temporarily unavailable"),
     "90": (500, "Backend error"),
+    "91": (410, "Position no longer available"),
     "98": (400, "Invalid request"),
     "99": (400, "Unsupported request"),
 }
@@ -6,10 +6,10 @@ from . import datasets
 
 class GenappProvider(BaseProvider):
     def genapp_first_name(self) -> str:
-        return datasets.random_first_name(self.random)
+        return datasets.random_first_name(self.generator.random)
 
     def genapp_last_name(self) -> str:
-        return datasets.random_surname(self.random)
+        return datasets.random_surname(self.generator.random)
 
     def genapp_postcode(self) -> str:
-        return datasets.random_postcode(self.random)
+        return datasets.random_postcode(self.generator.random)
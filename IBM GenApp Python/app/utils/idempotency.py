@@ -0,0 +1,264 @@
+"""``Idempotency-Key`` support for ``POST /api/*``.
+
+The first request with a key inserts a pending row into ``idempotency_keys``
+and runs normally; its response (status, headers, body) is stored on the row
+for ``GENAPP_IDEMPOTENCY_TTL_S`` seconds. A repeat with the same key and the
+same request is answered from that row without calling the route, so no
+customer or policy number is allocated twice. A repeat that arrives while the
+first is still running waits for it (in-process via an event, across
+processes by polling the row) for up to ``GENAPP_IDEMPOTENCY_WAIT_S``.
+
+Server errors (5xx) are not stored: the key is released so the client can
+retry. Reusing a key for a different request is rejected with 422. The
+``Accept`` header is not part of the request: a successful response is stored
+in the format the first request negotiated and re-encoded on replay if the
+repeat asks for the other one (JSON or MessagePack), so a retry always gets
+the representation it asked for.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, UTC
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from app.api import responses
+from app.db import models
+from app.db.session import engine, insert_ignore
+from app.utils.metrics import registry
+
+IDEMPOTENCY_TTL = float(os.getenv("GENAPP_IDEMPOTENCY_TTL_S", "86400"))
+IDEMPOTENCY_MAX = int(os.getenv("GENAPP_IDEMPOTENCY_MAX", "100000"))
+IDEMPOTENCY_WAIT = float(os.getenv("GENAPP_IDEMPOTENCY_WAIT_S", "30"))
+PRUNE_INTERVAL = float(os.getenv("GENAPP_IDEMPOTENCY_PRUNE_S", "300"))
+
+HEADER = b"idempotency-key"
+MAX_KEY_LENGTH = 255
+_POLL = 0.05
+
+stats = {"stored": 0, "replayed": 0, "waited": 0, "conflicts": 0, "released": 0}
+
+
+def _now() -> datetime:
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+class KeyStore:
+    """Synchronous access to ``idempotency_keys``; the middleware calls it through the threadpool."""
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+
+    def claim(self, key: str, request_hash: str, ttl: float = IDEMPOTENCY_TTL) -> dict | None:
+        """Insert a pending row; returns None if this caller owns the key, else the existing row."""
+        now = _now()
+        table = models.IdempotencyKey.__table__
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(delete(table).where(table.c.key == key, table.c.expires_at < now))
+                inserted = conn.execute(
+                    insert_ignore(table, conn.dialect.name).values(
+                        key=key, request_hash=request_hash, created_at=now, expires_at=now + timedelta(seconds=ttl)
+                    )
+                ).rowcount
+                if inserted:
+                    return None
+                return dict(conn.execute(select(table).where(table.c.key == key)).mappings().one())
+        except IntegrityError:
+            # dialects without an insert-or-ignore: the key is taken (or was released meanwhile)
+            return self.fetch(key) or self.claim(key, request_hash, ttl)
+
+    def fetch(self, key: str) -> dict | None:
+        table = models.IdempotencyKey.__table__
+        with self.engine.connect() as conn:
+            row = conn.execute(select(table).where(table.c.key == key)).mappings().first()
+        return dict(row) if row else None
+
+    def complete(self, key: str, status: int, headers: list[tuple[bytes, bytes]], body: bytes) -> None:
+        table = models.IdempotencyKey.__table__
+        encoded = json.dumps([[k.decode("latin-1"), v.decode("latin-1")] for k, v in headers])
+        with self.engine.begin() as conn:
+            conn.execute(update(table).where(table.c.key == key).values(status_code=status, headers=encoded, body=body))
+
+    def release(self, key: str) -> None:
+        table = models.IdempotencyKey.__table__
+        with self.engine.begin() as conn:
+            conn.execute(delete(table).where(table.c.key == key, table.c.status_code.is_(None)))
+
+    def prune(self, max_rows: int = IDEMPOTENCY_MAX) -> int:
+        """Drop expired rows, then the oldest completed ones beyond ``max_rows``."""
+        table = models.IdempotencyKey.__table__
+        with self.engine.begin() as conn:
+            removed = conn.execute(delete(table).where(table.c.expires_at < _now())).rowcount
+            excess = (conn.execute(select(func.count()).select_from(table)).scalar() or 0) - max_rows
+            if excess > 0:
+                oldest = (
+                    select(table.c.key)
+                    .where(table.c.status_code.is_not(None))
+                    .order_by(table.c.created_at)
+                    .limit(excess)
+                )
+                removed += conn.execute(delete(table).where(table.c.key.in_(oldest))).rowcount
+        return removed
+
+
+key_store = KeyStore(engine)
+
+
+def _header(scope, name: bytes) -> str | None:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    return b"".join(chunks)
+
+
+async def _send_json(send, status: int, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _replay(send, row: dict, accept: str | None = None) -> None:
+    headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in json.loads(row["headers"] or "[]")]
+    body = row["body"] or b""
+    if row["status_code"] < 400:  # error responses stay JSON
+        content_type = next((v.decode("latin-1") for k, v in headers if k == b"content-type"), None)
+        recoded = responses.recode(body, content_type, responses.negotiate(accept))
+        if recoded is not None:
+            body, media_type = recoded
+            headers = [(k, v) for k, v in headers if k not in (b"content-type", b"content-length")]
+            headers += [(b"content-type", media_type.encode()), (b"content-length", str(len(body)).encode())]
+    headers.append((b"idempotent-replayed", b"true"))
+    await send({"type": "http.response.start", "status": row["status_code"], "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+    stats["replayed"] += 1
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app, store: KeyStore | None = None) -> None:
+        self.app = app
+        self.store = store or key_store
+        # keys whose first request runs in this process -> set when it has finished
+        self._inflight: dict[str, asyncio.Event] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+        key = _header(scope, HEADER)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, f"Idempotency-Key muss 1 bis {MAX_KEY_LENGTH} Zeichen lang sein")
+            return
+
+        body = await _read_body(receive)
+        digest = hashlib.sha256(
+            b"\0".join([scope["path"].encode(), scope.get("query_string", b""), body])
+        ).hexdigest()
+
+        existing = await run_in_threadpool(self.store.claim, key, digest)
+        if existing is None:
+            await self._run_first(scope, body, receive, send, key)
+            return
+        if existing["request_hash"] != digest:
+            stats["conflicts"] += 1
+            await _send_json(send, 422, "Idempotency-Key wurde bereits für eine andere Anfrage verwendet")
+            return
+        if existing["status_code"] is None:
+            stats["waited"] += 1
+            existing = await self._wait_for(key)
+            if existing is None:
+                # the first request failed and released the key: run this one as the first
+                await self.__call__(scope, _replay_body(body, receive), send)
+                return
+            if existing["status_code"] is None:
+                await _send_json(send, 409, "Anfrage mit diesem Idempotency-Key wird noch verarbeitet")
+                return
+        await _replay(send, existing, _header(scope, b"accept"))
+
+    async def _wait_for(self, key: str) -> dict | None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + IDEMPOTENCY_WAIT
+        while True:
+            done = self._inflight.get(key)
+            remaining = deadline - loop.time()
+            if done is not None and remaining > 0:
+                try:
+                    await asyncio.wait_for(done.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+            elif remaining > 0:
+                await asyncio.sleep(_POLL)  # first request runs in another process
+            row = await run_in_threadpool(self.store.fetch, key)
+            if row is None or row["status_code"] is not None or loop.time() >= deadline:
+                return row
+
+    async def _run_first(self, scope, body: bytes, receive, send, key: str) -> None:
+        done = self._inflight[key] = asyncio.Event()
+        status = 500
+        headers: list[tuple[bytes, bytes]] = []
+        chunks: list[bytes] = []
+
+        async def capture(message):
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, _replay_body(body, receive), capture)
+        finally:
+            try:
+                if status < 500:
+                    await run_in_threadpool(self.store.complete, key, status, headers, b"".join(chunks))
+                    stats["stored"] += 1
+                else:
+                    await run_in_threadpool(self.store.release, key)
+                    stats["released"] += 1
+            finally:
+                self._inflight.pop(key, None)
+                done.set()
+
+
+def _replay_body(body: bytes, receive):
+    """Hand the already-read body to the app again, then pass through (disconnect) messages."""
+    sent = False
+
+    async def replay():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
+
+
+registry.counter(
+    "genapp_idempotency_requests_total",
+    "POST requests with an Idempotency-Key by outcome",
+    lambda: [({"outcome": name}, value) for name, value in stats.items()],
+)
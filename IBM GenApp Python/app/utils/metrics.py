@@ -0,0 +1,56 @@
+"""Tiny metrics registry rendered in the Prometheus text format at ``/metrics``.
+
+Subsystems register gauges as callbacks (read at scrape time) instead of
+pushing values, so nothing is computed unless ``/metrics`` is scraped.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+logger = logging.getLogger("genapp.metrics")
+
+Sample = tuple[dict[str, str], float]
+
+
+@dataclass
+class Metric:
+    name: str
+    help: str
+    kind: str
+    collect: Callable[[], Iterable[Sample] | float | None]
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.metrics: dict[str, Metric] = {}
+
+    def gauge(self, name: str, help: str, collect: Callable[[], Iterable[Sample] | float | None]) -> None:
+        self.metrics[name] = Metric(name, help, "gauge", collect)
+
+    def counter(self, name: str, help: str, collect: Callable[[], Iterable[Sample] | float | None]) -> None:
+        self.metrics[name] = Metric(name, help, "counter", collect)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self.metrics.values():
+            try:
+                value = metric.collect()
+            except Exception:
+                logger.exception("collecting %s failed", metric.name)
+                continue
+            if value is None:
+                continue
+            samples = [({}, value)] if isinstance(value, (int, float)) else list(value)
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for labels, sample in samples:
+                label_text = ",".join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+                lines.append(f"{metric.name}{{{label_text}}} {float(sample)}" if label_text else f"{metric.name} {float(sample)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
@@ -0,0 +1,246 @@
+"""On-demand request profiling (cProfile or stack sampling) with a bounded on-disk ring."""
+from __future__ import annotations
+
+import cProfile
+import contextvars
+import functools
+import inspect
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+import types
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+from starlette.concurrency import run_in_threadpool
+
+from app.utils.admin import admin_enabled, is_admin_token
+
+PROFILE_DIR = Path(os.getenv("GENAPP_PROFILE_DIR", "profiles"))
+PROFILE_KEEP = int(os.getenv("GENAPP_PROFILE_KEEP", "50"))
+PROFILE_INTERVAL = int(os.getenv("GENAPP_PROFILE_INTERVAL_MS", "5")) / 1000.0
+MODES = ("sample", "cprofile")
+
+_NAME_RE = re.compile(r"^[\w.-]+$")
+_current: contextvars.ContextVar["ProfileSession | None"] = contextvars.ContextVar("genapp_profile", default=None)
+
+
+@dataclass
+class ProfilingState:
+    # admin toggle: profile every request without needing the X-Profile header
+    enabled: bool = os.getenv("GENAPP_PROFILE_ALL", "0") == "1"
+    mode: str = os.getenv("GENAPP_PROFILE_MODE", "sample")
+
+
+state = ProfilingState()
+
+
+class ProfileSession:
+    def __init__(self, mode: str) -> None:
+        self.mode = mode
+        self.profiler = cProfile.Profile() if mode == "cprofile" else None
+        self.stacks: Counter[str] = Counter()
+        self._threads: set[int] = set()
+        self._stop = threading.Event()
+        self._sampler: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._threads.add(threading.get_ident())
+        if self.mode == "sample":
+            self._sampler = threading.Thread(target=self._sample_loop, name="genapp-profiler", daemon=True)
+            self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    def run(self, fn, *args, **kwargs):
+        # executed in the worker thread that runs a sync endpoint
+        ident = threading.get_ident()
+        self._threads.add(ident)
+        if self.profiler is not None:
+            self.profiler.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            if self.profiler is not None:
+                self.profiler.disable()
+            self._threads.discard(ident)
+
+    async def run_async(self, coro):
+        # cProfile is enabled only while this coroutine runs, not while other tasks use the loop
+        if self.profiler is None:
+            return await coro  # the loop thread is sampled from `start` on
+        return await _profiled(coro, self.profiler)
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(PROFILE_INTERVAL):
+            frames = sys._current_frames()
+            for ident in list(self._threads):
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.stacks[_collapse(frame)] += 1
+
+
+@types.coroutine
+def _profiled(coro, profiler: cProfile.Profile):
+    """Step ``coro`` by hand, enabling ``profiler`` for each step and disabling it at every suspension."""
+    value, error = None, None
+    while True:
+        profiler.enable()
+        try:
+            yielded = coro.send(value) if error is None else coro.throw(error)
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            profiler.disable()
+        try:
+            value, error = (yield yielded), None
+        except BaseException as exc:  # noqa: BLE001 - cancellation too goes back into the coroutine
+            value, error = None, exc
+
+
+def _collapse(frame) -> str:
+    parts: list[str] = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+class ProfileStore:
+    """Keeps the newest ``keep`` profiles in ``directory`` and drops older ones."""
+
+    def __init__(self, directory: Path, keep: int) -> None:
+        self.directory = directory
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def new_name(self, method: str, path: str, mode: str) -> str:
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_")[:60] or "root"
+        ext = "prof" if mode == "cprofile" else "collapsed"
+        return f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}-{method.lower()}-{slug}.{ext}"
+
+    def save(self, name: str, session: ProfileSession) -> None:
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            target = self.directory / name
+            if session.profiler is not None:
+                session.profiler.dump_stats(str(target))
+            else:
+                with target.open("w", encoding="utf-8") as fh:
+                    for stack, count in session.stacks.most_common():
+                        fh.write(f"{stack} {count}\n")
+            self._prune()
+
+    def list(self) -> list[dict]:
+        if not self.directory.exists():
+            return []
+        entries = []
+        for path in self.directory.iterdir():
+            if path.is_file() and _NAME_RE.match(path.name):
+                stat = path.stat()
+                entries.append({"name": path.name, "size": stat.st_size, "created": stat.st_mtime})
+        return sorted(entries, key=lambda e: e["created"], reverse=True)
+
+    def path_for(self, name: str) -> Path | None:
+        if not _NAME_RE.match(name):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+    def _prune(self) -> None:
+        for entry in self.list()[self.keep:]:
+            try:
+                (self.directory / entry["name"]).unlink()
+            except OSError:
+                pass
+
+
+store = ProfileStore(PROFILE_DIR, PROFILE_KEEP)
+
+
+def instrument(endpoint):
+    """Wrap an endpoint so an active profile session follows it into the threadpool or coroutine.
+
+    For coroutine endpoints only the handler itself is profiled; the body of a
+    streaming response runs after it returns and is covered by sampling only.
+    """
+    if inspect.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            session = _current.get()
+            if session is None:
+                return await endpoint(*args, **kwargs)
+            return await session.run_async(endpoint(*args, **kwargs))
+
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        session = _current.get()
+        if session is None:
+            return endpoint(*args, **kwargs)
+        return session.run(endpoint, *args, **kwargs)
+
+    return wrapper
+
+
+def _requested_mode(scope) -> str | None:
+    if not (state.enabled or admin_enabled()):
+        return None
+    if scope["path"].startswith("/api/admin/"):
+        return None
+    requested = token = None
+    for key, value in scope["headers"]:
+        if key == b"x-profile":
+            requested = value.decode("latin-1").strip().lower()
+        elif key == b"x-admin-token":
+            token = value.decode("latin-1")
+    if requested is not None and is_admin_token(token):
+        return requested if requested in MODES else state.mode
+    if state.enabled:
+        return state.mode
+    return None
+
+
+class ProfilingMiddleware:
+    """Profiles a request when an authorised ``X-Profile`` header or the admin toggle is set."""
+
+    def __init__(self, app, profile_store: ProfileStore | None = None) -> None:
+        self.app = app
+        self.store = profile_store or store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        mode = _requested_mode(scope)
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        name = self.store.new_name(scope["method"], scope["path"], mode)
+
+        async def send_with_header(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-profile-id", name.encode())]
+            await send(message)
+
+        session = ProfileSession(mode)
+        reset = _current.set(session)
+        session.start()
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            session.stop()
+            _current.reset(reset)
+            await run_in_threadpool(self.store.save, name, session)
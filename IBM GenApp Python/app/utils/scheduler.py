@@ -0,0 +1,99 @@
+"""Minimal in-process scheduler for periodic maintenance jobs.
+
+Each task runs on its own daemon thread; a failing run is logged and retried
+at the next interval. The app starts and stops the scheduler in its
+lifespan, scripts can call `run_now` directly.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from app.utils.metrics import registry
+
+logger = logging.getLogger("genapp.scheduler")
+
+
+@dataclass
+class PeriodicTask:
+    name: str
+    interval: float
+    fn: Callable[[], object]
+    run_at_start: bool = True
+    runs: int = 0
+    failures: int = 0
+    last_run: float | None = None
+    last_duration: float = 0.0
+    last_error: str | None = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def run_now(self) -> None:
+        with self._lock:
+            start = time.perf_counter()
+            try:
+                self.fn()
+            except Exception as exc:
+                self.failures += 1
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                logger.exception("scheduled task %s failed", self.name)
+            else:
+                self.last_error = None
+            finally:
+                self.runs += 1
+                self.last_run = time.time()
+                self.last_duration = time.perf_counter() - start
+
+
+class Scheduler:
+    def __init__(self) -> None:
+        self.tasks: dict[str, PeriodicTask] = {}
+        # False in all but one worker process of `app.serve`, so maintenance runs once per host
+        self.enabled = True
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def add(self, name: str, interval: float, fn: Callable[[], object], *, run_at_start: bool = True) -> PeriodicTask:
+        task = PeriodicTask(name, interval, fn, run_at_start)
+        self.tasks[name] = task
+        return task
+
+    def _loop(self, task: PeriodicTask) -> None:
+        if task.run_at_start:
+            task.run_now()
+        while not self._stop.wait(task.interval):
+            task.run_now()
+
+    def start(self) -> None:
+        if self._threads or not self.enabled:
+            return
+        self._stop.clear()
+        for task in self.tasks.values():
+            thread = threading.Thread(target=self._loop, args=(task,), name=f"genapp-{task.name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+
+    def run_now(self, name: str) -> PeriodicTask:
+        task = self.tasks[name]
+        task.run_now()
+        return task
+
+
+scheduler = Scheduler()
+
+
+def _task_samples(attr: str):
+    return [({"task": task.name}, getattr(task, attr)) for task in scheduler.tasks.values()]
+
+
+registry.counter("genapp_task_runs_total", "Runs of scheduled maintenance tasks", lambda: _task_samples("runs"))
+registry.counter("genapp_task_failures_total", "Failed runs of scheduled maintenance tasks", lambda: _task_samples("failures"))
+registry.gauge("genapp_task_last_duration_seconds", "Duration of the last run per task", lambda: _task_samples("last_duration"))
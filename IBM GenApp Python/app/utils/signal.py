@@ -0,0 +1,49 @@
+"""Wake coroutines from any thread (commit hooks run on worker threads)."""
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Callable
+
+
+class Signal:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._waiters: set[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    def notify(self) -> None:
+        with self._lock:
+            waiters = list(self._waiters)
+        for loop, ready in waiters:
+            try:
+                loop.call_soon_threadsafe(ready.set)
+            except RuntimeError:  # loop already closed
+                pass
+
+    async def wait(self, ready: Callable[[], bool], timeout: float) -> bool:
+        """Wait until ``ready()`` holds after a `notify`, at most ``timeout`` seconds; returns ``ready()``."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.add(waiter)
+        try:
+            # registered before checking, so a notify in between is not lost
+            if ready():
+                return True
+            deadline = waiter[0].time() + timeout
+            while not ready():
+                remaining = deadline - waiter[0].time()
+                if remaining <= 0:
+                    return False
+                try:
+                    await asyncio.wait_for(waiter[1].wait(), remaining)
+                except asyncio.TimeoutError:
+                    return ready()
+                waiter[1].clear()
+            return True
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+    def waiting(self) -> int:
+        with self._lock:
+            return len(self._waiters)
@@ -0,0 +1,110 @@
+"""Fingerprinted, precompressed static assets.
+
+`build` (``python scripts/build_static.py``) copies every file of
+``app/static`` to ``app/static/dist/<name>.<hash><ext>`` and writes ``.gz``
+and, with brotli installed, ``.br`` variants next to it, plus a
+``manifest.json`` mapping the source name to the fingerprinted one. Templates
+link assets through ``static_url("styles.css")``, which resolves the manifest
+and falls back to the plain file when nothing has been built.
+
+`StaticAssets` serves fingerprinted files with a one-year ``immutable``
+cache lifetime and the precompressed variant matching ``Accept-Encoding``;
+all other files are revalidated (``no-cache`` plus ETag).
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import shutil
+from pathlib import Path
+
+from fastapi.staticfiles import StaticFiles
+
+from app.utils.compression import brotli, choose_encoding
+
+STATIC_DIR = Path("app/static")
+DIST = "dist"
+MANIFEST = "manifest.json"
+URL_PREFIX = "/static/"
+HASH_LENGTH = 10
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+# variants written by `build`, in preference order
+VARIANTS = (("br", ".br"), ("gzip", ".gz"))
+PRECOMPRESS = {".css", ".js", ".svg", ".html", ".json", ".txt", ".map"}
+
+
+def load_manifest(directory: Path = STATIC_DIR) -> dict[str, str]:
+    path = directory / DIST / MANIFEST
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+_manifest = load_manifest()
+
+
+def static_url(name: str) -> str:
+    """URL of static file ``name``: its fingerprinted copy when built, else the file itself."""
+    built = _manifest.get(name)
+    return f"{URL_PREFIX}{DIST}/{built}" if built else f"{URL_PREFIX}{name}"
+
+
+def build(directory: Path = STATIC_DIR, *, brotli_quality: int = 11) -> dict[str, str]:
+    """Fingerprint and precompress all files under ``directory``; returns the new manifest."""
+    target = directory / DIST
+    if target.exists():
+        shutil.rmtree(target)
+    target.mkdir(parents=True)
+    manifest: dict[str, str] = {}
+    for source in sorted(p for p in directory.rglob("*") if p.is_file() and DIST not in p.relative_to(directory).parts):
+        data = source.read_bytes()
+        relative = source.relative_to(directory)
+        digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+        built = relative.with_name(f"{relative.stem}.{digest}{relative.suffix}")
+        out = target / built
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_bytes(data)
+        if source.suffix in PRECOMPRESS:
+            # mtime=0: identical input gives byte-identical output
+            out.with_name(out.name + ".gz").write_bytes(gzip.compress(data, 9, mtime=0))
+            if brotli is not None:
+                out.with_name(out.name + ".br").write_bytes(brotli.compress(data, quality=brotli_quality))
+        manifest[relative.as_posix()] = built.as_posix()
+    (target / MANIFEST).write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    return manifest
+
+
+class StaticAssets(StaticFiles):
+    """`StaticFiles` with cache headers and precompressed variants for the built assets."""
+
+    def __init__(self, *, directory: Path | str = STATIC_DIR, **kwargs) -> None:
+        super().__init__(directory=directory, **kwargs)
+        self.immutable = {f"{DIST}/{built}" for built in load_manifest(Path(directory)).values()}
+
+    async def get_response(self, path: str, scope):
+        relative = Path(path).as_posix()
+        if relative not in self.immutable:
+            response = await super().get_response(path, scope)
+            response.headers.setdefault("cache-control", REVALIDATE)
+            return response
+        accept = b""
+        for key, value in scope.get("headers", []):
+            if key == b"accept-encoding":
+                accept = value
+        available = tuple(name for name, suffix in VARIANTS if self.lookup_path(path + suffix)[1] is not None)
+        encoding = choose_encoding(accept.decode("latin-1"), available) if accept and available else None
+        if encoding is None:
+            response = await super().get_response(path, scope)
+        else:
+            response = await super().get_response(path + dict(VARIANTS)[encoding], scope)
+            if response.status_code == 200:
+                response.headers["content-encoding"] = encoding
+                media_type = mimetypes.guess_type(relative)[0]
+                if media_type:
+                    response.headers["content-type"] = media_type + ("; charset=utf-8" if media_type.startswith("text/") else "")
+        response.headers["cache-control"] = IMMUTABLE
+        response.headers["vary"] = "Accept-Encoding"
+        return response
@@ -0,0 +1,142 @@
+"""
+Concurrency scaling of the sync JSON API (threadpool + `get_db`) vs. the async
+stack (`GENAPP_ASYNC_API`, AsyncSession on aiosqlite).
+
+Both app variants run in-process on the same seeded SQLite file; for every
+concurrency level a fixed number of requests is fired (read mix, optionally
+with claim updates) and throughput plus latency percentiles are reported.
+
+Usage:
+  python scripts/bench_async.py --size 10000 --concurrency 1,8,32,128 --requests 2000
+  python scripts/bench_async.py --write-ratio 0.2 --threadpool 80 --output bench/async.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import httpx  # noqa: E402
+
+import benchlib  # noqa: E402
+import generate_portfolio  # noqa: E402
+
+MODES = ("sync", "async")
+
+
+def _prepare_db(db_path: Path, size: int, reseed: bool) -> None:
+    if reseed:
+        benchlib.remove_sqlite(db_path)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.chdir(BASE_DIR)  # templates/static are resolved relative to the project folder
+    from app.db.migrations import init_db
+    from app.db.session import engine
+
+    init_db(engine)
+    if not reseed and db_path.stat().st_size > 64 * 1024:
+        return
+    start = time.perf_counter()
+    generate_portfolio.generate(engine, generate_portfolio.GeneratorConfig(customers=size, claim_frequency=0.5))
+    print(f"Seeded {size} customers into {db_path} in {time.perf_counter() - start:.1f}s")
+
+
+def _request(rng: random.Random, size: int, write_ratio: float) -> tuple[str, str, dict | None]:
+    if rng.random() < write_ratio:
+        return "PUT", f"/api/claims/{rng.randint(1, max(size // 2, 1))}", {"paid": rng.randint(0, 5000)}
+    pick = rng.random()
+    if pick < 0.4:
+        return "GET", f"/api/customers/{rng.randint(1, size)}", None
+    if pick < 0.8:
+        return "GET", f"/api/policies?limit=50&offset={rng.randint(0, max(size - 50, 0))}", None
+    return "GET", f"/api/claims?policy_id={rng.randint(1, size)}", None
+
+
+async def _run_level(client: httpx.AsyncClient, concurrency: int, total: int, size: int, write_ratio: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    plan = [_request(rng, size, write_ratio) for _ in range(total)]
+    latencies: list[float] = []
+    errors = 0
+    cursor = iter(plan)
+
+    async def worker() -> None:
+        nonlocal errors
+        for method, url, body in cursor:
+            start = time.perf_counter()
+            resp = await client.request(method, url, json=body)
+            latencies.append((time.perf_counter() - start) * 1000.0)
+            if resp.status_code >= 500:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+    return {"rps": total / wall if wall else 0.0, "errors": errors, "latency_ms": benchlib.summarize(latencies)}
+
+
+async def run(args: argparse.Namespace) -> dict:
+    import anyio.to_thread
+
+    from app.main import create_app
+
+    if args.threadpool:
+        anyio.to_thread.current_default_thread_limiter().total_tokens = args.threadpool
+    levels = [int(c) for c in args.concurrency.split(",") if c]
+    results: dict[str, dict[str, dict]] = {}
+    for mode in MODES:
+        app = create_app(async_api=mode == "async")
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        async with httpx.AsyncClient(transport=transport, base_url="http://genapp.local") as client:
+            await _run_level(client, 4, min(args.requests, 200), args.size, 0.0, args.seed)  # warm-up
+            for level in levels:
+                data = await _run_level(client, level, args.requests, args.size, args.write_ratio, args.seed + level)
+                results.setdefault(mode, {})[str(level)] = data
+                lat = data["latency_ms"]
+                print(
+                    f"{mode:5} c={level:<4} {data['rps']:>8.1f} req/s  p50={lat['p50']:>7.1f}ms "
+                    f"p95={lat['p95']:>7.1f}ms p99={lat['p99']:>7.1f}ms errors={data['errors']}"
+                )
+    return {
+        "meta": benchlib.run_metadata(
+            size=args.size,
+            requests=args.requests,
+            concurrency=levels,
+            write_ratio=args.write_ratio,
+            threadpool=args.threadpool,
+            seed=args.seed,
+        ),
+        "results": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=10_000, help="Customers in the seeded dataset")
+    parser.add_argument("--concurrency", default="1,8,32,128", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per concurrency level and mode")
+    parser.add_argument("--write-ratio", type=float, default=0.0, help="Share of PUT /api/claims requests")
+    parser.add_argument("--threadpool", type=int, default=0, help="Override the AnyIO threadpool size (default 40)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", default=str(BASE_DIR / "bench" / "bench_async.db"))
+    parser.add_argument("--reseed", action="store_true")
+    parser.add_argument("--output", help="Write JSON results to this path")
+    args = parser.parse_args(argv)
+
+    db_path = Path(args.db).resolve()
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    _prepare_db(db_path, args.size, args.reseed or not db_path.exists())
+    result = asyncio.run(run(args))
+    if args.output:
+        print(f"Results written to {benchlib.write_json(args.output, result)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
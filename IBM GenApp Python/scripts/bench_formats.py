@@ -0,0 +1,116 @@
+"""
+Payload size and encode/decode time: JSON vs. MessagePack for the bulk lists.
+
+Builds the row payloads of `/api/policies/detailed`, `/api/claims` and
+`/api/events` from a seeded SQLite file (same code path as the routes) and
+times encoding and decoding with the stdlib json module, orjson and msgpack
+(when installed). Sizes are reported raw and gzip-compressed.
+
+Usage:
+  python scripts/bench_formats.py --size 10000 --rows 1000,10000 --repeat 20
+  python scripts/bench_formats.py --output bench/formats.json
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import benchlib  # noqa: E402
+import generate_portfolio  # noqa: E402
+
+
+def _prepare_db(db_path: Path, size: int) -> None:
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    from app.db.migrations import init_db
+    from app.db.session import engine
+
+    fresh = not db_path.exists()
+    init_db(engine)
+    if fresh or db_path.stat().st_size <= 64 * 1024:
+        generate_portfolio.generate(engine, generate_portfolio.GeneratorConfig(customers=size, claim_frequency=0.5))
+
+
+def _codecs() -> dict:
+    from app.api import responses
+
+    def std_dumps(content):
+        return json.dumps(content, default=responses._default, separators=(",", ":")).encode()
+
+    codecs = {"json": (std_dumps, json.loads)}
+    if responses.BACKEND != "json":
+        codecs[responses.BACKEND] = (responses.dumps, responses._json_decoder.loads)
+    if responses.msgpack is not None:
+        codecs["msgpack"] = (responses.packb, responses.unpackb)
+    return codecs
+
+
+def _time(fn, arg, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000.0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=10_000, help="Customers in the seeded dataset")
+    parser.add_argument("--rows", default="1000,10000", help="Comma-separated list lengths")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per measurement (best is reported)")
+    parser.add_argument("--db", default=str(BASE_DIR / "bench" / "bench_formats.db"))
+    parser.add_argument("--output", help="Write JSON results to this path")
+    args = parser.parse_args(argv)
+
+    db_path = Path(args.db).resolve()
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    _prepare_db(db_path, args.size)
+
+    from app.db.session import SessionLocal
+    from app.services import claims, events, policies
+
+    sources = {
+        "policies_detailed": lambda db, n: policies.list_policies_detailed(db, limit=n),
+        "claims": lambda db, n: claims.list_claims(db, limit=n, rows=True),
+        "events": lambda db, n: events.list_events(db, limit=n, rows=True),
+    }
+    codecs = _codecs()
+    results = []
+    with SessionLocal() as db:
+        for rows in (int(item) for item in args.rows.split(",") if item.strip()):
+            for name, load in sources.items():
+                payload = load(db, rows)
+                for codec, (encode, decode) in codecs.items():
+                    data = encode(payload)
+                    row = {
+                        "payload": name,
+                        "rows": len(payload),
+                        "codec": codec,
+                        "bytes": len(data),
+                        "gzip_bytes": len(gzip.compress(data, 6)),
+                        "encode_ms": _time(encode, payload, args.repeat),
+                        "decode_ms": _time(decode, data, args.repeat),
+                    }
+                    results.append(row)
+                    print(
+                        f"{name:18} {row['rows']:>7} {codec:8} {row['bytes']:>11,} B  gz {row['gzip_bytes']:>10,} B  "
+                        f"enc {row['encode_ms']:>8.2f} ms  dec {row['decode_ms']:>8.2f} ms"
+                    )
+
+    result = {"meta": benchlib.run_metadata(size=args.size, rows=args.rows, repeat=args.repeat), "results": results}
+    if args.output:
+        print(f"Results written to {benchlib.write_json(args.output, result)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,200 @@
+"""
+Microbenchmarks for the hot service-layer functions in `app/services`.
+
+Each dataset size gets its own SQLite file (seeded once with Core bulk inserts
+and reused on later runs). Results are stored as JSON; with --baseline the run
+is compared against an earlier result and regressions beyond --tolerance make
+the script exit with status 1.
+
+Usage:
+  python scripts/bench_services.py --sizes 10000 --save-baseline bench/services_baseline.json
+  python scripts/bench_services.py --sizes 10000,100000 --baseline bench/services_baseline.json --tolerance 0.2
+  python scripts/bench_services.py --sizes 1000000 --only list_events,get_policy_detail
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from sqlalchemy import create_engine, func, insert, select  # noqa: E402
+from sqlalchemy.orm import Session, sessionmaker  # noqa: E402
+
+import benchlib  # noqa: E402
+import generate_portfolio  # noqa: E402
+from app.db import counts, models  # noqa: E402
+from app.db.migrations import init_db  # noqa: E402
+from app.schemas.claims import ClaimUpdate  # noqa: E402
+from app.schemas.customers import CustomerCreate  # noqa: E402
+from app.schemas.policies import MotorPolicyCreate  # noqa: E402
+from app.services import claims as claim_service  # noqa: E402
+from app.services import customers as customer_service  # noqa: E402
+from app.services import events as event_service  # noqa: E402
+from app.services import policies as policy_service  # noqa: E402
+from app.utils import datasets  # noqa: E402
+
+CHUNK = 10_000
+
+
+def _seed(engine, size: int, seed: int = 42) -> None:
+    config = generate_portfolio.GeneratorConfig(
+        customers=size,
+        seed=seed,
+        policies_per_customer=1.0,
+        mix={"M": 0.25, "H": 0.25, "E": 0.25, "C": 0.25},
+        claim_frequency=0.5,
+    )
+    generate_portfolio.generate(engine, config)
+    # the event log is not part of the portfolio generator
+    rng = random.Random(seed)
+    now = datetime.now()
+    with engine.begin() as conn:
+        for start in range(0, size, CHUNK):
+            conn.execute(
+                insert(models.Event.__table__),
+                [
+                    {
+                        "created_at": now - timedelta(seconds=rng.randint(0, 365 * 86400)),
+                        "source": rng.choice(["customers", "policies", "claims"]),
+                        "level": "INFO",
+                        "message": f"seed event {i}",
+                    }
+                    for i in range(start, min(start + CHUNK, size))
+                ],
+            )
+
+
+def _open_dataset(size: int, directory: Path, reseed: bool):
+    db_path = directory / f"bench_services_{size}.db"
+    if reseed and db_path.exists():
+        db_path.unlink()
+    fresh = not db_path.exists()
+    directory.mkdir(parents=True, exist_ok=True)
+    engine = create_engine(f"sqlite:///{db_path}", future=True)
+    init_db(engine)
+    if fresh:
+        start = time.perf_counter()
+        _seed(engine, size)
+        init_db(engine)
+        counts.reconcile(engine)
+        print(f"Seeded {size} rows per table into {db_path} in {time.perf_counter() - start:.1f}s")
+    with engine.connect() as conn:
+        claims = conn.execute(select(func.max(models.Claim.id))).scalar() or 1
+    return engine, claims
+
+
+def _cases(size: int, claims: int, rng: random.Random) -> dict[str, tuple[Callable[[Session], object], bool]]:
+    """name -> (call, mutates)."""
+    postcode = datasets.postcodes()[0][:3]
+
+    def create_customer(db: Session):
+        return customer_service.create_customer(
+            db, CustomerCreate(first_name="BENCH", last_name="RUNNER", postcode=datasets.random_postcode(rng)[:8])
+        )
+
+    def create_policy_motor(db: Session):
+        return policy_service.create_policy_motor(
+            db,
+            MotorPolicyCreate(customer_id=rng.randint(1, size), make="VW", model="BEETLE", reg_number="A567WWR", premium=700),
+        )
+
+    return {
+        "create_customer": (create_customer, True),
+        "create_policy_motor": (create_policy_motor, True),
+        "list_policies": (lambda db: policy_service.list_policies(db, limit=100, offset=rng.randint(0, size // 2)), False),
+        "list_policies_postcode": (lambda db: policy_service.list_policies(db, postcode=postcode, limit=100), False),
+        "list_policies_detailed": (lambda db: policy_service.list_policies_detailed(db, limit=100, offset=rng.randint(0, size // 2)), False),
+        "get_policy_detail": (lambda db: policy_service.get_policy_detail(db, rng.randint(1, size)), False),
+        "list_events": (lambda db: event_service.list_events(db, limit=100), False),
+        "update_claim": (lambda db: claim_service.update_claim(db, rng.randint(1, claims), ClaimUpdate(paid=rng.randint(0, 5000))), True),
+    }
+
+
+def _measure(factory: sessionmaker, call: Callable[[Session], object], repeat: int, warmup: int) -> dict:
+    timings: list[float] = []
+    for i in range(warmup + repeat):
+        with factory() as db:
+            start = time.perf_counter_ns()
+            call(db)
+            elapsed = (time.perf_counter_ns() - start) / 1000.0
+        if i >= warmup:
+            timings.append(elapsed)
+    summary = benchlib.summarize(timings)
+    summary["ops_per_s"] = 1e6 / summary["p50"] if summary["p50"] else 0.0
+    return summary
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[dict]:
+    rows = []
+    for case, per_size in results.items():
+        for size, current in per_size.items():
+            previous = baseline.get("results", {}).get(case, {}).get(size)
+            if not previous:
+                rows.append({"case": case, "size": size, "status": "new"})
+                continue
+            ratio = current["p50"] / previous["p50"] if previous["p50"] else 1.0
+            status = "REGRESSION" if ratio > 1 + tolerance else ("faster" if ratio < 1 - tolerance else "ok")
+            rows.append({"case": case, "size": size, "ratio": ratio, "status": status})
+    return rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000", help="Comma-separated dataset sizes (rows per table)")
+    parser.add_argument("--repeat", type=int, default=50, help="Measured calls per case")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--only", help="Comma-separated subset of cases")
+    parser.add_argument("--data-dir", default=str(BASE_DIR / "bench"), help="Where the seeded SQLite files live")
+    parser.add_argument("--reseed", action="store_true", help="Recreate datasets even if the files exist")
+    parser.add_argument("--output", help="Write JSON results to this path")
+    parser.add_argument("--baseline", help="Compare against this JSON result")
+    parser.add_argument("--save-baseline", help="Store this run as baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown vs. baseline (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    only = set(args.only.split(",")) if args.only else None
+    results: dict[str, dict[str, dict]] = {}
+    for size in sizes:
+        engine, claims = _open_dataset(size, Path(args.data_dir), args.reseed)
+        factory = sessionmaker(bind=engine, autoflush=False, future=True)
+        rng = random.Random(size)
+        for case, (call, mutates) in _cases(size, claims, rng).items():
+            if only and case not in only:
+                continue
+            summary = _measure(factory, call, args.repeat, args.warmup)
+            summary["mutates"] = mutates
+            results.setdefault(case, {})[str(size)] = summary
+            print(f"{case:26} {size:>9} p50={summary['p50']:>10.1f}us p95={summary['p95']:>10.1f}us {summary['ops_per_s']:>9.0f} ops/s")
+        engine.dispose()
+
+    payload = {
+        "meta": benchlib.run_metadata(sizes=sizes, repeat=args.repeat, warmup=args.warmup),
+        "unit": "us",
+        "results": results,
+    }
+    exit_code = 0
+    if args.baseline:
+        rows = compare(results, benchlib.read_json(args.baseline), args.tolerance)
+        payload["comparison"] = {"baseline": args.baseline, "tolerance": args.tolerance, "rows": rows}
+        for row in rows:
+            ratio = f"{row['ratio']:.2f}x" if "ratio" in row else "-"
+            print(f"{row['case']:26} {row['size']:>9} {ratio:>8} {row['status']}")
+        if any(row["status"] == "REGRESSION" for row in rows):
+            exit_code = 1
+    for target in (args.output, args.save_baseline):
+        if target:
+            print(f"Results written to {benchlib.write_json(target, payload)}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
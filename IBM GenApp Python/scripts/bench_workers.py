@@ -0,0 +1,142 @@
+"""
+Throughput scaling of `app.serve` across worker processes.
+
+For every worker count a server is started on a fresh SQLite file (``python -m
+app.serve``), warmed up, and loaded with the WSim-style mix from
+`load_test.py`. The load comes from several client processes so the generator
+is not the bottleneck; their results are added up. Reported per worker count:
+req/s, speed-up against the first count, errors and latency percentiles.
+
+Usage:
+  python scripts/bench_workers.py --workers 1,2,4,8 --users 64 --clients 4 --duration 20
+  python scripts/bench_workers.py --scenario policy_inquiry=1 --output bench/workers.json
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import benchlib  # noqa: E402
+
+
+def _wait_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/metrics", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"server at {base_url} did not come up")
+
+
+def _start_server(workers: int, port: int, db_path: Path) -> subprocess.Popen:
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", GENAPP_WRITE_QUEUE=os.getenv("GENAPP_WRITE_QUEUE", "1"))
+    return subprocess.Popen(
+        [sys.executable, "-m", "app.serve", "--workers", str(workers), "--port", str(port), "--log-level", "warning"],
+        cwd=BASE_DIR,
+        env=env,
+    )
+
+
+def _run_clients(args: argparse.Namespace, base_url: str, out_dir: Path, label: str) -> list[dict]:
+    procs = []
+    for client in range(args.clients):
+        output = out_dir / f"{label}-{client}.json"
+        cmd = [
+            sys.executable,
+            str(BASE_DIR / "scripts" / "load_test.py"),
+            "--base-url", base_url,
+            "--users", str(max(args.users // args.clients, 1)),
+            "--duration", str(args.duration),
+            "--seed", str(args.seed + client),
+            "--output", str(output),
+        ]
+        for scenario in args.scenario or ():
+            cmd += ["--scenario", scenario]
+        procs.append((subprocess.Popen(cmd, stdout=subprocess.DEVNULL), output))
+    results = []
+    for proc, output in procs:
+        if proc.wait() != 0:
+            raise SystemExit(f"load client failed ({output.name})")
+        results.append(benchlib.read_json(output)["summary"])
+    return results
+
+
+def _combine(summaries: list[dict]) -> dict:
+    latencies = [s["endpoints"][label]["latency_ms"] for s in summaries for label in s["endpoints"]]
+
+    def worst(key: str) -> float:
+        return max((lat.get(key, 0.0) for lat in latencies), default=0.0)
+
+    return {
+        "requests": sum(s["requests"] for s in summaries),
+        "errors": sum(s["errors"] for s in summaries),
+        "rps": sum(s["rps"] for s in summaries),
+        # worst endpoint percentile over all clients
+        "p95_ms": worst("p95"),
+        "p99_ms": worst("p99"),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts")
+    parser.add_argument("--users", type=int, default=64, help="Virtual users in total")
+    parser.add_argument("--clients", type=int, default=4, help="Load generator processes")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds of load before measuring")
+    parser.add_argument("--scenario", action="append", help="Weight override passed to load_test.py (repeatable)")
+    parser.add_argument("--seed", type=int, default=4711)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="Write JSON results to this path")
+    args = parser.parse_args(argv)
+
+    counts = [int(item) for item in args.workers.split(",") if item.strip()]
+    base_url = f"http://127.0.0.1:{args.port}"
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="genapp-workers-") as tmp:
+        tmp_dir = Path(tmp)
+        for workers in counts:
+            server = _start_server(workers, args.port, tmp_dir / f"workers-{workers}.db")
+            try:
+                _wait_ready(base_url)
+                if args.warmup:
+                    warm = argparse.Namespace(**{**vars(args), "duration": args.warmup, "clients": 1})
+                    _run_clients(warm, base_url, tmp_dir, f"warmup-{workers}")
+                row = {"workers": workers, **_combine(_run_clients(args, base_url, tmp_dir, f"run-{workers}"))}
+            finally:
+                server.terminate()
+                server.wait(60)
+            row["speedup"] = row["rps"] / rows[0]["rps"] if rows and rows[0]["rps"] else 1.0
+            rows.append(row)
+            print(
+                f"workers={workers:>3}  {row['rps']:>9.1f} req/s  x{row['speedup']:.2f}  "
+                f"p95={row['p95_ms']:.1f}ms  p99={row['p99_ms']:.1f}ms  errors={row['errors']}"
+            )
+
+    result = {
+        "meta": benchlib.run_metadata(
+            workers=counts, users=args.users, clients=args.clients, duration=args.duration, cpus=os.cpu_count()
+        ),
+        "results": rows,
+    }
+    if args.output:
+        print(f"Results written to {benchlib.write_json(args.output, result)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
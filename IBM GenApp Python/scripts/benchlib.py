@@ -0,0 +1,84 @@
+"""Shared helpers for the load-test and benchmark scripts (percentiles, JSON results)."""
+from __future__ import annotations
+
+import json
+import platform
+import subprocess
+from datetime import datetime, UTC
+from pathlib import Path
+from typing import Iterable
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = (len(sorted_values) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def summarize(values: Iterable[float]) -> dict:
+    data = sorted(values)
+    if not data:
+        return {"count": 0}
+    return {
+        "count": len(data),
+        "min": data[0],
+        "mean": sum(data) / len(data),
+        "p50": percentile(data, 50),
+        "p95": percentile(data, 95),
+        "p99": percentile(data, 99),
+        "max": data[-1],
+    }
+
+
+def git_revision() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run_metadata(**params) -> dict:
+    return {
+        "timestamp": datetime.now(UTC).isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "params": params,
+    }
+
+
+def remove_sqlite(path: str | Path) -> bool:
+    """Delete a SQLite file with its WAL side files (a stale ``-wal`` must not meet a new DB); True if it existed."""
+    target = Path(path)
+    existed = target.exists()
+    for side in (target, Path(f"{target}-wal"), Path(f"{target}-shm")):
+        side.unlink(missing_ok=True)
+    return existed
+
+
+def write_json(path: str | Path, payload: dict) -> Path:
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with target.open("w", encoding="utf-8") as fh:
+        json.dump(payload, fh, indent=2, default=str)
+    return target
+
+
+def read_json(path: str | Path) -> dict:
+    with Path(path).open("r", encoding="utf-8") as fh:
+        return json.load(fh)
@@ -0,0 +1,34 @@
+"""
+Fingerprint and precompress the files in app/static.
+
+Writes app/static/dist/<name>.<hash><ext> with .gz (and .br when the brotli
+package is installed) variants plus manifest.json. Templates pick the built
+names up via static_url(); restart the app after a build.
+
+Usage:
+  python scripts/build_static.py
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from app.utils import static  # noqa: E402
+from app.utils.compression import brotli  # noqa: E402
+
+
+def main() -> int:
+    manifest = static.build(BASE_DIR / static.STATIC_DIR)
+    for name, built in manifest.items():
+        print(f"{name} -> {static.DIST}/{built}")
+    if brotli is None:
+        print("brotli not installed: only .gz variants written (pip install brotli)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -22,14 +22,14 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+import benchlib  # noqa: E402
 from app.main import init_db
 from app.db.session import engine
 
 
 def main() -> None:
     db_path = ROOT / "genapp.db"
-    if db_path.exists():
-        db_path.unlink()
+    if benchlib.remove_sqlite(db_path):
         print(f"Removed {db_path}")
 
     # Recreate schema
@@ -0,0 +1,465 @@
+"""
+Deterministic high-volume portfolio generator (customers, policies, claims).
+
+Data is produced in vectorized NumPy batches ("shards") from the WSim pools in
+`app.utils.datasets` plus Faker/`GenappProvider` address pools, and written
+with Core bulk inserts (driver-level executemany, one transaction per shard).
+Shards can be generated in parallel worker processes; the output only depends
+on --seed and --batch-size, never on --workers.
+
+Usage:
+  python scripts/generate_portfolio.py --customers 1000000 --workers 4 --db bench/portfolio.db
+  python scripts/generate_portfolio.py --customers 50000 --mix M=0.5,H=0.3,E=0.1,C=0.1 --claim-frequency 0.25
+  python scripts/generate_portfolio.py --customers 10000 --append   # add to existing DATABASE_URL data
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+POLICY_TYPES = ("M", "H", "E", "C")
+DEFAULT_MIX = {"M": 0.45, "H": 0.3, "E": 0.1, "C": 0.15}
+VEHICLES = [
+    ("FORD", "ESCORT"), ("FORD", "FIESTA"), ("VW", "BEETLE"), ("VW", "GOLF"), ("VAUXHALL", "ASTRA"),
+    ("ROVER", "MINI"), ("BMW", "320I"), ("TOYOTA", "COROLLA"), ("NISSAN", "MICRA"), ("HONDA", "CIVIC"),
+]
+COLOURS = ["BLUE", "RED", "BLACK", "WHITE", "SILVER", "GREEN", "GREY"]
+CC_BANDS = [998, 1200, 1400, 1600, 1800, 2000, 2500, 3000]
+PROPERTY_TYPES = ["HOUSE", "FLAT", "BUNGALOW", "COTTAGE", "MAISONETTE"]
+COMMERCIAL_TYPES = ["SHOP", "OFFICE", "WAREHOUSE", "FACTORY", "RESTAURANT", "HOTEL"]
+FUNDS = ["SHEPPA", "GROWTH", "BALANCED", "INCOME", "GILTS"]
+CAUSES = ["FIRE", "THEFT", "FLOOD", "STORM", "COLLISION", "SUBSIDENCE", "VANDALISM"]
+
+
+@dataclass
+class GeneratorConfig:
+    customers: int
+    seed: int = 4711
+    batch_size: int = 50_000
+    policies_per_customer: float = 1.5
+    mix: dict[str, float] = field(default_factory=lambda: dict(DEFAULT_MIX))
+    claim_frequency: float = 0.1
+    as_of: date = field(default_factory=date.today)
+
+
+@dataclass
+class Shard:
+    index: int
+    first_customer_id: int
+    size: int
+
+
+def _pick(rng: np.random.Generator, pool, n: int) -> np.ndarray:
+    values = np.asarray(pool, dtype=object)
+    return values[rng.integers(0, len(values), n)]
+
+
+def _dates(base: np.datetime64, offsets: np.ndarray) -> np.ndarray:
+    return np.datetime_as_string(base + offsets.astype("timedelta64[D]"), unit="D").astype(object)
+
+
+def _digits(rng: np.random.Generator, n: int, low: int, high: int) -> np.ndarray:
+    return rng.integers(low, high, n).astype(str).astype(object)
+
+
+def _faker_pools(seed: int, shard: int) -> dict[str, list[str]]:
+    from faker import Faker
+
+    from app.utils.faker_providers import GenappProvider
+
+    fake = Faker("en_GB")
+    fake.add_provider(GenappProvider)
+    fake.seed_instance(seed * 100_003 + shard)
+    return {
+        "house_names": [fake.street_name().upper()[:20] for _ in range(200)],
+        "addresses": [f"{fake.building_number()} {fake.street_name().upper()}"[:255] for _ in range(500)],
+        "commercial_postcodes": [fake.genapp_postcode()[:8] for _ in range(200)],
+    }
+
+
+def generate_shard(config: GeneratorConfig, shard: Shard) -> dict[str, dict[str, np.ndarray]]:
+    """Build one shard as column arrays. Policy/claim ids are shard-local (0-based)."""
+    from app.utils import datasets
+
+    rng = np.random.default_rng([config.seed, shard.index])
+    pools = _faker_pools(config.seed, shard.index)
+    n = shard.size
+    today = np.datetime64(config.as_of, "D")
+    now = np.datetime_as_string(np.datetime64(config.as_of, "us"), unit="us").replace("T", " ")
+
+    # --- customers -------------------------------------------------------
+    cust_ids = np.arange(shard.first_customer_id, shard.first_customer_id + n)
+    first = _pick(rng, [v[:10] for v in datasets.first_names()], n)
+    last = _pick(rng, [v[:20] for v in datasets.surnames()], n)
+    postcode = _pick(rng, [v[:8] for v in datasets.postcodes()], n)
+    house_name = _pick(rng, pools["house_names"], n)
+    house_name[rng.random(n) < 0.7] = None
+    email = np.char.add(
+        np.char.add(np.char.lower(first.astype(str)), "."),
+        np.char.add(np.char.lower(last.astype(str)), np.char.add(cust_ids.astype(str), "@example.com")),
+    ).astype(object)
+    customers = {
+        "id": cust_ids,
+        "customer_number": cust_ids,
+        "first_name": first,
+        "last_name": last,
+        "date_of_birth": _dates(np.datetime64("1930-01-01"), rng.integers(0, 75 * 365, n)),
+        "house_name": house_name,
+        "house_number": _digits(rng, n, 1, 400),
+        "postcode": postcode,
+        "phone_mobile": np.char.add("07", _digits(rng, n, 100_000_000, 999_999_999).astype(str)).astype(object),
+        "phone_home": np.char.add("01", _digits(rng, n, 100_000_000, 999_999_999).astype(str)).astype(object),
+        "email_address": email,
+        "created_at": np.full(n, now, dtype=object),
+    }
+    secure = {
+        "customer_number": cust_ids,
+        "customer_pass": np.full(n, "5732fec825535eeafb8fac50fee3a8aa", dtype=object),
+        "state_indicator": np.full(n, "N", dtype=object),
+        "pass_changes": np.zeros(n, dtype=np.int64),
+    }
+
+    # --- policies --------------------------------------------------------
+    per_customer = 1 + rng.poisson(max(config.policies_per_customer - 1.0, 0.0), n)
+    owner = np.repeat(np.arange(n), per_customer)
+    m = len(owner)
+    weights = np.array([config.mix.get(t, 0.0) for t in POLICY_TYPES], dtype=float)
+    ptype = np.asarray(POLICY_TYPES, dtype=object)[rng.choice(4, m, p=weights / weights.sum())]
+    issue_offset = rng.integers(0, 3 * 365, m)
+    issue = today - issue_offset.astype("timedelta64[D]")
+    term_years = rng.integers(10, 41, m)
+    expiry = np.where(
+        ptype == "E",
+        issue + (term_years * 365).astype("timedelta64[D]"),
+        issue + np.timedelta64(365, "D"),
+    )
+    policies = {
+        "local_id": np.arange(m),
+        "policy_type": ptype,
+        "customer_id": cust_ids[owner],
+        "issue_date": np.datetime_as_string(issue, unit="D").astype(object),
+        "expiry_date": np.datetime_as_string(expiry, unit="D").astype(object),
+        "broker_id": rng.integers(100, 1000, m),
+        "brokers_ref": np.char.add("BR", _digits(rng, m, 10_000, 99_999).astype(str)).astype(object),
+        "payment": rng.integers(100, 3000, m),
+        "commission": rng.integers(0, 30, m),
+        "created_at": np.full(m, now, dtype=object),
+    }
+
+    details: dict[str, dict[str, np.ndarray]] = {}
+    idx = np.flatnonzero(ptype == "M")
+    k = len(idx)
+    vehicle = rng.integers(0, len(VEHICLES), k)
+    value = rng.integers(1_000, 60_000, k)
+    accidents = rng.poisson(0.2, k)
+    details["M"] = {
+        "local_id": idx,
+        "make": np.asarray([v[0] for v in VEHICLES], dtype=object)[vehicle],
+        "model": np.asarray([v[1] for v in VEHICLES], dtype=object)[vehicle],
+        "value": value,
+        "reg_number": np.char.add(
+            np.char.add(_pick(rng, list("ABCDEFGHJKLMNPRSTVWXY"), k).astype(str), _digits(rng, k, 100, 999).astype(str)),
+            _pick(rng, ["WWR", "ABC", "XYZ", "KLM", "PQR"], k).astype(str),
+        ).astype(object),
+        "colour": _pick(rng, COLOURS, k),
+        "cc": _pick(rng, CC_BANDS, k).astype(np.int64),
+        "manufactured": _dates(np.datetime64("1995-01-01"), rng.integers(0, 29 * 365, k)),
+        "premium": (value * 0.03 * (1 + 0.25 * accidents)).astype(np.int64) + 150,
+        "accidents": accidents,
+    }
+    idx = np.flatnonzero(ptype == "H")
+    k = len(idx)
+    details["H"] = {
+        "local_id": idx,
+        "property_type": _pick(rng, PROPERTY_TYPES, k),
+        "bedrooms": rng.integers(1, 7, k),
+        "value": rng.integers(80_000, 1_200_000, k),
+        "house_name": customers["house_name"][owner[idx]],
+        "house_number": customers["house_number"][owner[idx]],
+        "postcode": postcode[owner[idx]],
+    }
+    idx = np.flatnonzero(ptype == "E")
+    k = len(idx)
+    yes_no = np.asarray(["Y", "N"], dtype=object)
+    details["E"] = {
+        "local_id": idx,
+        "with_profits": yes_no[rng.integers(0, 2, k)],
+        "equities": yes_no[rng.integers(0, 2, k)],
+        "managed_fund": yes_no[rng.integers(0, 2, k)],
+        "fund_name": _pick(rng, FUNDS, k),
+        "term": term_years[idx],
+        "sum_assured": rng.integers(10, 500, k) * 1_000,
+        "life_assured": np.asarray(
+            [f"{a} {b}"[:31] for a, b in zip(first[owner[idx]], last[owner[idx]])], dtype=object
+        ),
+    }
+    idx = np.flatnonzero(ptype == "C")
+    k = len(idx)
+    perils = rng.integers(0, 100, (4, k))
+    details["C"] = {
+        "local_id": idx,
+        "address": _pick(rng, pools["addresses"], k),
+        "postcode": _pick(rng, pools["commercial_postcodes"], k),
+        "latitude": np.char.add(np.round(rng.uniform(49.9, 58.6, k), 4).astype(str), "N").astype(object),
+        "longitude": np.char.add(np.round(rng.uniform(0.0, 6.0, k), 4).astype(str), "W").astype(object),
+        "customer": np.asarray([f"{a} {b}" for a, b in zip(first[owner[idx]], last[owner[idx]])], dtype=object),
+        "prop_type": _pick(rng, COMMERCIAL_TYPES, k),
+        "fire_peril": perils[0],
+        "fire_premium": perils[0] * 10,
+        "crime_peril": perils[1],
+        "crime_premium": perils[1] * 8,
+        "flood_peril": perils[2],
+        "flood_premium": perils[2] * 12,
+        "weather_peril": perils[3],
+        "weather_premium": perils[3] * 6,
+        "status": np.zeros(k, dtype=np.int64),
+        "reject_reason": np.full(k, None, dtype=object),
+    }
+
+    # --- claims ----------------------------------------------------------
+    per_policy = rng.poisson(config.claim_frequency, m)
+    claim_policy = np.repeat(np.arange(m), per_policy)
+    c = len(claim_policy)
+    starts = np.repeat(np.cumsum(per_policy) - per_policy, per_policy)
+    claim_value = rng.integers(100, 25_000, c)
+    claim_date = issue[claim_policy] + rng.integers(0, 365, c).astype("timedelta64[D]")
+    claims = {
+        "policy_local_id": claim_policy,
+        "number": np.arange(c) - starts + 1,
+        "date": np.datetime_as_string(np.minimum(claim_date, today), unit="D").astype(object),
+        "paid": (claim_value * rng.uniform(0.0, 1.0, c)).astype(np.int64),
+        "value": claim_value,
+        "cause": _pick(rng, CAUSES, c),
+    }
+    return {"customers": customers, "customer_secure": secure, "policies": policies, "details": details, "claims": claims}
+
+
+def _plan(config: GeneratorConfig, first_customer_id: int) -> list[Shard]:
+    shards = []
+    for index, start in enumerate(range(0, config.customers, config.batch_size)):
+        size = min(config.batch_size, config.customers - start)
+        shards.append(Shard(index=index, first_customer_id=first_customer_id + start, size=size))
+    return shards
+
+
+def _bulk_insert(conn, table, columns: dict[str, np.ndarray]) -> int:
+    from sqlalchemy import insert
+
+    names = list(columns)
+    if not names or len(columns[names[0]]) == 0:
+        return 0
+    compiled = insert(table).compile(dialect=conn.dialect, column_keys=names)
+    values = [columns[name].tolist() for name in names]
+    if compiled.positional:
+        order = [names.index(key) for key in compiled.positiontup]
+        rows = list(zip(*(values[i] for i in order)))
+    else:
+        rows = [dict(zip(names, row)) for row in zip(*values)]
+    conn.exec_driver_sql(str(compiled), rows)
+    return len(rows)
+
+
+def _write_shard(conn, data: dict, policy_id_base: int, policy_number_base: int) -> dict[str, int]:
+    from app.db import models
+
+    policies = dict(data["policies"])
+    local = policies.pop("local_id")
+    policies["id"] = local + policy_id_base
+    policies["policy_number"] = local + policy_number_base
+    counts = {}
+    detail_tables = {
+        "M": models.MotorPolicy.__table__,
+        "H": models.HousePolicy.__table__,
+        "E": models.EndowmentPolicy.__table__,
+        "C": models.CommercialPolicy.__table__,
+    }
+    with conn.begin():
+        counts["customers"] = _bulk_insert(conn, models.Customer.__table__, data["customers"])
+        _bulk_insert(conn, models.CustomerSecure.__table__, data["customer_secure"])
+        counts["policies"] = _bulk_insert(conn, models.Policy.__table__, policies)
+        for ptype, table in detail_tables.items():
+            detail = dict(data["details"][ptype])
+            detail["policy_id"] = detail.pop("local_id") + policy_id_base
+            _bulk_insert(conn, table, detail)
+        claims = dict(data["claims"])
+        claims["policy_id"] = claims.pop("policy_local_id") + policy_id_base
+        counts["claims"] = _bulk_insert(conn, models.Claim.__table__, claims)
+    return counts
+
+
+@contextmanager
+def _bulk_connection(engine):
+    """Connection for the shard writes; on SQLite with ``synchronous=OFF``, restored before it goes back to the pool."""
+    with engine.connect() as conn:
+        previous = None
+        if conn.dialect.name == "sqlite":
+            previous = conn.exec_driver_sql("PRAGMA synchronous").scalar()
+            conn.exec_driver_sql("PRAGMA synchronous=OFF")
+            conn.commit()
+        try:
+            yield conn
+        finally:
+            if previous is not None:
+                conn.rollback()
+                conn.exec_driver_sql(f"PRAGMA synchronous={int(previous)}")
+                conn.commit()
+
+
+def _start_offsets(engine) -> tuple[int, int, int]:
+    from sqlalchemy import func, select
+
+    from app.db import models
+
+    with engine.connect() as conn:
+        max_customer = max(
+            conn.execute(select(func.max(models.Customer.id))).scalar() or 0,
+            conn.execute(select(func.max(models.Customer.customer_number))).scalar() or 0,
+        )
+        max_policy = conn.execute(select(func.max(models.Policy.id))).scalar()
+        max_number = conn.execute(select(func.max(models.Policy.policy_number))).scalar()
+    return max_customer + 1, (max_policy or 0) + 1, max((max_number or 0) + 1, 1_000_001)
+
+
+def _finish(engine, summary: dict) -> None:
+    from sqlalchemy import func, select
+
+    from app.db import counts, models
+
+    with engine.begin() as conn:
+        for name, column in (("GENACUSTNUM", models.Customer.customer_number), ("GENAPOLICYNUM", models.Policy.policy_number)):
+            value = conn.execute(select(func.max(column))).scalar() or 0
+            updated = conn.execute(
+                models.Counter.__table__.update().where(models.Counter.name == name).values(value=value)
+            ).rowcount
+            if not updated:
+                conn.execute(models.Counter.__table__.insert().values(name=name, value=value))
+        conn.execute(
+            models.Event.__table__.insert().values(
+                source="generator",
+                level="INFO",
+                message=(
+                    f"generated portfolio customers={summary['customers']} "
+                    f"policies={summary['policies']} claims={summary['claims']}"
+                ),
+            )
+        )
+    # Core inserts bypass the ORM count hook
+    counts.reconcile(engine)
+
+
+def generate(engine, config: GeneratorConfig, workers: int = 1, progress: bool = False) -> dict:
+    """Generate ``config.customers`` customers (plus policies/claims) into ``engine``."""
+    customer_base, policy_id_base, policy_number_base = _start_offsets(engine)
+    shards = _plan(config, customer_base)
+    totals = {"customers": 0, "policies": 0, "claims": 0}
+    started = time.perf_counter()
+
+    def consume(conn, data: dict) -> None:
+        nonlocal policy_id_base, policy_number_base
+        counts = _write_shard(conn, data, policy_id_base, policy_number_base)
+        policy_id_base += counts["policies"]
+        policy_number_base += counts["policies"]
+        for key in totals:
+            totals[key] += counts[key]
+        if progress:
+            rate = totals["customers"] / (time.perf_counter() - started)
+            print(f"  {totals['customers']:>10} customers, {totals['policies']:>10} policies, {totals['claims']:>9} claims ({rate:,.0f} customers/s)")
+
+    with _bulk_connection(engine) as conn:
+        if workers <= 1:
+            for shard in shards:
+                consume(conn, generate_shard(config, shard))
+        else:
+            # keep a bounded window of shards in flight; results are consumed in shard order
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending: deque = deque()
+                for shard in shards:
+                    pending.append(pool.submit(generate_shard, config, shard))
+                    if len(pending) >= workers * 2:
+                        consume(conn, pending.popleft().result())
+                while pending:
+                    consume(conn, pending.popleft().result())
+
+    totals["seconds"] = time.perf_counter() - started
+    _finish(engine, totals)
+    return totals
+
+
+def _parse_mix(text: str | None) -> dict[str, float]:
+    if not text:
+        return dict(DEFAULT_MIX)
+    mix = {t: 0.0 for t in POLICY_TYPES}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip().upper()
+        if name not in mix:
+            raise SystemExit(f"Unknown policy type {name!r} in --mix (use M/H/E/C)")
+        mix[name] = float(weight)
+    if sum(mix.values()) <= 0:
+        raise SystemExit("--mix needs at least one positive weight")
+    return mix
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--customers", type=int, required=True)
+    parser.add_argument("--policies-per-customer", type=float, default=1.5, help="Average, at least one per customer")
+    parser.add_argument("--mix", help="Policy type mix, e.g. M=0.45,H=0.3,E=0.1,C=0.15")
+    parser.add_argument("--claim-frequency", type=float, default=0.1, help="Expected claims per policy")
+    parser.add_argument("--seed", type=int, default=4711)
+    parser.add_argument("--as-of", type=date.fromisoformat, default=date.today(), help="Reference date (YYYY-MM-DD)")
+    parser.add_argument("--batch-size", type=int, default=50_000, help="Customers per shard/transaction")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Generator processes")
+    parser.add_argument("--db", help="SQLite file (default: DATABASE_URL)")
+    parser.add_argument("--append", action="store_true", help="Add to existing data instead of requiring an empty DB")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        os.environ["DATABASE_URL"] = f"sqlite:///{Path(args.db).resolve()}"
+    from sqlalchemy import func, select
+
+    from app.db import models
+    from app.db.migrations import init_db
+    from app.db.session import engine
+
+    init_db(engine)
+    if not args.append:
+        with engine.connect() as conn:
+            if conn.execute(select(func.count(models.Customer.id))).scalar():
+                raise SystemExit("Database already contains customers; use --append or a fresh --db")
+
+    config = GeneratorConfig(
+        customers=args.customers,
+        seed=args.seed,
+        batch_size=args.batch_size,
+        policies_per_customer=args.policies_per_customer,
+        mix=_parse_mix(args.mix),
+        claim_frequency=args.claim_frequency,
+        as_of=args.as_of,
+    )
+    print(f"Generating {config.customers} customers in {len(_plan(config, 1))} shards with {args.workers} worker(s)")
+    totals = generate(engine, config, workers=args.workers, progress=True)
+    rows = totals["customers"] + totals["policies"] + totals["claims"]
+    print(
+        f"Done: {totals['customers']} customers, {totals['policies']} policies, {totals['claims']} claims "
+        f"in {totals['seconds']:.1f}s ({rows / totals['seconds']:,.0f} rows/s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
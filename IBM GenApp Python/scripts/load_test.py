@@ -0,0 +1,332 @@
+"""
+Load generator replaying weighted WSim-style scenarios against the REST API.
+
+Each virtual user loops over scenarios picked by weight (new business, policy
+inquiry, claim update, house policy, event browsing) using data from the WSim
+pools (`app.utils.datasets` via `GenappProvider`). Per endpoint the script
+reports RPS, p50/p95/p99 latency and status codes and writes everything to JSON
+so runs can be compared across commits.
+
+Usage:
+  python scripts/load_test.py --users 50 --duration 30 --output bench/load.json
+  python scripts/load_test.py --base-url http://127.0.0.1:8000 --users 200 --duration 60
+  python scripts/load_test.py --scenario policy_inquiry=10 --scenario new_business=1
+
+Without --base-url the app runs in-process (httpx ASGI transport) on a fresh
+SQLite file (default: loadtest.db in the project folder).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import httpx
+from faker import Faker
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+import benchlib  # noqa: E402
+from app.utils.faker_providers import GenappProvider  # noqa: E402
+
+DEFAULT_WEIGHTS = {
+    "new_business": 2,
+    "policy_inquiry": 5,
+    "claim_update": 2,
+    "house_policy": 1,
+    "event_browse": 1,
+}
+
+MAKES = [("FORD", "ESCORT"), ("VW", "BEETLE"), ("VAUXHALL", "ASTRA"), ("ROVER", "MINI"), ("BMW", "320I")]
+CAUSES = ["FIRE", "THEFT", "FLOOD", "COLLISION", "STORM"]
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, Counter] = defaultdict(Counter)
+
+    def record(self, label: str, status: int | str, elapsed_ms: float) -> None:
+        self.latencies[label].append(elapsed_ms)
+        self.statuses[label][str(status)] += 1
+
+    def report(self, wall_seconds: float) -> dict:
+        endpoints = {}
+        total = 0
+        errors = 0
+        for label in sorted(self.latencies):
+            count = len(self.latencies[label])
+            total += count
+            failed = sum(n for code, n in self.statuses[label].items() if not code.startswith(("2", "3")))
+            errors += failed
+            endpoints[label] = {
+                "rps": count / wall_seconds if wall_seconds else 0.0,
+                "latency_ms": benchlib.summarize(self.latencies[label]),
+                "status_codes": dict(self.statuses[label]),
+                "errors": failed,
+            }
+        return {
+            "duration_s": wall_seconds,
+            "requests": total,
+            "errors": errors,
+            "rps": total / wall_seconds if wall_seconds else 0.0,
+            "endpoints": endpoints,
+        }
+
+
+class VirtualUser:
+    def __init__(self, uid: int, client: httpx.AsyncClient, stats: Stats, shared: dict, seed: int) -> None:
+        self.uid = uid
+        self.client = client
+        self.stats = stats
+        self.shared = shared
+        self.rng = random.Random(seed + uid)
+        self.fake = Faker()
+        self.fake.add_provider(GenappProvider)
+        self.fake.seed_instance(seed + uid)
+
+    async def call(self, label: str, method: str, url: str, **kwargs) -> httpx.Response | None:
+        start = time.perf_counter()
+        try:
+            resp = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as exc:
+            self.stats.record(label, type(exc).__name__, (time.perf_counter() - start) * 1000)
+            return None
+        self.stats.record(label, resp.status_code, (time.perf_counter() - start) * 1000)
+        return resp
+
+    def _customer_payload(self) -> dict:
+        first = self.fake.genapp_first_name()
+        return {
+            "first_name": first[:10],
+            "last_name": self.fake.genapp_last_name()[:20],
+            "postcode": self.fake.genapp_postcode()[:8],
+            "phone_mobile": f"07{self.rng.randint(100000000, 999999999)}",
+            "email_address": f"{first.lower()}.{self.uid}@example.com",
+        }
+
+    async def _create_customer(self) -> dict | None:
+        resp = await self.call("POST /api/customers", "POST", "/api/customers", json=self._customer_payload())
+        if resp is None or resp.status_code != 201:
+            return None
+        customer = resp.json()
+        self.shared["customers"].append(customer["id"])
+        return customer
+
+    # --- scenarios -------------------------------------------------------
+
+    async def new_business(self) -> None:
+        customer = await self._create_customer()
+        if not customer:
+            return
+        make, model = self.rng.choice(MAKES)
+        year = self.rng.randint(2000, 2024)
+        resp = await self.call(
+            "POST /api/policies/motor",
+            "POST",
+            "/api/policies/motor",
+            json={
+                "customer_id": customer["id"],
+                "issue_date": "2024-01-01",
+                "expiry_date": "2025-01-01",
+                "make": make,
+                "model": model,
+                "reg_number": f"A{self.rng.randint(100, 999)}WWR",
+                "value": self.rng.randint(1000, 40000),
+                "cc": self.rng.choice([1000, 1400, 1600, 2000]),
+                "manufactured": f"{year}-01-01",
+                "premium": self.rng.randint(300, 1500),
+                "accidents": self.rng.randint(0, 3),
+            },
+        )
+        if resp is None or resp.status_code != 201:
+            return
+        policy = resp.json()
+        self.shared["policies"].append(policy["id"])
+        resp = await self.call(
+            "POST /api/claims",
+            "POST",
+            "/api/claims",
+            json={
+                "policy_id": policy["id"],
+                "number": self.rng.randint(1, 99),
+                "date": "2024-06-01",
+                "value": self.rng.randint(100, 10000),
+                "cause": self.rng.choice(CAUSES),
+            },
+        )
+        if resp is not None and resp.status_code == 201:
+            self.shared["claims"].append(resp.json()["id"])
+        await self.call(
+            "GET /api/policies?postcode",
+            "GET",
+            "/api/policies",
+            params={"postcode": customer.get("postcode") or self.fake.genapp_postcode(), "limit": 10},
+        )
+
+    async def policy_inquiry(self) -> None:
+        await self.call(
+            "GET /api/policies?postcode",
+            "GET",
+            "/api/policies",
+            params={"postcode": self.fake.genapp_postcode()[:3], "limit": 20},
+        )
+        await self.call(
+            "GET /api/policies/detailed",
+            "GET",
+            "/api/policies/detailed",
+            params={"limit": 20, "page": self.rng.randint(1, 5)},
+        )
+        if self.shared["customers"]:
+            customer_id = self.rng.choice(self.shared["customers"])
+            await self.call("GET /api/customers/{id}", "GET", f"/api/customers/{customer_id}")
+
+    async def claim_update(self) -> None:
+        if not self.shared["claims"]:
+            await self.call("GET /api/claims", "GET", "/api/claims", params={"limit": 5})
+            return
+        claim_id = self.rng.choice(self.shared["claims"])
+        await self.call("GET /api/claims/{id}", "GET", f"/api/claims/{claim_id}")
+        await self.call(
+            "PUT /api/claims/{id}",
+            "PUT",
+            f"/api/claims/{claim_id}",
+            json={"paid": self.rng.randint(0, 5000), "observations": "Lasttest"},
+        )
+
+    async def house_policy(self) -> None:
+        customer = await self._create_customer()
+        if not customer:
+            return
+        resp = await self.call(
+            "POST /api/policies/house",
+            "POST",
+            "/api/policies/house",
+            json={
+                "customer_id": customer["id"],
+                "property_type": self.rng.choice(["HOUSE", "FLAT", "BUNGALOW"]),
+                "bedrooms": self.rng.randint(1, 6),
+                "value": self.rng.randint(80000, 900000),
+                "postcode": customer.get("postcode") or self.fake.genapp_postcode()[:8],
+            },
+        )
+        if resp is not None and resp.status_code == 201:
+            self.shared["policies"].append(resp.json()["id"])
+
+    async def event_browse(self) -> None:
+        await self.call(
+            "GET /api/events",
+            "GET",
+            "/api/events",
+            params={"source": self.rng.choice(["policies", "customers", "claims"]), "limit": 50},
+        )
+
+    async def run(self, weights: dict[str, int], deadline: float, max_iterations: int | None) -> None:
+        names = list(weights)
+        population = [weights[n] for n in names]
+        iterations = 0
+        while time.perf_counter() < deadline:
+            if max_iterations is not None and iterations >= max_iterations:
+                break
+            scenario = self.rng.choices(names, weights=population)[0]
+            await getattr(self, scenario)()
+            iterations += 1
+
+
+def _parse_weights(values: list[str] | None) -> dict[str, int]:
+    if not values:
+        return dict(DEFAULT_WEIGHTS)
+    weights: dict[str, int] = {}
+    for item in values:
+        name, _, weight = item.partition("=")
+        if name not in DEFAULT_WEIGHTS:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(DEFAULT_WEIGHTS)}")
+        weights[name] = int(weight or 1)
+    return weights
+
+
+def _in_process_client(db_path: Path, keep_db: bool) -> httpx.AsyncClient:
+    if not keep_db:
+        benchlib.remove_sqlite(db_path)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.chdir(BASE_DIR)  # templates/static are resolved relative to the project folder
+    from app.main import app
+
+    # app errors must show up as 500s in the report instead of aborting the run
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    return httpx.AsyncClient(transport=transport, base_url="http://genapp.local")
+
+
+async def run_load(args: argparse.Namespace) -> dict:
+    weights = _parse_weights(args.scenario)
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+    else:
+        client = _in_process_client(Path(args.db).resolve(), args.keep_db)
+    stats = Stats()
+    shared: dict[str, list[int]] = {"customers": [], "policies": [], "claims": []}
+    async with client:
+        start = time.perf_counter()
+        deadline = start + args.duration
+
+        async def user(uid: int) -> None:
+            if args.ramp_up:
+                await asyncio.sleep(args.ramp_up * uid / args.users)
+            await VirtualUser(uid, client, stats, shared, args.seed).run(weights, deadline, args.iterations)
+
+        await asyncio.gather(*(user(uid) for uid in range(args.users)))
+        wall = time.perf_counter() - start
+    return {
+        "meta": benchlib.run_metadata(
+            target=args.base_url or "in-process",
+            users=args.users,
+            duration=args.duration,
+            iterations=args.iterations,
+            seed=args.seed,
+            weights=weights,
+        ),
+        "summary": stats.report(wall),
+    }
+
+
+def _print_report(result: dict) -> None:
+    summary = result["summary"]
+    print(f"{summary['requests']} requests in {summary['duration_s']:.1f}s -> {summary['rps']:.1f} req/s, {summary['errors']} errors")
+    print(f"{'endpoint':32} {'count':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}  codes")
+    for label, data in summary["endpoints"].items():
+        lat = data["latency_ms"]
+        codes = ",".join(f"{k}:{v}" for k, v in sorted(data["status_codes"].items()))
+        print(f"{label:32} {lat['count']:>7} {data['rps']:>8.1f} {lat['p50']:>8.1f} {lat['p95']:>8.1f} {lat['p99']:>8.1f}  {codes}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Target server (default: in-process ASGI app)")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Run time in seconds")
+    parser.add_argument("--iterations", type=int, help="Max scenarios per user (optional)")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="Seconds to stagger user start")
+    parser.add_argument("--scenario", action="append", help="Weight override, e.g. policy_inquiry=10 (repeatable)")
+    parser.add_argument("--seed", type=int, default=4711)
+    parser.add_argument("--timeout", type=float, default=30.0, help="HTTP timeout for --base-url runs")
+    parser.add_argument("--db", default=str(BASE_DIR / "loadtest.db"), help="SQLite file for in-process runs")
+    parser.add_argument("--keep-db", action="store_true", help="Reuse existing in-process DB instead of recreating it")
+    parser.add_argument("--output", help="Write JSON results to this path")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run_load(args))
+    _print_report(result)
+    if args.output:
+        print(f"Results written to {benchlib.write_json(args.output, result)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,63 @@
+"""
+Renew policies expiring in a date window (see `app.services.renewals`).
+
+Runs one worker per policy type, chunk-wise and resumable: an interrupted run
+started again with the same window continues after the last committed chunk.
+
+Usage:
+  python scripts/renew_policies.py                       # expiring within GENAPP_RENEWAL_LEAD_DAYS from today
+  python scripts/renew_policies.py --from 2026-01-01 --to 2026-01-31 --types M,H --chunk-size 5000
+  python scripts/renew_policies.py --from 2026-01-01 --to 2026-01-31 --restart --db bench/portfolio.db
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, default=date.today(), help="First expiry date (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, help="Last expiry date (default: --from + GENAPP_RENEWAL_LEAD_DAYS)")
+    parser.add_argument("--types", default="M,H,E,C", help="Policy types, comma separated")
+    parser.add_argument("--chunk-size", type=int, help="Policies per transaction (default: GENAPP_RENEWAL_CHUNK)")
+    parser.add_argument("--workers", type=int, help="Parallel policy types (default: GENAPP_RENEWAL_WORKERS)")
+    parser.add_argument("--restart", action="store_true", help="Drop the checkpoints of this window and start over")
+    parser.add_argument("--db", help="SQLite file (default: DATABASE_URL)")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        os.environ["DATABASE_URL"] = f"sqlite:///{Path(args.db).resolve()}"
+    from app.db.migrations import init_db
+    from app.services import renewals
+    from app.utils.errors import CobolError
+
+    init_db()
+    end = args.end or args.start + timedelta(days=renewals.LEAD_DAYS)
+    try:
+        stats = renewals.renew_expiring(
+            args.start,
+            end,
+            policy_types=[t.strip().upper() for t in args.types.split(",") if t.strip()],
+            chunk_size=args.chunk_size or renewals.RENEWAL_CHUNK,
+            workers=args.workers or renewals.RENEWAL_WORKERS,
+            restart=args.restart,
+        )
+    except CobolError as exc:
+        raise SystemExit(f"{exc.code}: {exc.message}")
+    total = sum(stats.renewed.values())
+    resumed = " (resumed)" if stats.resumed else ""
+    per_type = ", ".join(f"{t}={n}" for t, n in stats.renewed.items())
+    print(f"{stats.job}: {total} policies renewed{resumed} [{per_type}] in {stats.duration_s:.1f}s, {stats.chunks} chunks")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,56 @@
+"""
+Reprice every commercial policy with the peril tables of `app.services.perils`.
+
+Chunks are priced as NumPy columns in a process pool; the changed premiums,
+status and reject reasons are written back set-based, one transaction per chunk.
+Prints progress and the throughput (policies/s).
+
+Usage:
+  python scripts/reprice_commercial.py --dry-run
+  python scripts/reprice_commercial.py --workers 4 --chunk-size 20000 --db bench/portfolio.db
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, help="Pricing processes, 1 = in-process (default: GENAPP_PERIL_WORKERS)")
+    parser.add_argument("--chunk-size", type=int, help="Policies per chunk/transaction (default: GENAPP_PERIL_CHUNK)")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the policies that would change")
+    parser.add_argument("--db", help="SQLite file (default: DATABASE_URL)")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        os.environ["DATABASE_URL"] = f"sqlite:///{Path(args.db).resolve()}"
+    from app.db.migrations import init_db
+    from app.services import perils
+
+    def progress(stats: perils.PerilStats) -> None:
+        print(f"  {stats.priced:>10} priced, {stats.changed:>10} changed ({stats.policies_per_s:,.0f} policies/s)")
+
+    init_db()
+    stats = perils.recalculate_portfolio(
+        workers=args.workers or perils.PERIL_WORKERS,
+        chunk_size=args.chunk_size or perils.PERIL_CHUNK,
+        dry_run=args.dry_run,
+        progress=progress,
+    )
+    verb = "would change" if stats.dry_run else "changed"
+    print(
+        f"{stats.priced} commercial policies priced with {stats.workers} worker(s), {stats.changed} {verb} "
+        f"in {stats.duration_s:.1f}s ({stats.policies_per_s:,.0f} policies/s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,48 @@
+"""
+Re-rate the whole motor book in place with the rating tables of `app.services.rating`.
+
+Only premiums that change are written (with audit events and change feed rows),
+one transaction per chunk. ``--dry-run`` only counts the premiums that would change.
+
+Usage:
+  python scripts/rerate_motor.py --dry-run
+  python scripts/rerate_motor.py --as-of 2026-01-01 --chunk-size 10000 --db bench/portfolio.db
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from datetime import date
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--as-of", type=date.fromisoformat, help="Rating date for the vehicle age (default: today)")
+    parser.add_argument("--chunk-size", type=int, help="Policies per transaction (default: GENAPP_RERATE_CHUNK)")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the premiums that would change")
+    parser.add_argument("--db", help="SQLite file (default: DATABASE_URL)")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        os.environ["DATABASE_URL"] = f"sqlite:///{Path(args.db).resolve()}"
+    from app.db.migrations import init_db
+    from app.services import rating
+
+    init_db()
+    stats = rating.rerate_book(chunk_size=args.chunk_size or rating.RERATE_CHUNK, as_of=args.as_of, dry_run=args.dry_run)
+    verb = "would change" if stats.dry_run else "changed"
+    print(
+        f"{stats.rated} motor policies rated, {stats.changed} premiums {verb} "
+        f"in {stats.duration_s:.1f}s ({stats.rated / max(stats.duration_s, 1e-9):,.0f} policies/s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
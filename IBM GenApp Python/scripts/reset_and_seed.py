@@ -1,9 +1,15 @@
-"""Reset local SQLite database and seed sample data from cntl/wsim sources."""
+"""Reset local SQLite database and seed sample data from cntl/wsim sources.
+
+Usage:
+  python scripts/reset_and_seed.py
+  python scripts/reset_and_seed.py --bulk --input export.ndjson --chunk-size 5000 --no-reset
+"""
 from __future__ import annotations
 
+import argparse
 import json
 import os
-from datetime import date
+import time
 from pathlib import Path
 import sys
 
@@ -19,41 +25,38 @@ if "DATABASE_URL" not in os.environ or os.environ["DATABASE_URL"].startswith("sq
 if str(BASE_DIR) not in sys.path:
     sys.path.insert(0, str(BASE_DIR))
 
+import benchlib  # noqa: E402
 from app.main import init_db
 from app.db.session import SessionLocal, engine
 from app.services import customers as customer_service
 from app.services import policies as policy_service
 from app.services import claims as claim_service
-from app.schemas.customers import CustomerCreate
-from app.schemas.policies import (
-    MotorPolicyCreate,
-    HousePolicyCreate,
-    CommercialPolicyCreate,
-)
-from app.schemas.claims import ClaimCreate
+from app.services import importer
+
+
+CREATE_POLICY = {
+    "M": policy_service.create_policy_motor,
+    "H": policy_service.create_policy_house,
+    "E": policy_service.create_policy_endowment,
+    "C": policy_service.create_policy_commercial,
+}
 
 
 def _cleanup_db() -> None:
     # Close existing connections so SQLite file can be replaced cleanly
     engine.dispose()
-    if DB_PATH.exists():
-        DB_PATH.unlink()
+    if benchlib.remove_sqlite(DB_PATH):
         print(f"Removed {DB_PATH}")
 
 
-def _load_seed_data() -> dict:
-    with DATA_PATH.open("r", encoding="utf-8") as fh:
+def _load_seed_data(path: Path = DATA_PATH) -> dict:
+    with path.open("r", encoding="utf-8") as fh:
         return json.load(fh)
 
 
-def _parse_date(value: str | None) -> date | None:
-    if not value:
-        return None
-    return date.fromisoformat(value)
-
-
-def seed() -> None:
-    data = _load_seed_data()
+def seed(path: Path = DATA_PATH) -> None:
+    """Per-row seed through the regular services (one commit and event per entity)."""
+    data = _load_seed_data(path)
     session = SessionLocal()
     customer_map: dict[str, object] = {}
     policy_map: dict[str, object] = {}
@@ -61,122 +64,61 @@ def seed() -> None:
     try:
         # Customers
         for customer in data.get("customers", []):
-            payload = CustomerCreate(
-                first_name=customer["first_name"],
-                last_name=customer["last_name"],
-                date_of_birth=_parse_date(customer.get("date_of_birth")),
-                house_name=customer.get("house_name") or None,
-                house_number=customer.get("house_number") or None,
-                postcode=customer.get("postcode") or None,
-                phone_mobile=customer.get("phone_mobile") or None,
-                phone_home=customer.get("phone_home") or None,
-                email_address=customer.get("email_address") or None,
-            )
-            obj = customer_service.create_customer(session, payload)
+            obj = customer_service.create_customer(session, importer.customer_payload(customer))
             customer_map[customer["key"]] = obj
             print(f"Inserted customer {obj.customer_number} ({obj.first_name} {obj.last_name})")
 
         # Policies
         for policy in data.get("policies", []):
             customer = customer_map[policy["customer_key"]]
-            base_kwargs = dict(
-                customer_id=customer.id,
-                policy_number=policy.get("policy_number"),
-                issue_date=_parse_date(policy.get("issue_date")),
-                expiry_date=_parse_date(policy.get("expiry_date")),
-                broker_id=policy.get("broker_id"),
-                payment=policy.get("payment"),
-                commission=policy.get("commission"),
-            )
-            policy_type = policy["type"].upper()
-            if policy_type == "M":
-                detail = policy["motor_detail"]
-                obj = policy_service.create_policy_motor(
-                    session,
-                    MotorPolicyCreate(
-                        **base_kwargs,
-                        make=detail["make"],
-                        model=detail["model"],
-                        value=detail.get("value"),
-                        reg_number=detail["reg_number"],
-                        colour=detail.get("colour"),
-                        cc=detail.get("cc"),
-                        manufactured=detail.get("manufactured"),
-                        premium=detail.get("premium"),
-                        accidents=detail.get("accidents"),
-                    ),
-                )
-            elif policy_type == "H":
-                detail = policy["house_detail"]
-                obj = policy_service.create_policy_house(
-                    session,
-                    HousePolicyCreate(
-                        **base_kwargs,
-                        property_type=detail["property_type"],
-                        bedrooms=detail.get("bedrooms", 0),
-                        value=detail.get("value", 0),
-                        house_name=detail.get("house_name"),
-                        house_number=detail.get("house_number"),
-                        postcode=detail.get("postcode"),
-                    ),
-                )
-            elif policy_type == "C":
-                detail = policy["commercial_detail"]
-                obj = policy_service.create_policy_commercial(
-                    session,
-                    CommercialPolicyCreate(
-                        **base_kwargs,
-                        address=detail["address"],
-                        postcode=detail["postcode"],
-                        latitude=detail.get("latitude"),
-                        longitude=detail.get("longitude"),
-                        customer=detail.get("customer"),
-                        prop_type=detail.get("prop_type"),
-                        fire_peril=detail.get("fire_peril"),
-                        fire_premium=detail.get("fire_premium"),
-                        crime_peril=detail.get("crime_peril"),
-                        crime_premium=detail.get("crime_premium"),
-                        flood_peril=detail.get("flood_peril"),
-                        flood_premium=detail.get("flood_premium"),
-                        weather_peril=detail.get("weather_peril"),
-                        weather_premium=detail.get("weather_premium"),
-                        status=detail.get("status"),
-                        reject_reason=detail.get("reject_reason"),
-                    ),
-                )
-            elif policy_type == "E":
-                raise NotImplementedError("Seed data does not include Endowment example yet")
-            else:
-                raise ValueError(f"Unsupported policy type {policy_type}")
-
+            policy_type, payload = importer.policy_payload(policy, customer.id)
+            obj = CREATE_POLICY[policy_type](session, payload)
             policy_map[policy["key"]] = obj
             print(f"Inserted policy {obj.policy_number} ({obj.policy_type}) for customer {obj.customer_id}")
 
         # Claims
         for claim in data.get("claims", []):
             policy = policy_map[claim["policy_key"]]
-            claim_obj = claim_service.create_claim(
-                session,
-                ClaimCreate(
-                    policy_id=policy.id,
-                    number=claim.get("number"),
-                    date=_parse_date(claim.get("date")),
-                    paid=claim.get("paid"),
-                    value=claim.get("value"),
-                    cause=claim.get("cause"),
-                    observations=claim.get("observations"),
-                ),
-            )
+            claim_obj = claim_service.create_claim(session, importer.claim_payload(claim, policy.id))
             print(f"Inserted claim #{claim_obj.number or claim_obj.id} for policy {policy.policy_number}")
 
     finally:
         session.close()
 
 
-def main() -> None:
-    _cleanup_db()
+def seed_bulk(path: Path = DATA_PATH, chunk_size: int = 1000) -> None:
+    """Chunked import (one transaction per chunk); accepts seed JSON or NDJSON."""
+    session = SessionLocal()
+    start = time.perf_counter()
+
+    def progress(stats: importer.ImportStats) -> None:
+        print(f"  chunk {stats.chunks}: {stats.customers} customers, {stats.policies} policies, {stats.claims} claims")
+
+    try:
+        stats = importer.import_bulk(session, importer.iter_file_records(path), chunk_size=chunk_size, progress=progress)
+    finally:
+        session.close()
+    print(
+        f"Imported {stats.customers} customers, {stats.policies} policies, {stats.claims} claims "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--input", type=Path, default=DATA_PATH, help="Seed JSON or NDJSON file (default: data/seed_data.json)")
+    parser.add_argument("--bulk", action="store_true", help="Chunked bulk import instead of per-row service calls")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Records per transaction in --bulk mode")
+    parser.add_argument("--no-reset", action="store_true", help="Keep the existing database and append")
+    args = parser.parse_args(argv)
+
+    if not args.no_reset:
+        _cleanup_db()
     init_db()
-    seed()
+    if args.bulk or args.input.suffix.lower() in (".ndjson", ".jsonl"):
+        seed_bulk(args.input, args.chunk_size)
+    else:
+        seed(args.input)
     print("Seed complete.")
 
 
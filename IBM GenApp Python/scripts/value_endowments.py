@@ -0,0 +1,81 @@
+"""
+Value all endowment policies at a valuation date (see `app.services.valuation`).
+
+Writes one record per policy (NDJSON, or CSV for a ``.csv`` output), batch by
+batch, and prints the portfolio totals and throughput.
+
+Usage:
+  python scripts/value_endowments.py --date 2026-12-31 --output bench/valuation.ndjson
+  python scripts/value_endowments.py --date 2026-12-31 --output valuation.csv --batch-size 20000 --db bench/portfolio.db
+  python scripts/value_endowments.py --summary-only
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--date", type=date.fromisoformat, default=date.today(), help="Valuation date (YYYY-MM-DD)")
+    parser.add_argument("--output", type=Path, help="NDJSON or .csv file (default: stdout)")
+    parser.add_argument("--batch-size", type=int, help="Policies per batch (default: GENAPP_VALUATION_BATCH)")
+    parser.add_argument("--summary-only", action="store_true", help="Only print the totals")
+    parser.add_argument("--db", help="SQLite file (default: DATABASE_URL)")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        os.environ["DATABASE_URL"] = f"sqlite:///{Path(args.db).resolve()}"
+    from app.db.session import SessionLocal
+    from app.services import valuation
+
+    totals = valuation.ValuationTotals(valuation_date=args.date.isoformat())
+    started = time.perf_counter()
+    out = None
+    if not args.summary_only:
+        if args.output:
+            args.output.parent.mkdir(parents=True, exist_ok=True)
+            out = args.output.open("w", encoding="utf-8", newline="")
+        else:
+            out = sys.stdout
+    as_csv = args.output is not None and args.output.suffix.lower() == ".csv"
+    writer = None
+    try:
+        with SessionLocal() as db:
+            for batch in valuation.iter_valuation(db, args.date, batch_size=args.batch_size or valuation.VALUATION_BATCH):
+                totals.add(batch)
+                if out is None or not batch:
+                    continue
+                if as_csv:
+                    if writer is None:
+                        writer = csv.DictWriter(out, fieldnames=list(batch[0]))
+                        writer.writeheader()
+                    writer.writerows(batch)
+                else:
+                    out.write("".join(json.dumps(item, separators=(",", ":")) + "\n" for item in batch))
+    finally:
+        if out is not None and out is not sys.stdout:
+            out.close()
+    seconds = time.perf_counter() - started
+    summary = totals.as_dict()
+    print(
+        f"{summary['policies']} endowment policies valued at {summary['valuation_date']} in {seconds:.1f}s "
+        f"({summary['policies'] / max(seconds, 1e-9):,.0f} policies/s): reserve {summary['reserve']:,.2f}, "
+        f"PV benefits {summary['pv_benefits']:,.2f}, PV premiums {summary['pv_premiums']:,.2f}",
+        file=sys.stderr if out is sys.stdout else sys.stdout,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
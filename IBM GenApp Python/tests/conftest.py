@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# app.db.session builds its engine at import time; point it at the isolated test DB
+# before any test module (not only test_wsim_flows) pulls in app code.
+Path("test_output").mkdir(exist_ok=True)
+os.environ["DATABASE_URL"] = f"sqlite:///{Path('test_output') / 'test_genapp_wsim.db'}"
+# the event archive and the read snapshot default to siblings of the live DB; keep them out of
+# test_output so test_wsim_flows can remove the directory when it is done
+_SCRATCH = Path(tempfile.mkdtemp(prefix="genapp-tests-"))
+os.environ["GENAPP_EVENTS_ARCHIVE_DIR"] = str(_SCRATCH / "archive")
+os.environ["GENAPP_SNAPSHOT_PATH"] = str(_SCRATCH / "genapp.snapshot.db")
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_SCRATCH, ignore_errors=True)
+
+
+@pytest.fixture()
+def tmp_engine(tmp_path, monkeypatch):
+    """Engine on a fresh, migrated SQLite file, with the process-wide write state reset."""
+    from sqlalchemy import create_engine
+
+    from app.db import writer
+    from app.db.migrations import init_db
+    from app.services import counters
+
+    # earlier tests may have switched the writer queue on or left counter blocks behind
+    monkeypatch.setattr(writer, "WRITE_QUEUE", False)
+    monkeypatch.setattr(writer, "_coordinator", None)
+    counters.pool.clear()
+    engine = create_engine(f"sqlite:///{tmp_path / 'genapp.db'}", connect_args={"check_same_thread": False})
+    init_db(engine)
+    yield engine
+    writer.shutdown()  # a coordinator the test started itself
+    counters.pool.clear()
+    engine.dispose()
+
+
+@pytest.fixture()
+def tmp_factory(tmp_engine):
+    from sqlalchemy.orm import sessionmaker
+
+    return sessionmaker(bind=tmp_engine, autoflush=False)
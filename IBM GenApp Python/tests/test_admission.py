@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.utils.admission import AdmissionMiddleware, Gate, classify, parse_limits
+
+
+def test_classify_and_parse_limits():
+    assert classify("GET", "/api/policies/42") == "read"
+    assert classify("GET", "/api/customers/7/history") == "read"
+    assert classify("GET", "/api/policies/motor/42") == "read"
+    assert classify("GET", "/api/policies/endowment/42/history") == "read"
+    assert classify("GET", "/api/policies/detailed") == "heavy"
+    assert classify("GET", "/api/reports/policies.csv") == "heavy"
+    assert classify("POST", "/api/customers") == "write"
+    assert classify("GET", "/api/events/stream") is None
+    assert parse_limits("read=32/128, heavy=4") == {"read": (32, 128), "heavy": (4, 0)}
+
+
+def test_gate_queues_then_sheds_with_cobol_codes():
+    async def scenario():
+        gate = Gate("heavy", limit=1, queue=1)
+        assert await gate.acquire(1) is None
+        waiter = asyncio.create_task(gate.acquire(1))
+        await asyncio.sleep(0)
+        assert await gate.acquire(1) == "88"  # queue full
+        gate.release()
+        assert await waiter is None  # slot handed to the waiter
+        assert await gate.acquire(0.01) == "89"  # waited too long
+        gate.release()
+        assert (gate.active, gate.waiting) == (0, 0)
+        return dict(gate.shed)
+
+    assert asyncio.run(scenario()) == {"88": 1, "89": 1}
+
+
+def test_middleware_answers_503_with_retry_after():
+    async def slow(scope, receive, send):
+        await asyncio.sleep(0.05)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    app = AdmissionMiddleware(slow, limits={"heavy": (1, 0)})
+
+    async def call():
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        await app({"type": "http", "method": "GET", "path": "/api/policies"}, None, send)
+        return sent[0]
+
+    async def scenario():
+        return await asyncio.gather(call(), call())
+
+    first, second = asyncio.run(scenario())
+    assert first["status"] == 200
+    assert second["status"] == 503 and (b"retry-after", b"1") in second["headers"]
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import routes_async
+
+
+@pytest.fixture(scope="module")
+def clients():
+    # imported here, not at collection: test_wsim_flows recreates the shared test DB while being collected
+    from app.main import create_app
+
+    # both apps share the test database from conftest; only the routers differ
+    async_app, sync_app = create_app(async_api=True), create_app(async_api=False)
+    with TestClient(async_app) as async_client, TestClient(sync_app) as sync_client:
+        yield async_client, sync_client
+
+
+def _endpoint(app, method: str, path: str):
+    """Endpoint of the first route matching ``method`` and ``path``, in inclusion order."""
+    for entry in app.routes:
+        for route in getattr(getattr(entry, "original_router", None), "routes", [entry]):
+            if getattr(route, "path", None) == path and method in (getattr(route, "methods", None) or ()):
+                return route.endpoint
+
+
+def _same(clients, method: str, path: str, **kwargs):
+    async_client, sync_client = clients
+    a = async_client.request(method, path, **kwargs)
+    s = sync_client.request(method, path, **kwargs)
+    assert (a.status_code, a.json()) == (s.status_code, s.json()), path
+    return a
+
+
+def test_async_router_serves_the_json_api(clients):
+    app = clients[0].app
+    for method, path in [("POST", "/api/customers"), ("GET", "/api/policies"), ("PUT", "/api/claims/{claim_id}"), ("GET", "/api/events")]:
+        endpoint = _endpoint(app, method, path)
+        assert endpoint.__module__ == routes_async.__name__ and asyncio.iscoroutinefunction(endpoint)
+    # typed detail updates fall through to the sync handlers
+    assert _endpoint(app, "PUT", "/api/policies/motor/{policy_id}").__module__ == "app.api.routes_policies"
+
+
+def test_async_flows_match_the_sync_routers(clients):
+    async_client, sync_client = clients
+
+    # customers: written through the async router, read back through both
+    created = async_client.post(
+        "/api/customers",
+        json={"first_name": "ASYNC", "last_name": "FLOW", "date_of_birth": "1980-02-29", "postcode": "AS1 1NC"},
+    )
+    assert created.status_code == 201, created.text
+    customer = created.json()
+    assert customer["date_of_birth"] == "1980-02-29"
+    reference = sync_client.post("/api/customers", json={"first_name": "SYNC", "last_name": "FLOW"}).json()
+    assert customer.keys() == reference.keys()
+    _same(clients, "GET", f"/api/customers/{customer['id']}")
+    updated = async_client.put(f"/api/customers/{customer['id']}", json={"postcode": "AS2 2NC"})
+    assert updated.json()["postcode"] == "AS2 2NC"
+    _same(clients, "GET", "/api/customers", params={"name": "FLOW"})
+    security = async_client.put(f"/api/customers/{customer['id']}/security", json={"customer_pass": "secret", "state_indicator": "A"})
+    assert security.status_code == 200, security.text
+    _same(clients, "GET", f"/api/customers/{customer['id']}/security")
+
+    # policies
+    created = async_client.post(
+        "/api/policies/motor",
+        json={"customer_id": customer["id"], "issue_date": "2024-01-01", "expiry_date": "2025-01-01", "make": "VW", "model": "GOLF", "reg_number": "AS12YNC", "premium": 300},
+    )
+    assert created.status_code == 201, created.text
+    policy = created.json()
+    updated = async_client.put(f"/api/policies/{policy['id']}", json={"payment": 25})
+    assert updated.status_code == 200, updated.text
+    _same(clients, "GET", "/api/policies", params={"customer_id": customer["id"]})
+    _same(clients, "GET", "/api/policies/detailed", params={"customer_id": customer["id"]})
+    _same(clients, "GET", "/api/policies", params={"customer_id": "abc"})  # same 400 for a bad filter
+
+    # claims
+    created = async_client.post("/api/claims", json={"policy_id": policy["id"], "date": "2024-06-01", "value": 1200})
+    assert created.status_code == 201, created.text
+    claim = created.json()
+    assert async_client.put(f"/api/claims/{claim['id']}", json={"paid": 200, "value": 1500}).json()["value"] == 1500
+    _same(clients, "GET", f"/api/claims/{claim['id']}")
+    _same(clients, "GET", "/api/claims", params={"policy_id": policy["id"]})
+    _same(clients, "GET", "/api/claims/999999")
+    _same(clients, "GET", "/api/customers/999999")
+    missing = _same(clients, "POST", "/api/claims", json={"policy_id": 999999, "value": 1})
+    assert missing.status_code >= 400
+
+    # events written by the async writes are listed identically
+    events = _same(clients, "GET", "/api/events", params={"limit": 20}).json()
+    assert any(event["entity_type"] == "claim" and event["entity_id"] == claim["id"] for event in events)
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import routes_policies
+from app.db.session import get_db
+from app.schemas.claims import ClaimCreate, ClaimUpdate
+from app.schemas.customers import CustomerCreate, CustomerSecurityIn, CustomerUpdate
+from app.schemas.events import EventOut
+from app.schemas.policies import MotorPolicyCreate
+from app.services import claims, customers, events, policies
+
+
+def test_entity_history_is_structured_and_index_backed(tmp_engine, tmp_factory):
+    with tmp_factory() as db:
+        cust = customers.create_customer(db, CustomerCreate(first_name="AUDIT", last_name="TRAIL"))
+        customers.update_customer(db, cust.id, CustomerUpdate(last_name="TRAILS", postcode=None))
+        customers.set_customer_security(db, cust.id, CustomerSecurityIn(customer_pass="secret"))
+        policy = policies.create_policy_motor(db, MotorPolicyCreate(customer_id=cust.id, make="VW", model="GOLF", reg_number="AB12CDE"))
+        claim = claims.create_claim(db, ClaimCreate(policy_id=policy.id, value=100))
+        claims.update_claim(db, claim.id, ClaimUpdate(value=250))
+
+        history = [EventOut.model_validate(e) for e in events.entity_history(db, "customer", cust.id)]
+        assert [e.action for e in history] == ["set_security", "update", "create"]
+        assert history[1].diff == {"last_name": ["TRAIL", "TRAILS"]}  # unchanged postcode is not recorded
+        assert history[0].diff["customer_pass"] == ["***", "***"]
+        assert [e.action for e in events.entity_history(db, "policy", policy.id)] == ["create"]
+        claim_history = events.entity_history(db, "claim", claim.id)
+        assert EventOut.model_validate(claim_history[0]).diff == {"value": [100, 250]}
+
+    with tmp_engine.connect() as conn:
+        plan = conn.exec_driver_sql(
+            "EXPLAIN QUERY PLAN SELECT * FROM events WHERE entity_type = 'policy' AND entity_id = 1 "
+            "ORDER BY created_at DESC LIMIT 100"
+        ).fetchall()
+    assert any("ix_events_entity" in row[-1] for row in plan)
+    assert not any("TEMP B-TREE" in row[-1] for row in plan)
+
+
+def test_policy_detail_and_ui_edits_record_their_diff(tmp_factory):
+    with tmp_factory() as db:
+        cust = customers.create_customer(db, CustomerCreate(first_name="AUDIT", last_name="DETAIL"))
+        policy = policies.create_policy_motor(
+            db, MotorPolicyCreate(customer_id=cust.id, issue_date="2024-01-01", expiry_date="2025-01-01", make="VW", model="GOLF", reg_number="AB12CDE", premium=100)
+        )
+        policy_id, policy_number = policy.id, policy.policy_number
+        assert policies.update_policy_motor(db, policy_id, premium=150, colour=None) == {"premium": [100, 150]}
+        assert EventOut.model_validate(events.entity_history(db, "policy", policy_id)[0]).diff == {"premium": [100, 150]}
+
+    def session():
+        with tmp_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(routes_policies.router)
+    app.dependency_overrides[get_db] = session
+    params = {"policy_number": policy_number, "issue_date": "2024-01-01", "expiry_date": "2025-01-01", "payment": 30, "premium": 175, "accidents": 1}
+    response = TestClient(app).post(f"/policies/{policy_id}/edit", params=params, follow_redirects=False)
+    assert response.status_code == 303, response.text
+
+    with tmp_factory() as db:
+        latest = EventOut.model_validate(events.entity_history(db, "policy", policy_id)[0])
+        assert latest.action == "update"
+        assert latest.diff == {"payment": [None, 30], "premium": [150, 175], "accidents": [None, 1]}
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS = Path(__file__).resolve().parents[1] / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+import bench_services  # noqa: E402
+import benchlib  # noqa: E402
+
+
+def test_percentiles_interpolate_between_ranks():
+    assert benchlib.percentile([], 50) == 0.0
+    assert benchlib.percentile([7.0], 99) == 7.0
+    values = [1.0, 2.0, 3.0, 4.0]
+    assert benchlib.percentile(values, 0) == 1.0 and benchlib.percentile(values, 100) == 4.0
+    assert benchlib.percentile(values, 50) == pytest.approx(2.5)
+    assert benchlib.percentile(values, 95) == pytest.approx(3.85)
+
+    summary = benchlib.summarize([4.0, 1.0, 3.0, 2.0])
+    assert (summary["count"], summary["min"], summary["max"], summary["mean"]) == (4, 1.0, 4.0, 2.5)
+    assert summary["p50"] == pytest.approx(2.5)
+    assert benchlib.summarize([]) == {"count": 0}
+
+
+def test_baseline_comparison_flags_regressions(tmp_path):
+    baseline = benchlib.read_json(benchlib.write_json(tmp_path / "base.json", {"results": {
+        "get_customer": {"1000": {"p50": 100.0}},
+        "list_claims": {"1000": {"p50": 100.0}},
+        "search": {"1000": {"p50": 100.0}},
+        "zero": {"1000": {"p50": 0.0}},
+    }}))
+    current = {
+        "get_customer": {"1000": {"p50": 125.0}},
+        "list_claims": {"1000": {"p50": 115.0}},
+        "search": {"1000": {"p50": 70.0}, "10000": {"p50": 900.0}},
+        "zero": {"1000": {"p50": 5.0}},
+    }
+    rows = {(row["case"], row["size"]): row for row in bench_services.compare(current, baseline, tolerance=0.2)}
+    assert rows["get_customer", "1000"]["status"] == "REGRESSION" and rows["get_customer", "1000"]["ratio"] == 1.25
+    assert rows["list_claims", "1000"]["status"] == "ok"
+    assert rows["search", "1000"]["status"] == "faster"
+    assert rows["search", "10000"] == {"case": "search", "size": "10000", "status": "new"}
+    assert rows["zero", "1000"]["status"] == "ok"  # no division by a zero baseline
+
+
+def test_load_test_runs_a_few_iterations_in_process(tmp_path):
+    output = tmp_path / "load.json"
+    completed = subprocess.run(
+        [sys.executable, str(SCRIPTS / "load_test.py"), "--users", "2", "--iterations", "3", "--duration", "60",
+         "--db", str(tmp_path / "load.db"), "--output", str(output)],
+        capture_output=True, text=True, timeout=120,
+    )
+    assert completed.returncode == 0, completed.stderr
+    result = json.loads(output.read_text(encoding="utf-8"))
+    assert result["meta"]["params"]["iterations"] == 3
+    summary = result["summary"]
+    assert summary["requests"] > 0 and summary["errors"] == 0
+    assert all(data["latency_ms"]["count"] for data in summary["endpoints"].values())
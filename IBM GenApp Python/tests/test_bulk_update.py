@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import json
+from datetime import date
+
+import pytest
+from sqlalchemy import event, select
+
+from app.db import counts, models, writer
+from app.schemas.claims import ClaimCreate
+from app.schemas.customers import CustomerCreate
+from app.schemas.policies import HousePolicyCreate, MotorPolicyCreate
+from app.services import bulk, changes, claims, customers, policies
+from app.utils.errors import CobolError
+
+
+def test_bulk_update_policies_and_claims_set_based(tmp_engine, tmp_factory):
+    with tmp_factory() as db:
+        cust = customers.create_customer(db, CustomerCreate(first_name="BULK", last_name="EDIT"))
+        motors = [
+            policies.create_policy_motor(db, MotorPolicyCreate(customer_id=cust.id, make="VW", model="GOLF", reg_number="AB12CDE", premium=100))
+            for _ in range(5)
+        ]
+        house = policies.create_policy_house(
+            db, HousePolicyCreate(customer_id=cust.id, property_type="FLAT", bedrooms=2, value=1000, postcode="AB1 2CD")
+        )
+        house, house_number = house.id, house.policy_number
+        motors = [policy.id for policy in motors]
+        claim_ids = [claims.create_claim(db, ClaimCreate(policy_id=motors[0], value=10)).id for _ in range(3)]
+        events_before = counts.current(db)["events"]
+        seq_before = max(c["seq"] for c in changes.list_changes(db, limit=1000))
+
+        statements = []
+
+        def capture(_conn, _cursor, sql, *_args):
+            statements.append(sql)
+
+        event.listen(tmp_engine, "before_cursor_execute", capture)
+        result = bulk.update_policies(
+            db,
+            [
+                # identical changes share one UPDATE ... WHERE id IN
+                {"id": motors[0], "changes": {"expiry_date": "2030-01-01", "premium": 150}},
+                {"id": motors[1], "changes": {"expiry_date": "2030-01-01", "premium": 150}},
+                {"id": motors[2], "changes": {"premium": 100}},  # unchanged
+                {"id": house, "changes": {"bedrooms": 3, "payment": 12}},
+                {"id": motors[4], "changes": {"bedrooms": 3}},  # house field on a motor policy
+                {"id": motors[3], "changes": {"policy_number": house_number}},
+                {"id": motors[3], "changes": {"premium": 1}},  # duplicate id
+                {"id": 999999, "changes": {"premium": 1}},
+            ],
+            chunk_size=100,
+        )
+        event.remove(tmp_engine, "before_cursor_execute", capture)
+
+        assert (result["updated"], result["unchanged"], result["failed"]) == (3, 1, 4)
+        by_id = {}
+        for item in result["items"]:
+            by_id.setdefault(item["id"], []).append(item)
+        assert by_id[motors[0]][0]["fields"] == ["expiry_date", "premium"]
+        assert by_id[999999][0]["code"] == "01"
+        assert sorted(item["code"] for item in by_id[motors[3]]) == ["90", "98"]
+        assert by_id[motors[4]][0]["code"] == "98" and "bedrooms" in by_id[motors[4]][0]["detail"]
+        updates = [sql for sql in statements if sql.startswith("UPDATE policies")]
+        assert sorted(updates) == [
+            "UPDATE policies SET expiry_date=? WHERE policies.id IN (?, ?)",
+            "UPDATE policies SET payment=? WHERE policies.id = ?",
+            "UPDATE policies_house SET bedrooms=? WHERE policies_house.policy_id = ?",
+            "UPDATE policies_motor SET premium=? WHERE policies_motor.policy_id IN (?, ?)",
+        ]
+
+        db.expire_all()
+        assert db.get(models.Policy, motors[1]).expiry_date == date(2030, 1, 1)
+        assert db.execute(select(models.MotorPolicy.premium).where(models.MotorPolicy.policy_id == motors[1])).scalar() == 150
+        assert db.execute(select(models.HousePolicy.bedrooms).where(models.HousePolicy.policy_id == house)).scalar() == 3
+        assert db.get(models.Policy, house).payment == 12
+
+        feed = [c for c in changes.list_changes(db, after=seq_before) if c["op"] == "update"]
+        assert {(c["entity_type"], c["entity_id"]) for c in feed} == {
+            ("policy", motors[0]), ("policy_motor", motors[0]),
+            ("policy", motors[1]), ("policy_motor", motors[1]),
+            ("policy", house), ("policy_house", house),
+        }
+        history = db.execute(select(models.Event).where(models.Event.entity_id == house, models.Event.action == "update")).scalars().all()
+        assert json.loads(history[-1].diff) == {"bedrooms": [2, 3], "payment": [None, 12]}
+
+        result = bulk.update_claims(
+            db,
+            [
+                {"id": claim_ids[0], "changes": {"paid": 5}},
+                {"id": claim_ids[1], "changes": {"paid": 5}},
+                {"id": claim_ids[2], "changes": {"cause": "x" * 300}},
+                {"id": claim_ids[2], "changes": {"policy_id": 1}},
+            ],
+            chunk_size=1,
+        )
+        assert (result["updated"], result["failed"]) == (2, 2)
+        assert all(item["code"] == "98" for item in result["items"] if item["status"] == "error")
+        assert counts.current(db)["events"] == events_before + 5
+
+        with pytest.raises(CobolError):
+            bulk.update_claims(db, [{"id": n, "changes": {}} for n in range(bulk.BULK_MAX_ITEMS + 1)])
+
+
+def test_bulk_chunks_go_through_the_writer_queue(tmp_engine, tmp_factory, monkeypatch):
+    with tmp_factory() as db:
+        cust = customers.create_customer(db, CustomerCreate(first_name="QUEUE", last_name="BULK"))
+        policy = policies.create_policy_motor(db, MotorPolicyCreate(customer_id=cust.id, make="VW", model="UP", reg_number="QU12EUE"))
+        claim_ids = [claims.create_claim(db, ClaimCreate(policy_id=policy.id, value=1)).id for _ in range(5)]
+        policy_id = policy.id
+
+    writer_db = writer.writer_engine(tmp_engine.url)
+    coordinator = writer.WriteCoordinator(writer_db, window=0.01)
+    monkeypatch.setattr(writer, "WRITE_QUEUE", True)
+    monkeypatch.setattr(writer, "_coordinator", coordinator)
+    try:
+        with tmp_factory() as db:
+            out = bulk.update_claims(db, [{"id": i, "changes": {"value": 50}} for i in claim_ids] + [{"id": 999, "changes": {"value": 1}}], chunk_size=2)
+            assert (out["updated"], out["failed"]) == (5, 1)
+            assert bulk.update_policies(db, [{"id": policy_id, "changes": {"premium": 321}}])["updated"] == 1
+        assert coordinator.stats["ops"] == 4  # one queued operation per chunk
+    finally:
+        coordinator.stop()
+        writer_db.dispose()
+    with tmp_factory() as db:
+        assert db.scalars(select(models.Claim.value).where(models.Claim.id.in_(claim_ids))).all() == [50] * 5
+        assert db.get(models.MotorPolicy, policy_id).premium == 321
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert, update
+
+from app.api import routes_changes
+from app.db import models, outbox
+from app.schemas.claims import ClaimCreate, ClaimUpdate
+from app.schemas.customers import CustomerCreate
+from app.schemas.policies import MotorPolicyCreate
+from app.services import changes, claims, customers, policies
+from app.utils.errors import CobolError
+
+
+def test_outbox_follows_committed_changes_and_consumer_positions(tmp_engine, tmp_factory):
+
+    with tmp_factory() as db:
+        cust = customers.create_customer(db, CustomerCreate(first_name="FEED", last_name="ME"))
+        policy = policies.create_policy_motor(
+            db, MotorPolicyCreate(customer_id=cust.id, make="VW", model="GOLF", reg_number="AB12CDE")
+        )
+        claim = claims.create_claim(db, ClaimCreate(policy_id=policy.id, value=10))
+        claims.update_claim(db, claim.id, ClaimUpdate(value=20))
+        db.add(models.Claim(policy_id=policy.id, value=99))
+        db.flush()
+        db.rollback()  # never committed, never in the feed
+        claims.delete_claim(db, claim.id)
+
+        feed = changes.list_changes(db)
+        assert [(c["entity_type"], c["op"]) for c in feed] == [
+            ("customer", "create"),
+            ("policy", "create"),
+            ("policy_motor", "create"),
+            ("claim", "create"),
+            ("claim", "update"),
+            ("claim", "delete"),
+        ]
+        assert feed[4]["data"]["value"] == 20 and feed[2]["entity_id"] == policy.id
+        assert [c["op"] for c in changes.list_changes(db, after=feed[3]["seq"], entity_type="claim")] == ["update", "delete"]
+        assert [c["entity_type"] for c in changes.list_changes(db, entity_type="policy")] == ["policy", "policy_motor"]
+
+        changes.set_consumer_position(db, "dwh", feed[2]["seq"])
+        assert changes.set_consumer_position(db, "dwh", 1).position == feed[2]["seq"]  # never moves back
+
+    with tmp_engine.begin() as conn:
+        conn.execute(update(models.OutboxEntry).where(models.OutboxEntry.seq <= 3).values(created_at=datetime(2000, 1, 1)))
+    assert outbox.prune(tmp_engine, retention_hours=24) == 3
+    with tmp_factory() as db:
+        assert changes.list_changes(db, after=3)[0]["seq"] == 4
+        with pytest.raises(CobolError) as exc:
+            changes.list_changes(db, after=1)
+        assert exc.value.code == "91"
+
+    # a fully pruned feed still knows how far it had got
+    assert outbox.prune(tmp_engine, retention_hours=-1) == 3
+    with tmp_factory() as db:
+        assert changes.list_changes(db, after=6) == []
+        assert changes.list_changes(db) == []
+        with pytest.raises(CobolError) as exc:
+            changes.list_changes(db, after=4)
+        assert exc.value.code == "91"
+
+
+def test_long_poll_sees_commits_of_other_processes(tmp_factory, tmp_engine, monkeypatch):
+    other = create_engine(tmp_engine.url)  # plays a second worker: no commit signal here
+    monkeypatch.setattr(routes_changes, "SessionLocal", tmp_factory)
+    monkeypatch.setattr(routes_changes, "CHANGES_POLL", 0.05)
+    app = FastAPI()
+    app.include_router(routes_changes.router)
+
+    def commit_elsewhere():
+        time.sleep(0.3)
+        with other.begin() as conn:
+            conn.execute(insert(models.OutboxEntry).values(entity_type="customer", entity_id=1, op="create", payload="{}"))
+
+    thread = threading.Thread(target=commit_elsewhere)
+    thread.start()
+    started = time.perf_counter()
+    response = TestClient(app).get("/api/changes", params={"after": 0, "wait": 10})
+    thread.join()
+    assert [c["entity_type"] for c in response.json()["changes"]] == ["customer"]
+    assert time.perf_counter() - started < 5
+    other.dispose()
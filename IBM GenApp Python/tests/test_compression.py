@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+
+from starlette.testclient import TestClient
+
+from app.utils import static
+from app.utils.compression import CompressionMiddleware, choose_encoding
+
+
+def _app(body: bytes, content_type: bytes = b"application/json", chunks: int = 1):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode())]})
+        size = len(body) // chunks
+        for i in range(chunks):
+            last = i == chunks - 1
+            await send({"type": "http.response.body", "body": body[i * size : None if last else (i + 1) * size], "more_body": not last})
+
+    return app
+
+
+def _call(app, accept: str = "gzip, br;q=0.5"):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", accept.encode())]}
+    asyncio.run(app(scope, None, send))
+    headers = dict(sent[0]["headers"])
+    return headers, b"".join(m.get("body", b"") for m in sent[1:])
+
+
+def test_choose_encoding_honours_q_values():
+    assert choose_encoding("gzip, br", ("br", "gzip")) == "br"
+    assert choose_encoding("br;q=0, gzip", ("br", "gzip")) == "gzip"
+    assert choose_encoding("identity", ("br", "gzip")) is None
+    assert choose_encoding("*", ("gzip",)) == "gzip"
+
+
+def test_compresses_above_threshold_and_streams():
+    payload = json.dumps([{"id": i, "message": "event"} for i in range(500)]).encode()
+    headers, body = _call(CompressionMiddleware(_app(payload, chunks=4), encodings=("gzip",), minimum_size=1024))
+    assert headers[b"content-encoding"] == b"gzip" and b"content-length" not in headers
+    assert headers[b"vary"] == b"Accept-Encoding"
+    assert gzip.decompress(body) == payload
+
+    headers, body = _call(CompressionMiddleware(_app(b'{"ok":true}'), encodings=("gzip",), minimum_size=1024))
+    assert b"content-encoding" not in headers and body == b'{"ok":true}'
+    headers, _ = _call(CompressionMiddleware(_app(payload, b"text/event-stream"), encodings=("gzip",), minimum_size=10))
+    assert b"content-encoding" not in headers
+
+
+def test_built_assets_are_fingerprinted_precompressed_and_immutable(tmp_path):
+    (tmp_path / "site.css").write_text("body { color: #333; }\n" * 200)
+    manifest = static.build(tmp_path)
+    built = manifest["site.css"]
+    assert built.startswith("site.") and built.endswith(".css")
+
+    client = TestClient(static.StaticAssets(directory=tmp_path))
+    response = client.get(f"/{static.DIST}/{built}", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["cache-control"] == static.IMMUTABLE
+    assert response.headers["content-type"].startswith("text/css")
+    assert response.text == (tmp_path / "site.css").read_text()
+
+    plain = client.get("/site.css")
+    assert plain.headers["cache-control"] == static.REVALIDATE and "content-encoding" not in plain.headers
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+from app.db import models
+from app.services import counters
+
+
+def test_blocks_are_served_from_memory_and_dropped_on_rollback(tmp_factory):
+    with tmp_factory() as db:
+        # reserved in this transaction and rolled back: neither stored nor reused
+        assert counters.next_value(db, "TESTNUM", block=10) == 1
+        db.rollback()
+        assert counters.pool.take("TESTNUM") is None
+
+        assert [counters.next_value(db, "TESTNUM", block=10) for _ in range(3)] == [1, 2, 3]
+        db.commit()
+        assert db.get(models.Counter, "TESTNUM").value == 10
+
+    with tmp_factory() as db:
+        # the rest of the committed block, without touching the counter row
+        assert counters.next_value(db, "TESTNUM", block=10) == 4
+        db.commit()
+        assert db.get(models.Counter, "TESTNUM").value == 10
+
+
+def test_concurrent_sessions_never_share_a_number(tmp_engine, tmp_factory):
+    with tmp_engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA journal_mode=WAL")  # as the app's live DB
+
+    def take(_):
+        with tmp_factory() as db:
+            value = counters.next_value(db, "RACENUM", block=1)
+            db.commit()
+            return value
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        values = list(pool.map(take, range(80)))
+    assert sorted(values) == list(range(1, 81))
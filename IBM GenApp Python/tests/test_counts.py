@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from sqlalchemy import insert
+
+from app.db import counts, models
+from app.schemas.customers import CustomerCreate
+from app.services import customers, dashboard
+
+
+def test_counts_follow_writes_and_reconcile_fixes_drift(tmp_engine, tmp_factory):
+    with tmp_factory() as db:
+        created = customers.create_customer(db, CustomerCreate(first_name="COUNT", last_name="ME"))
+        customers.create_customer(db, CustomerCreate(first_name="COUNT", last_name="TOO"))
+        totals = dashboard.counts(db)
+        assert totals["customers"] == 2
+        assert totals["events"] == 2  # one event per create
+        db.delete(db.get(models.Customer, created.id))
+        db.commit()
+        assert dashboard.counts(db)["customers"] == 1
+
+    with tmp_engine.begin() as conn:  # Core insert bypasses the hook
+        conn.execute(insert(models.Event), [{"source": "test", "level": "INFO", "message": "bulk"}] * 3)
+    with tmp_factory() as db:
+        assert dashboard.counts(db)["events"] == 2
+    assert counts.reconcile(tmp_engine)["events"] == 5
+    with tmp_factory() as db:
+        assert dashboard.counts(db) == {"customers": 1, "policies": 0, "claims": 0, "events": 5}
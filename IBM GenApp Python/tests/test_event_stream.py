@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+from sqlalchemy import insert
+
+from app.api import routes_events
+from app.db import eventbus, models
+from app.services import events
+
+
+def test_only_committed_events_reach_the_buffer(tmp_factory, monkeypatch):
+    buffer = eventbus.EventBuffer(maxlen=3)
+    monkeypatch.setattr(eventbus, "buffer", buffer)
+
+    with tmp_factory() as db:
+        events.record_event(db, source="claims", message="kept", entity_type="claim", entity_id=1, action="update", diff={"paid": [0, 5]})
+        db.begin()
+        ok = db.begin_nested()
+        db.add(models.Event(source="claims", message="savepoint kept"))
+        ok.commit()
+        failed = db.begin_nested()
+        db.add(models.Event(source="claims", message="savepoint undone"))
+        db.flush()
+        failed.rollback()
+        assert buffer.last_id() == 1  # nothing published before the outer COMMIT
+        db.commit()
+        db.add(models.Event(source="claims", message="rolled back"))
+        db.flush()
+        db.rollback()
+
+    items, covered = buffer.since(0)
+    assert [item["message"] for item in items] == ["kept", "savepoint kept"]
+    assert covered and items[0]["diff"] == {"paid": [0, 5]}
+
+    for i in range(3):
+        buffer.publish([{"id": 10 + i, "source": "x", "level": "INFO", "message": str(i)}])
+    assert buffer.since(2) == (buffer.since(9)[0], False)  # oldest entries evicted: the route reads the gap from the DB
+
+
+def test_holes_in_the_buffered_ids_are_not_covered():
+    buffer = eventbus.EventBuffer()
+    buffer.publish([{"id": 5}, {"id": 7}, {"id": 12}])
+    assert buffer.since(10) == ([{"id": 12}], False)  # 11 was never published here
+    assert buffer.since(4)[1] is False
+    assert buffer.since(7) == ([{"id": 12}], False)
+    assert buffer.since(12) == ([], True)
+    buffer.publish([{"id": 13}, {"id": 14}])
+    assert buffer.since(12) == ([{"id": 13}, {"id": 14}], True)
+
+
+def test_stream_fills_events_the_buffer_never_saw(tmp_factory, monkeypatch):
+    buffer = eventbus.EventBuffer()
+    monkeypatch.setattr(eventbus, "buffer", buffer)
+    monkeypatch.setattr(routes_events, "STREAM_KEEPALIVE", 0.05)
+    monkeypatch.setattr(routes_events, "SessionLocal", tmp_factory)
+
+    with tmp_factory() as db:
+        events.record_event(db, source="claims", message="orm 1")
+        db.execute(insert(models.Event), [{"source": "import", "level": "INFO", "message": "core 2"}])
+        db.commit()
+        events.record_event(db, source="claims", message="orm 3")
+    assert [item["id"] for item in buffer.since(0)[0]] == [1, 3]
+
+    class Connected:
+        async def is_disconnected(self):
+            return False
+
+    async def read(count):
+        response = await routes_events.api_stream_events(Connected(), last_event_id=0, last_event_id_header=None)
+        seen = []
+        async for chunk in response.body_iterator:
+            seen += [line.split(": ", 1)[1] for line in chunk.splitlines() if line.startswith("data: ")]
+            if len(seen) >= count:
+                break
+            if len(seen) == 3:
+                with tmp_factory() as db:  # written behind the buffer's back while the stream is idle
+                    db.execute(insert(models.Event), [{"source": "import", "level": "INFO", "message": "core 4"}])
+                    db.commit()
+        await response.body_iterator.aclose()
+        return [json.loads(item)["message"] for item in seen]
+
+    assert asyncio.run(asyncio.wait_for(read(4), 10)) == ["orm 1", "core 2", "orm 3", "core 4"]
+
+
+def test_wait_wakes_on_publish_from_another_thread():
+    buffer = eventbus.EventBuffer()
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.05, lambda: loop.run_in_executor(None, buffer.publish, [{"id": 1}]))
+        started = loop.time()
+        await buffer.wait(0, timeout=5)
+        return loop.time() - started
+
+    assert asyncio.run(scenario()) < 1
+
+
+def test_interleaved_commits_keep_the_buffer_in_id_order():
+    buffer = eventbus.EventBuffer(maxlen=3)
+    buffer.publish([{"id": 1}])
+    buffer.publish([{"id": 3}, {"id": 4}])  # the session that flushed id 2 commits later
+    assert buffer.last_id() == 4 and buffer.since(1) == ([{"id": 3}, {"id": 4}], False)
+    buffer.publish([{"id": 2}])
+    assert buffer.last_id() == 4
+    assert buffer.since(1) == ([{"id": 2}, {"id": 3}, {"id": 4}], True)  # id 1 evicted, the rest complete
+    assert buffer.since(3) == ([{"id": 4}], True)
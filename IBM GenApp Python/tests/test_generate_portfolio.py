@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import sys
+from datetime import date
+from pathlib import Path
+
+from sqlalchemy import create_engine, select
+
+from app.db import models
+from app.db.migrations import init_db
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+import generate_portfolio  # noqa: E402
+
+
+def _config(**overrides) -> generate_portfolio.GeneratorConfig:
+    return generate_portfolio.GeneratorConfig(customers=300, batch_size=100, as_of=date(2026, 1, 1), **overrides)
+
+
+def test_bulk_writes_leave_pooled_connections_synchronous(tmp_engine):
+    totals = generate_portfolio.generate(tmp_engine, _config())
+    assert totals["customers"] == 300 and totals["policies"] >= 300
+    for _ in range(tmp_engine.pool.size() + 1):
+        with tmp_engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 2  # FULL, the SQLite default
+
+
+def _dump(engine) -> dict[str, list[tuple]]:
+    tables = [models.Customer, models.CustomerSecure, models.Policy, models.MotorPolicy, models.HousePolicy,
+              models.EndowmentPolicy, models.CommercialPolicy, models.Claim]
+    with engine.connect() as conn:
+        return {
+            model.__tablename__: [tuple(row) for row in conn.execute(select(model.__table__).order_by(*model.__table__.primary_key))]
+            for model in tables
+        }
+
+
+def test_output_does_not_depend_on_the_number_of_workers(tmp_path):
+    dumps = []
+    for workers in (1, 2):
+        engine = create_engine(f"sqlite:///{tmp_path / f'workers{workers}.db'}")
+        init_db(engine)
+        generate_portfolio.generate(engine, _config(claim_frequency=0.5), workers=workers)
+        dumps.append(_dump(engine))
+        engine.dispose()
+    single, parallel = dumps
+    assert len(single["customers"]) == 300 and single["claims"]
+    assert single == parallel
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql
+
+from app.db import models, session
+from app.utils import idempotency
+from app.utils.idempotency import IdempotencyMiddleware, KeyStore
+
+
+def _request(key: str, body: dict):
+    return {
+        "type": "http",
+        "method": "POST",
+        "path": "/api/customers",
+        "query_string": b"",
+        "headers": [(b"idempotency-key", key.encode()), (b"content-type", b"application/json")],
+    }, json.dumps(body).encode()
+
+
+async def _call(app, scope, body):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    headers = dict(sent[0]["headers"])
+    return sent[0]["status"], headers, b"".join(m.get("body", b"") for m in sent[1:])
+
+
+def test_replays_first_response_and_serialises_concurrent_duplicates(tmp_engine):
+    calls = []
+
+    async def create(scope, receive, send):
+        payload = json.loads((await receive())["body"])
+        calls.append(payload)
+        await asyncio.sleep(0.1)  # duplicates arrive while this one is running
+        body = json.dumps({"id": len(calls), **payload}).encode()
+        await send({"type": "http.response.start", "status": 201, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": body})
+
+    app = IdempotencyMiddleware(create, KeyStore(tmp_engine))
+
+    async def scenario():
+        first = _request("k-1", {"first_name": "ONCE"})
+        results = await asyncio.gather(*(_call(app, *first) for _ in range(3)))
+        later = await _call(app, *first)
+        conflict = await _call(app, *_request("k-1", {"first_name": "OTHER"}))
+        other = await _call(app, *_request("k-2", {"first_name": "TWICE"}))
+        return results, later, conflict, other
+
+    results, later, conflict, other = asyncio.run(scenario())
+    assert len(calls) == 2  # k-1 once, k-2 once
+    assert {r[2] for r in results} == {later[2]} == {b'{"id": 1, "first_name": "ONCE"}'}
+    assert sorted(r[1].get(b"idempotent-replayed") is not None for r in results) == [False, True, True]
+    assert later[0] == 201 and later[1][b"idempotent-replayed"] == b"true"
+    assert conflict[0] == 422
+    assert other[0] == 201 and b"TWICE" in other[2]
+
+
+def test_replay_follows_the_accept_header_of_the_repeat(tmp_engine):
+    msgpack = pytest.importorskip("msgpack")
+    calls = []
+
+    async def create(scope, receive, send):
+        calls.append(await receive())
+        body = json.dumps({"id": 7, "first_name": "ONCE"}).encode()
+        headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        await send({"type": "http.response.start", "status": 201, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    app = IdempotencyMiddleware(create, KeyStore(tmp_engine))
+    scope, body = _request("k-1", {"first_name": "ONCE"})
+    packed = {**scope, "headers": [*scope["headers"], (b"accept", b"application/msgpack")]}
+
+    async def scenario():
+        return await _call(app, scope, body), await _call(app, packed, body), await _call(app, scope, body)
+
+    first, as_msgpack, as_json = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert as_msgpack[0] == 201 and as_msgpack[1][b"content-type"] == b"application/msgpack"
+    assert msgpack.unpackb(as_msgpack[2]) == json.loads(first[2]) == {"id": 7, "first_name": "ONCE"}
+    assert as_msgpack[1][b"content-length"] == str(len(as_msgpack[2])).encode()
+    assert as_json[2] == first[2] and as_json[1][b"content-type"] == b"application/json"
+
+
+def test_claims_work_without_sqlite_insert_or_ignore(tmp_engine, monkeypatch):
+    assert "ON CONFLICT DO NOTHING" in str(
+        session.insert_ignore(models.IdempotencyKey.__table__, "postgresql").compile(dialect=postgresql.dialect())
+    )
+    monkeypatch.setattr(idempotency, "insert_ignore", lambda table, dialect: insert(table))  # generic dialect
+    store = KeyStore(tmp_engine)
+    assert store.claim("k-1", "hash") is None
+    assert store.claim("k-1", "hash")["request_hash"] == "hash"
+
+
+def test_duplicate_in_another_worker_waits_for_the_stored_response(tmp_engine, monkeypatch):
+    monkeypatch.setattr(idempotency, "_POLL", 0.01)
+    calls = []
+
+    async def create(scope, receive, send):
+        calls.append(await receive())
+        await asyncio.sleep(0.1)
+        await send({"type": "http.response.start", "status": 201, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": b'{"id": 1}'})
+
+    # two middlewares share only the database, like two app.serve workers
+    first, second = IdempotencyMiddleware(create, KeyStore(tmp_engine)), IdempotencyMiddleware(create, KeyStore(tmp_engine))
+    request = _request("k-1", {"first_name": "ONCE"})
+
+    async def later():
+        await asyncio.sleep(0.02)  # while the first worker is still running the route
+        return await _call(second, *request)
+
+    async def scenario():
+        return await asyncio.gather(_call(first, *request), later())
+
+    waited = idempotency.stats["waited"]
+    original, duplicate = asyncio.run(scenario())
+    assert len(calls) == 1 and idempotency.stats["waited"] == waited + 1
+    assert duplicate[0] == 201 and duplicate[2] == original[2] and duplicate[1][b"idempotent-replayed"] == b"true"
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db import models
+from app.db.migrations import init_db
+from app.services import importer
+from app.utils.errors import CobolError
+
+SEED_DATA = Path(__file__).resolve().parents[1] / "data" / "seed_data.json"
+
+
+@pytest.fixture()
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    init_db(engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _count(db, model) -> int:
+    return db.execute(select(func.count()).select_from(model)).scalar_one()
+
+
+def test_bulk_import_seed_file(db):
+    data = json.loads(SEED_DATA.read_text(encoding="utf-8"))
+    stats = importer.import_bulk(db, importer.iter_seed_records(data), chunk_size=2)
+
+    assert (stats.customers, stats.policies, stats.claims) == (3, 4, 1)
+    assert _count(db, models.Customer) == 3
+    assert _count(db, models.CustomerSecure) == 3
+    assert _count(db, models.EndowmentPolicy) == 1
+    assert _count(db, models.Event) == 8
+    assert db.get(models.Counter, "GENACUSTNUM").value == 3
+
+    claim = db.execute(select(models.Claim)).scalar_one()
+    assert claim.policy_id == stats.policy_ids["POL_MOTOR"]
+    numbers = set(db.execute(select(models.Policy.policy_number)).scalars())
+    assert numbers == {2000001, 2000002, 2000003, 2000004}
+
+
+def test_bulk_import_ndjson_generates_numbers_and_rejects_bad_refs(db, tmp_path):
+    path = tmp_path / "import.ndjson"
+    lines = [
+        {"kind": "customer", "key": "C1", "first_name": "ANNA", "last_name": "SMITH", "postcode": "W1A4WW"},
+        {"kind": "policy", "customer_key": "C1", "type": "M", "motor_detail": {"make": "VW", "model": "GOLF", "reg_number": "AB12CDE"}},
+        {"kind": "policy", "customer_key": "C1", "type": "M", "motor_detail": {"make": "VW", "model": "POLO", "reg_number": "AB12CDF"}},
+    ]
+    path.write_text("\n".join(json.dumps(line) for line in lines), encoding="utf-8")
+    stats = importer.import_bulk(db, importer.iter_file_records(path))
+    assert stats.policies == 2
+    assert sorted(db.execute(select(models.Policy.policy_number)).scalars()) == [1, 2]
+
+    with pytest.raises(CobolError) as exc:
+        importer.import_bulk(db, [("claim", {"policy_id": 999})])
+    assert exc.value.code == "70"
+    assert _count(db, models.Claim) == 0
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import datetime as dt
+import decimal
+import json
+
+from app.api.responses import FastJSONResponse
+from app.schemas.customers import CustomerCreate
+from app.schemas.policies import HousePolicyCreate, MotorPolicyCreate
+from app.services import customers, events, policies
+
+
+def test_fast_json_response_renders_model_types_natively():
+    body = FastJSONResponse(
+        {"d": dt.date(2024, 2, 29), "t": dt.datetime(2024, 2, 29, 12, 30, 0, 5), "n": decimal.Decimal("12.50"), "i": decimal.Decimal("3")}
+    ).body
+    assert json.loads(body) == {"d": "2024-02-29", "t": "2024-02-29T12:30:00.000005", "n": 12.5, "i": 3}
+
+
+def test_row_based_lists_match_the_orm_payloads(tmp_factory):
+    with tmp_factory() as db:
+        cust = customers.create_customer(db, CustomerCreate(first_name="ROW", last_name="TUPLE", postcode="PO1 1AA"))
+        common = {"customer_id": cust.id, "issue_date": dt.date(2024, 1, 1), "expiry_date": dt.date(2025, 1, 1)}
+        policies.create_policy_motor(db, MotorPolicyCreate(**common, make="FORD", model="KA", reg_number="AB12CDE"))
+        policies.create_policy_house(db, HousePolicyCreate(**common, property_type="FLAT", bedrooms=2, value=150000, postcode="PO1 1AA"))
+
+        detailed = policies.list_policies_detailed(db, postcode="PO1")
+        assert [p["policy_type"] for p in detailed] == ["M", "H"]
+        for payload in detailed:
+            assert payload["detail"] == policies.get_policy_detail(db, payload["id"])["detail_dict"]
+
+        rows = events.list_events(db, rows=True)
+        orm = events.list_events(db)
+        assert [row["id"] for row in rows] == [e.id for e in orm]
+        assert rows[0]["message"] == orm[0].message and isinstance(rows[0]["created_at"], dt.datetime)
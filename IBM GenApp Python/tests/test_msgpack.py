@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from app.api import responses
+from app.api.routing import GenappRoute
+
+msgpack = pytest.importorskip("msgpack")
+
+
+class Item(BaseModel):
+    name: str
+    qty: int
+
+
+def _client() -> TestClient:
+    router = APIRouter(route_class=GenappRoute, default_response_class=responses.FastJSONResponse)
+
+    @router.get("/rows")
+    def rows():
+        return responses.FastJSONResponse([{"name": "a", "qty": 1}])
+
+    @router.post("/items", response_model=Item)
+    def create(item: Item):
+        return item
+
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_negotiate_prefers_msgpack_only_when_asked():
+    assert responses.negotiate("application/msgpack") == responses.MSGPACK
+    assert responses.negotiate("application/json, application/msgpack;q=0.5") == responses.JSON
+    assert responses.negotiate("application/msgpack, application/json") == responses.MSGPACK
+    assert responses.negotiate("*/*") == responses.JSON
+
+
+def test_rows_and_models_round_trip_as_msgpack():
+    client = _client()
+    packed = {"Accept": "application/msgpack"}
+    response = client.get("/rows", headers=packed)
+    assert response.headers["content-type"] == responses.MSGPACK
+    assert msgpack.unpackb(response.content) == [{"name": "a", "qty": 1}]
+    assert client.get("/rows").json() == [{"name": "a", "qty": 1}]
+
+    body = msgpack.packb({"name": "b", "qty": 2})
+    response = client.post("/items", content=body, headers={**packed, "Content-Type": "application/msgpack"})
+    assert response.status_code == 200
+    assert msgpack.unpackb(response.content) == {"name": "b", "qty": 2}
+    # validation errors stay JSON
+    response = client.post("/items", content=msgpack.packb({"name": "c"}), headers={**packed, "Content-Type": "application/msgpack"})
+    assert response.status_code == 422 and response.headers["content-type"] == "application/json"
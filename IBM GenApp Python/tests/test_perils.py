@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from sqlalchemy import select
+
+from app.db import models
+from app.schemas.customers import CustomerCreate
+from app.schemas.policies import CommercialPolicyCreate
+from app.services import changes, customers, perils, policies
+
+
+def _columns(*risks):
+    names = ("prop_type", "postcode", "latitude", "fire_peril", "crime_peril", "flood_peril", "weather_peril")
+    return {name: [risk[i] for risk in risks] for i, name in enumerate(names)}
+
+
+def test_price_scores_location_and_status():
+    priced = perils.price(
+        _columns(
+            ("SHOP", "FL1 2AB", "51.0N", 40, 30, 10, 5),  # 100 + 40 + 30, every peril covered
+            ("office", "S1 1AA", "56.1N", 10, 0, 10, 10),  # 125, weather north of 55
+            ("FACTORY", "CR4", None, 5, 5, 5, 5),  # 100 + 75 + 30: referred
+            ("HOTEL", "HU1 1AA", None, 5, 5, 5, 5),  # 100 + 35 + 20
+            ("WAREHOUSE", "FL9", None, 5, 5, 5, 5),  # 100 + 50 + 30
+        ),
+    )
+    assert priced["score"].tolist() == [170, 125, 205, 155, 180]
+    assert priced["fire_premium"].tolist()[0] == round(170 * 0.8 * 40 / 10 * 0.9)
+    assert priced["crime_premium"].tolist()[1] == 0
+    assert priced["weather_premium"].tolist()[1] == round(125 * 0.9 * 10 / 10 * 1.25)
+    assert priced["status"].tolist() == [0, 0, 1, 0, 0]
+    assert priced["reject_reason"].tolist()[2] == perils.DEFAULT_TABLES["refer_reason"]
+
+    rejected = perils.price(_columns(("FACTORY", "FL1", None, 5, 5, 5, 5)), {**perils.DEFAULT_TABLES, "reject_score": 205})
+    assert rejected["status"].tolist() == [2] and rejected["fire_premium"].tolist() == [0]
+    with pytest.raises(ValueError):
+        perils.PerilTables.from_spec({**perils.DEFAULT_TABLES, "rates": {"fire": 1}})
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_recalculate_portfolio_writes_changes_once(tmp_factory, workers):
+    with tmp_factory() as db:
+        cust = customers.create_customer(db, CustomerCreate(first_name="PERIL", last_name="CALC")).id
+        ids = [
+            policies.create_policy_commercial(
+                db,
+                CommercialPolicyCreate(
+                    customer_id=cust, address=f"{n} MAIN ST", postcode="FL1 2AB", prop_type="SHOP",
+                    fire_peril=n, crime_peril=1, flood_peril=1, weather_peril=1,
+                ),
+            ).id
+            for n in range(1, 8)
+        ]
+
+    assert perils.recalculate_portfolio(tmp_factory, workers=workers, chunk_size=3, dry_run=True).changed == 7
+    stats = perils.recalculate_portfolio(tmp_factory, workers=workers, chunk_size=3)
+    assert (stats.priced, stats.changed, stats.chunks) == (7, 7, 3) and stats.policies_per_s > 0
+
+    with tmp_factory() as db:
+        rows = {r.policy_id: r for r in db.scalars(select(models.CommercialPolicy))}
+        expected = perils.price(_columns(*[("SHOP", "FL1 2AB", None, n, 1, 1, 1) for n in range(1, 8)]))
+        assert [rows[i].fire_premium for i in ids] == expected["fire_premium"].tolist()
+        assert all(rows[i].status == 0 for i in ids)
+        event = db.scalars(select(models.Event).where(models.Event.action == "reprice", models.Event.entity_id == ids[0])).one()
+        assert set(json.loads(event.diff)) == {"fire_premium", "crime_premium", "flood_premium", "weather_premium", "status"}
+        feed = [c for c in changes.list_changes(db, limit=100) if c["op"] == "update"]
+        assert [c["entity_id"] for c in feed] == ids
+    assert perils.recalculate_portfolio(tmp_factory, workers=workers, chunk_size=3).changed == 0
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import asyncio
+import pstats
+import time
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import routes_admin
+from app.api.routing import GenappRoute
+from app.utils import admin, profiling
+
+TOKEN = {"X-Admin-Token": "s3cret"}
+
+
+def _crunch(n: int) -> int:
+    return sum(i * i for i in range(n))
+
+
+def _sync_work() -> int:
+    time.sleep(0.05)  # long enough for a few samples
+    return _crunch(20_000)
+
+
+async def _async_work() -> int:
+    await asyncio.sleep(0.01)
+    return _crunch(20_000)
+
+
+def _client(tmp_path, monkeypatch, keep: int = 50) -> TestClient:
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "s3cret")
+    monkeypatch.setattr(profiling, "state", profiling.ProfilingState(enabled=False, mode="sample"))
+    monkeypatch.setattr(profiling, "store", profiling.ProfileStore(tmp_path / "profiles", keep))
+    router = APIRouter(route_class=GenappRoute)
+
+    @router.get("/sync")
+    def sync_endpoint():
+        return {"value": _sync_work()}
+
+    @router.get("/async")
+    async def async_endpoint():
+        return {"value": await _async_work()}
+
+    app = FastAPI()
+    app.add_middleware(profiling.ProfilingMiddleware)
+    app.include_router(router)
+    app.include_router(routes_admin.router)
+    return TestClient(app)
+
+
+def _functions(path) -> set[str]:
+    return {name for _, _, name in pstats.Stats(str(path)).stats}
+
+
+def test_x_profile_header_needs_the_admin_token(tmp_path, monkeypatch):
+    client = _client(tmp_path, monkeypatch)
+    assert "x-profile-id" not in client.get("/sync").headers
+    assert "x-profile-id" not in client.get("/sync", headers={"X-Profile": "cprofile", "X-Admin-Token": "wrong"}).headers
+
+    sampled = client.get("/sync", headers={"X-Profile": "sample", **TOKEN})
+    name = sampled.headers["x-profile-id"]
+    assert name.endswith("-get-sync.collapsed")
+    assert "_sync_work" in profiling.store.path_for(name).read_text(encoding="utf-8")
+
+    profiled = client.get("/sync", headers={"X-Profile": "cprofile", **TOKEN})
+    assert "_crunch" in _functions(profiling.store.path_for(profiled.headers["x-profile-id"]))
+
+
+def test_coroutine_endpoints_are_profiled(tmp_path, monkeypatch):
+    client = _client(tmp_path, monkeypatch)
+    response = client.get("/async", headers={"X-Profile": "cprofile", **TOKEN})
+    assert response.json()["value"] == _crunch(20_000)
+    functions = _functions(profiling.store.path_for(response.headers["x-profile-id"]))
+    assert {"async_endpoint", "_async_work", "_crunch"} <= functions
+
+
+def test_admin_toggle_profiles_every_request_and_keeps_the_newest(tmp_path, monkeypatch):
+    client = _client(tmp_path, monkeypatch, keep=2)
+    assert client.get("/api/admin/profiling").status_code == 403
+    assert client.put("/api/admin/profiling", params={"enabled": True, "mode": "flame"}, headers=TOKEN).status_code == 400
+    toggled = client.put("/api/admin/profiling", params={"enabled": True, "mode": "cprofile"}, headers=TOKEN)
+    assert toggled.json() == {"enabled": True, "mode": "cprofile"}
+
+    names = [client.get(path).headers["x-profile-id"] for path in ("/sync", "/async", "/async")]
+    listed = client.get("/api/admin/profiles", headers=TOKEN).json()
+    assert {entry["name"] for entry in listed} == set(names[1:])  # admin calls are not profiled, oldest pruned
+    download = client.get(f"/api/admin/profiles/{names[2]}", headers=TOKEN)
+    assert download.status_code == 200 and download.content
+    assert client.get("/api/admin/profiles/..%2Fsecret", headers=TOKEN).status_code == 404
+
+    client.put("/api/admin/profiling", params={"enabled": False}, headers=TOKEN)
+    assert "x-profile-id" not in client.get("/sync").headers
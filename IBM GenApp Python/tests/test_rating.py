@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+from datetime import date
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.api import routes_quotes
+from app.db import models
+from app.schemas.customers import CustomerCreate
+from app.schemas.policies import MotorPolicyCreate
+from app.services import changes, customers, policies, rating
+from app.utils.errors import CobolError
+
+
+AS_OF = date(2026, 6, 1)
+
+
+def test_rate_applies_bands_and_matches_single_quotes():
+    result = rating.rate(
+        [4999, 5000, 70000, None],
+        [1400, 999, 3000, None],
+        ["2025-01-01", "2018-05-05", "1990", None],
+        [0, 1, 9, None],
+        as_of=AS_OF,
+    )
+    assert result.factors["value"].tolist() == [0.7, 1.0, 3.5, 1.0]
+    assert result.factors["cc"].tolist() == [1.15, 0.85, 1.6, 1.0]
+    assert result.factors["vehicle_age"].tolist() == [1.2, 0.9, 1.1, 1.0]
+    assert result.factors["accidents"].tolist() == [1.0, 1.25, 2.1, 1.0]
+    expected = np.rint(np.maximum(400 * 0.7 * 1.15 * 1.2 * 1.0, 100))
+    assert result.premiums[0] == expected
+
+    risks = [
+        {"value": v, "cc": c, "manufactured": m, "accidents": a}
+        for v, c, m, a in [(4999, 1400, "2025-01-01", 0), (5000, 999, "2018-05-05", 1), (70000, 3000, "1990", 9)]
+    ]
+    batch = rating.quote_batch(risks, as_of=AS_OF)
+    assert batch["premiums"] == [rating.quote(r, as_of=AS_OF)["premium"] for r in risks]
+    assert batch["premiums"] == result.premiums[:3].tolist()
+
+    with pytest.raises(ValueError):
+        rating.RatingTables.from_spec({**rating.DEFAULT_TABLES, "cc": {"bounds": [2, 1], "factors": [1, 1, 1]}})
+    with pytest.raises(CobolError):
+        rating.quote_batch([{}] * (rating.QUOTE_BATCH_MAX + 1))
+
+
+def test_quote_endpoints():
+    app = FastAPI()
+    app.include_router(routes_quotes.router)
+
+    with TestClient(app) as client:
+        single = client.post("/api/quotes/motor?as_of=2026-06-01", json={"value": 12000, "cc": 1600, "manufactured": "2020-01-01", "accidents": 1})
+        assert single.status_code == 200
+        batch = client.post(
+            "/api/quotes/motor/batch",
+            json={"as_of": "2026-06-01", "explain": True, "risks": [{"value": 12000, "cc": 1600, "manufactured": "2020-01-01", "accidents": 1}] * 3000},
+        )
+        body = batch.json()
+        assert body["count"] == 3000 and set(body["premiums"]) == {single.json()["premium"]}
+        assert body["factors"]["accidents"][0] == 1.25
+        assert client.post("/api/quotes/motor/batch", json={"risks": [{"value": -1}]}).status_code == 422
+
+
+def test_rerate_book_writes_changed_premiums_only(tmp_factory):
+    with tmp_factory() as db:
+        cust = customers.create_customer(db, CustomerCreate(first_name="RATE", last_name="ME")).id
+        risk = {"value": 12000, "cc": 1600, "manufactured": "2020-01-01", "accidents": 0}
+        current = rating.quote(risk, as_of=AS_OF)["premium"]
+        ids = [
+            policies.create_policy_motor(
+                db, MotorPolicyCreate(customer_id=cust, make="VW", model="GOLF", reg_number="AB12CDE", premium=premium, **risk)
+            ).id
+            for premium in (current, 1, None)
+        ]
+
+    assert rating.rerate_book(tmp_factory, chunk_size=2, as_of=AS_OF, dry_run=True).changed == 2
+    stats = rating.rerate_book(tmp_factory, chunk_size=2, as_of=AS_OF)
+    assert (stats.rated, stats.changed, stats.chunks) == (3, 2, 2)
+    with tmp_factory() as db:
+        premiums = dict(db.execute(select(models.MotorPolicy.policy_id, models.MotorPolicy.premium)).all())
+        assert [premiums[i] for i in ids] == [current] * 3
+        events = db.scalars(select(models.Event).where(models.Event.action == "rerate")).all()
+        assert [e.entity_id for e in events] == ids[1:]
+        assert json.loads(events[0].diff) == {"premium": [1, current]}
+        feed = [c for c in changes.list_changes(db, limit=100) if c["op"] == "update"]
+        assert [(c["entity_type"], c["entity_id"]) for c in feed] == [("policy_motor", i) for i in ids[1:]]
+    assert rating.rerate_book(tmp_factory, as_of=AS_OF).changed == 0
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db.migrations import init_db
+from app.db.session import RoutingSession, _read_only_sqlite_url
+from app.schemas.customers import CustomerCreate
+from app.services import customers
+
+
+def test_reads_use_read_engine_until_session_writes(tmp_path):
+    url = f"sqlite:///{tmp_path / 'routing.db'}"
+    writer = create_engine(url)
+    init_db(writer)
+    reader = create_engine(_read_only_sqlite_url(url))
+    hits = {"reader": 0, "writer": 0}
+    event.listen(reader, "before_cursor_execute", lambda *a: hits.__setitem__("reader", hits["reader"] + 1))
+    event.listen(writer, "before_cursor_execute", lambda *a: hits.__setitem__("writer", hits["writer"] + 1))
+    session_class = type("TestRoutingSession", (RoutingSession,), {"read_bind": reader})
+    factory = sessionmaker(bind=writer, class_=session_class, autoflush=False)
+
+    with factory() as db:
+        assert customers.list_customers(db) == []
+        assert hits == {"reader": 1, "writer": 0}
+        created = customers.create_customer(db, CustomerCreate(first_name="READ", last_name="ROUTING"))
+        writes = hits["writer"]
+        assert [c.id for c in customers.list_customers(db)] == [created.id]
+        assert hits["reader"] == 1 and hits["writer"] == writes + 1  # sticky after the write
+
+    with factory() as db:
+        assert customers.get_customer(db, created.id).first_name == "READ"
+        assert hits["reader"] == 2
+    reader.dispose()
+    writer.dispose()
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import json
+from datetime import date
+
+import numpy as np
+import pytest
+from sqlalchemy import select
+
+from app.db import counts, models
+from app.schemas.customers import CustomerCreate
+from app.schemas.policies import CommercialPolicyCreate, HousePolicyCreate, MotorPolicyCreate
+from app.services import changes, customers, policies, renewals
+from app.utils.errors import CobolError
+
+
+def test_add_months_clamps_to_month_end():
+    days = np.array(["2026-01-31", "2028-02-29", "2026-06-15"], dtype="datetime64[D]")
+    assert list(renewals.add_months(days, 12).astype(object)) == [date(2027, 1, 31), date(2029, 2, 28), date(2027, 6, 15)]
+    assert renewals.add_months(days[:1], 1).astype(object)[0] == date(2026, 2, 28)
+
+
+def test_renewal_job_renews_window_once_and_resumes(tmp_factory, monkeypatch):
+    with tmp_factory() as db:
+        cust = customers.create_customer(db, CustomerCreate(first_name="RENEW", last_name="ME")).id
+        motors = [
+            policies.create_policy_motor(
+                db,
+                MotorPolicyCreate(
+                    customer_id=cust, make="VW", model="GOLF", reg_number="AB12CDE", premium=1000, accidents=n % 2,
+                    expiry_date=date(2026, 1, 1 + n), payment=100,
+                ),
+            ).id
+            for n in range(5)
+        ]
+        house = policies.create_policy_house(
+            db,
+            HousePolicyCreate(
+                customer_id=cust, property_type="FLAT", bedrooms=2, value=1000, postcode="AB1 2CD",
+                expiry_date=date(2026, 1, 31),
+            ),
+        ).id
+        commercial = policies.create_policy_commercial(
+            db,
+            CommercialPolicyCreate(
+                customer_id=cust, address="1 MAIN ST", postcode="SO1", fire_premium=200, expiry_date=date(2026, 1, 10)
+            ),
+        ).id
+        outside = policies.create_policy_house(
+            db,
+            HousePolicyCreate(
+                customer_id=cust, property_type="FLAT", bedrooms=2, value=1000, postcode="AB1 2CD",
+                expiry_date=date(2026, 3, 1),
+            ),
+        ).id
+        events_before = counts.current(db)["events"]
+
+    with pytest.raises(CobolError):
+        renewals.renew_expiring(date(2026, 1, 1), date(2027, 1, 1), factory=tmp_factory)
+
+    # the third motor chunk fails: two chunks stay committed and checkpointed
+    calls = {"n": 0}
+    apply_updates = renewals.apply_updates
+
+    def flaky(db, table, key, updates):
+        if table is models.Policy.__table__:
+            calls["n"] += 1
+            if calls["n"] == 3:
+                raise RuntimeError("crash")
+        return apply_updates(db, table, key, updates)
+
+    monkeypatch.setattr(renewals, "apply_updates", flaky)
+    with pytest.raises(RuntimeError):
+        renewals.renew_expiring(date(2026, 1, 1), date(2026, 1, 31), policy_types=["M"], factory=tmp_factory, chunk_size=2)
+    monkeypatch.setattr(renewals, "apply_updates", apply_updates)
+
+    stats = renewals.renew_expiring(date(2026, 1, 1), date(2026, 1, 31), factory=tmp_factory, chunk_size=2, workers=4)
+    assert stats.resumed and stats.renewed == {"M": 5, "H": 1, "E": 0, "C": 1}
+
+    with tmp_factory() as db:
+        rows = {p.id: p for p in db.scalars(select(models.Policy))}
+        assert [rows[p].expiry_date for p in motors] == [date(2027, 1, 1 + n) for n in range(5)]
+        assert rows[motors[0]].issue_date == date(2026, 1, 2) and rows[motors[0]].payment == 103
+        premiums = dict(db.execute(select(models.MotorPolicy.policy_id, models.MotorPolicy.premium)).all())
+        assert [premiums[p] for p in motors] == [1030, 1130, 1030, 1130, 1030]
+        assert rows[house].expiry_date == date(2027, 1, 31) and rows[house].payment is None
+        assert db.scalar(select(models.CommercialPolicy.fire_premium).where(models.CommercialPolicy.policy_id == commercial)) == 206
+        assert rows[outside].expiry_date == date(2026, 3, 1)
+
+        assert counts.current(db)["events"] == events_before + 7
+        history = db.scalars(select(models.Event).where(models.Event.action == "renew", models.Event.entity_id == motors[1])).all()
+        assert len(history) == 1
+        assert json.loads(history[0].diff)["premium"] == [1000, 1130]
+        feed = [c for c in changes.list_changes(db, limit=1000) if c["op"] == "update"]
+        assert sum(1 for c in feed if c["entity_type"] == "policy_motor") == 5
+        assert sum(1 for c in feed if c["entity_type"] == "policy") == 7
+
+    # finished window: nothing is renewed twice
+    again = renewals.renew_expiring(date(2026, 1, 1), date(2026, 1, 31), factory=tmp_factory)
+    assert again.chunks == 0 and again.renewed["M"] == 5
+    with tmp_factory() as db:
+        assert db.get(models.Policy, motors[0]).expiry_date == date(2027, 1, 1)
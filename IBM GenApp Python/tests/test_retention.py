@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from app.db import counts, models, retention
+from app.services import aio, events
+
+
+def test_compaction_archives_by_month_and_listing_spills_over(tmp_engine, tmp_factory, tmp_path, monkeypatch):
+    archive = tmp_path / "archive"
+    monkeypatch.setattr(retention, "ARCHIVE_DIR", str(archive))
+    now = datetime(2026, 6, 15, 12, 0)
+    rows = [
+        {"created_at": now - timedelta(days=d), "source": "claims" if d // 10 % 2 else "policies", "level": "INFO", "message": f"e{d}"}
+        for d in range(0, 120, 10)  # 12 events, newest first
+    ]
+    with tmp_engine.begin() as conn:
+        conn.execute(insert(models.Event), rows)
+    counts.reconcile(tmp_engine)
+
+    result = retention.compact(tmp_engine, archive, retention_days=45, chunk=2, now=now)
+    assert result.last_archived == 7  # days 50..110
+    assert [p.name for p in retention.archives(archive)] == ["events-2026-04.db", "events-2026-03.db", "events-2026-02.db"]
+
+    with tmp_factory() as db:
+        assert counts.current(db)["events"] == 5
+        page = events.list_events(db, limit=4, offset=3)
+        assert [e.message for e in page] == ["e30", "e40", "e50", "e60"]
+        assert [e.message for e in events.list_events(db, limit=3, offset=9)] == ["e90", "e100", "e110"]
+        assert [e.message for e in events.list_events(db, source="claims", limit=10, offset=1)] == [
+            "e30", "e50", "e70", "e90", "e110"
+        ]
+        days = {r.day: r.count for r in events.list_rollups(db)}
+        assert sum(days.values()) == 11  # all complete days, including the archived ones
+        assert date(2026, 2, 25) in days
+
+    # a second run only rolls up new days and finds nothing more to move
+    assert retention.compact(tmp_engine, archive, retention_days=45, now=now).last_archived == 0
+    assert retention.state.last_rolled_days == 0
+
+
+def test_async_listing_spills_over_like_the_sync_one(tmp_engine, tmp_factory, tmp_path, monkeypatch):
+    pytest.importorskip("aiosqlite")
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    archive = tmp_path / "archive"
+    monkeypatch.setattr(retention, "ARCHIVE_DIR", str(archive))
+    now = datetime(2026, 6, 15, 12, 0)
+    rows = [{"created_at": now - timedelta(days=d), "source": "claims", "level": "INFO", "message": f"e{d}"} for d in range(0, 120, 10)]
+    with tmp_engine.begin() as conn:
+        conn.execute(insert(models.Event), rows)
+    retention.compact(tmp_engine, archive, retention_days=45, now=now)
+
+    async def pages():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_engine.url.database}")
+        try:
+            async with AsyncSession(engine) as db:
+                return [[e["message"] for e in await aio.list_events(db, limit=4, offset=o, rows=True)] for o in (0, 3, 9)]
+        finally:
+            await engine.dispose()
+
+    with tmp_factory() as db:
+        expected = [[e["message"] for e in events.list_events(db, limit=4, offset=o, rows=True)] for o in (0, 3, 9)]
+    assert asyncio.run(pages()) == expected == [["e0", "e10", "e20", "e30"], ["e30", "e40", "e50", "e60"], ["e90", "e100", "e110"]]
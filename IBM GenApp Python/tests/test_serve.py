@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+import pytest
+
+from app import serve
+from app.db import writer
+
+
+def test_write_queue_is_refused_with_several_workers(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)  # main() changes into the project folder
+    monkeypatch.setattr(writer, "WRITE_QUEUE", True)
+    with pytest.raises(SystemExit) as exc:
+        serve.main(["--workers", "2"])
+    assert exc.value.code == 2 and "GENAPP_WRITE_QUEUE" in capsys.readouterr().err
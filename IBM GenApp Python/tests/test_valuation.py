@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+from contextlib import contextmanager
+from datetime import date
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import routes_valuation
+from app.db import snapshot
+from app.schemas.customers import CustomerCreate
+from app.schemas.policies import EndowmentPolicyCreate
+from app.services import customers, policies, valuation
+
+
+def test_basis_building_blocks(tmp_path):
+    assert valuation.whole_years(
+        np.array(["2000-02-29", "2000-06-15"], dtype="datetime64[D]"),
+        np.array(["2001-02-28", "2010-06-15"], dtype="datetime64[D]"),
+    ).tolist() == [0, 10]
+    v = valuation.discount_factors("0.05,0.10")
+    assert v[:4] == pytest.approx([1, 1 / 1.05, 1 / (1.05 * 1.1), 1 / (1.05 * 1.1**2)])
+
+    table = tmp_path / "qx.csv"
+    table.write_text("age,qx\n0,0.01\n50,0.02\n")
+    qx = valuation.load_qx(str(table))
+    assert qx[49] == 0.01 and qx[120] == 0.02
+
+    # no deaths: A(x:n) = v^n and ä(x:n) = sum of v^k
+    flat = valuation.Basis(qx=np.zeros(valuation.MAX_AGE + 1), discount=valuation.discount_factors("0.04"), bonus_rate=0)
+    assurance, annuity = valuation.assurance_annuity(flat, np.array([30, 60]), np.array([10, 0]))
+    assert assurance.tolist() == pytest.approx([1.04**-10, 0])
+    assert annuity.tolist() == pytest.approx([sum(1.04**-k for k in range(10)), 0])
+
+
+def test_reserves_and_ndjson_stream(tmp_factory, monkeypatch):
+    with tmp_factory() as db:
+        insured = customers.create_customer(db, CustomerCreate(first_name="LIFE", last_name="ASSURED", date_of_birth=date(1980, 5, 1))).id
+        unknown = customers.create_customer(db, CustomerCreate(first_name="NO", last_name="BIRTHDAY")).id
+
+        def endowment(customer_id, issued, with_profits="N"):
+            return policies.create_policy_endowment(
+                db,
+                EndowmentPolicyCreate(
+                    customer_id=customer_id, issue_date=issued, fund_name="GROWTH", term=10,
+                    sum_assured=100_000, with_profits=with_profits,
+                ),
+            ).id
+
+        new = endowment(insured, date(2026, 6, 1))
+        running = endowment(insured, date(2021, 6, 1))
+        bonus = endowment(insured, date(2021, 6, 1), "Y")
+        matured = endowment(unknown, date(2010, 1, 1))
+        future = endowment(unknown, date(2027, 1, 1))
+
+    when = date(2026, 6, 1)
+    with tmp_factory() as db:
+        batches = list(valuation.iter_valuation(db, when, batch_size=2))
+    assert [len(b) for b in batches] == [2, 2, 1]
+    result = {item["policy_id"]: item for batch in batches for item in batch}
+    assert result[new]["entry_age"] == 46 and result[new]["reserve"] == pytest.approx(0, abs=0.01)
+    assert result[running]["duration"] == 5 and result[running]["reserve"] > 0
+    assert result[running]["net_premium"] > 0
+    assert result[running]["pv_benefits"] - result[running]["pv_premiums"] == pytest.approx(result[running]["reserve"], abs=0.02)
+    assert result[bonus]["sum_assured"] == 110_000 and result[bonus]["reserve"] > result[running]["reserve"]
+    assert result[matured]["entry_age"] == valuation.DEFAULT_ENTRY_AGE
+    assert (result[matured]["status"], result[matured]["reserve"]) == ("matured", 0)
+    assert (result[future]["status"], result[future]["reserve"]) == ("not_started", pytest.approx(0, abs=0.01))
+
+    @contextmanager
+    def session():
+        with tmp_factory() as db:
+            yield db
+
+    monkeypatch.setattr(snapshot, "snapshot_session", session)
+    app = FastAPI()
+    app.include_router(routes_valuation.router)
+    with TestClient(app) as client:
+        response = client.get("/api/valuation/endowment", params={"valuation_date": "2026-06-01", "batch_size": 2})
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["policy_id"] for line in lines] == [new, running, bonus, matured, future]
+        assert lines[1] == result[running]
+        summary = client.get("/api/valuation/endowment/summary", params={"valuation_date": "2026-06-01"}).json()
+        assert summary["policies"] == 5 and summary["in_force"] == 3
+        assert summary["reserve"] == pytest.approx(sum(item["reserve"] for item in result.values()), abs=0.05)
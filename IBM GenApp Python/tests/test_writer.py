@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.api import routes_claims, routes_customers
+from app.db import models, writer
+from app.db.migrations import init_db
+from app.db.session import RoutingSession, _read_only_sqlite_url, get_db
+from app.db.writer import WriteCoordinator, writer_engine
+from app.schemas.claims import ClaimCreate
+from app.schemas.customers import CustomerCreate
+from app.services import claims, customers
+from app.utils.errors import CobolError
+
+
+@pytest.fixture()
+def coordinator(tmp_path):
+    engine = writer_engine(f"sqlite:///{tmp_path / 'writer.db'}")
+    init_db(engine)
+    coord = WriteCoordinator(engine, window=0.02, max_batch=32)
+    yield coord
+    coord.stop()
+    engine.dispose()
+
+
+def test_group_commit_isolates_failing_operations(coordinator):
+    def submit(i: int):
+        if i % 5 == 0:
+            return coordinator.submit(claims.create_claim, ClaimCreate(policy_id=999))
+        return coordinator.submit(customers.create_customer, CustomerCreate(first_name=f"N{i}", last_name="WRITER"))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = list(pool.map(submit, range(40)))
+
+    created = []
+    for i, future in enumerate(futures):
+        if i % 5 == 0:
+            with pytest.raises(CobolError):
+                future.result(timeout=10)
+        else:
+            created.append(future.result(timeout=10))
+
+    assert len({c.customer_number for c in created}) == 32
+    assert created[0].first_name == "N1"  # detached results keep their loaded attributes
+    assert coordinator.stats["ops"] == 40
+    assert coordinator.stats["failed_ops"] == 8
+    assert coordinator.stats["batches"] < 40
+
+    with coordinator.engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(models.Customer)).scalar_one() == 32
+        assert conn.execute(select(func.count()).select_from(models.Event)).scalar_one() == 32
+        assert conn.execute(select(models.Counter.value).where(models.Counter.name == "GENACUSTNUM")).scalar_one() == 32
+
+
+@pytest.fixture()
+def queued(tmp_path, monkeypatch):
+    """Write queue switched on for a temp database; request sessions read from a read-only engine."""
+    url = f"sqlite:///{tmp_path / 'queued.db'}"
+    writer_db = writer_engine(url)
+    init_db(writer_db)
+    primary, reader = create_engine(url), create_engine(_read_only_sqlite_url(url))
+    hits = {"reader": 0}
+    event.listen(reader, "before_cursor_execute", lambda *a: hits.__setitem__("reader", hits["reader"] + 1))
+    session_class = type("QueuedRoutingSession", (RoutingSession,), {"read_bind": reader})
+    factory = sessionmaker(bind=primary, class_=session_class, autoflush=False)
+
+    def install(**options) -> WriteCoordinator:
+        coord = WriteCoordinator(writer_db, **{"window": 0.02, **options})
+        monkeypatch.setattr(writer, "_coordinator", coord)
+        return coord
+
+    monkeypatch.setattr(writer, "WRITE_QUEUE", True)
+    yield factory, install, hits
+    writer.shutdown()
+    for engine in (writer_db, primary, reader):
+        engine.dispose()
+
+
+def _client(factory) -> TestClient:
+    def session():
+        with factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(routes_customers.router)
+    app.include_router(routes_claims.router)
+    app.dependency_overrides[get_db] = session
+    return TestClient(app)
+
+
+def test_routed_http_writes_go_through_the_queue(queued):
+    factory, install, _ = queued
+    coord = install()
+    client = _client(factory)
+
+    created = client.post("/api/customers", json={"first_name": "QUEUED", "last_name": "HTTP"})
+    assert created.status_code == 201, created.text
+    customer_id = created.json()["id"]
+    updated = client.put(f"/api/customers/{customer_id}", json={"postcode": "WQ1 1AA"})
+    assert updated.status_code == 200 and updated.json()["postcode"] == "WQ1 1AA"
+    assert client.post("/api/claims", json={"policy_id": 999, "value": 1}).status_code == 404
+    assert client.get(f"/api/customers/{customer_id}").json()["postcode"] == "WQ1 1AA"
+    assert (coord.stats["ops"], coord.stats["failed_ops"]) == (3, 1)
+
+
+def test_routed_batch_rolls_back_only_the_failing_call(queued):
+    factory, install, _ = queued
+    coord = install(window=0.2)
+    gate = threading.Barrier(8)
+
+    def call(i: int):
+        with factory() as db:
+            gate.wait()  # all eight land in the same collection window
+            if i % 4 == 0:
+                with pytest.raises(CobolError):
+                    claims.create_claim(db, ClaimCreate(policy_id=999))
+                return None
+            return customers.create_customer(db, CustomerCreate(first_name=f"B{i}", last_name="BATCH")).customer_number
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        numbers = [n for n in pool.map(call, range(8)) if n is not None]
+
+    assert len(set(numbers)) == 6
+    assert coord.stats["batches"] < coord.stats["ops"] == 8 and coord.stats["failed_ops"] == 2
+    with factory() as db:
+        assert sorted(db.scalars(select(models.Customer.customer_number)).all()) == sorted(numbers)
+
+
+def test_routed_write_is_read_back_from_the_primary(queued):
+    factory, install, hits = queued
+    install()
+    with factory() as db:
+        assert customers.list_customers(db) == []
+        assert hits["reader"] == 1
+        created = customers.create_customer(db, CustomerCreate(first_name="OWN", last_name="WRITE"))
+        assert not db.new and not db.dirty  # written by the writer thread, not this session
+        assert [c.id for c in customers.list_customers(db)] == [created.id]
+        assert hits["reader"] == 1
+
+
+def test_write_timeout_and_full_queue_are_shed_with_503(queued):
+    factory, install, _ = queued
+    coord = install(timeout=0.1, max_queue=1)
+    client = _client(factory)
+    running, release = threading.Event(), threading.Event()
+
+    def block(db):
+        running.set()
+        release.wait(10)
+
+    coord.submit(block)
+    running.wait(5)  # the writer thread is busy with a closed batch
+
+    try:
+        timed_out = client.post("/api/customers", json={"first_name": "TOO", "last_name": "LATE"})
+        assert timed_out.status_code == 503 and "Zeitlimit" in timed_out.json()["detail"]
+        # the cancelled call still sits in the queue until the writer reaches it
+        full = client.post("/api/customers", json={"first_name": "NO", "last_name": "ROOM"})
+        assert full.status_code == 503 and "voll" in full.json()["detail"]
+        assert coord.shed == {"89": 1, "88": 1}
+    finally:
+        release.set()
+
+    coord.timeout = 10  # the writer still has to drain the cancelled call; don't race it on a busy machine
+    assert client.post("/api/customers", json={"first_name": "IN", "last_name": "TIME"}).status_code == 201
+    with factory() as db:
+        assert db.scalars(select(models.Customer.first_name)).all() == ["IN"]  # the timed-out call never ran
+
+
+def test_sessions_on_another_database_write_directly(queued, tmp_path):
+    _, install, _ = queued
+    coord = install()
+    other = create_engine(f"sqlite:///{tmp_path / 'other.db'}")
+    init_db(other)
+    with sessionmaker(bind=other, autoflush=False)() as db:
+        assert not writer.queued(db)
+        created = customers.create_customer(db, CustomerCreate(first_name="OTHER", last_name="ENGINE"))
+        assert db.get(models.Customer, created.id).first_name == "OTHER"
+    assert coord.stats["ops"] == 0
+    with coord.engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(models.Customer)).scalar_one() == 0
+    other.dispose()
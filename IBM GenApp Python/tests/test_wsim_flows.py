@@ -7,8 +7,8 @@ from fastapi.testclient import TestClient
 # Ensure isolated SQLite DB for tests (in temp dir to avoid perms)
 TEST_DB = Path("test_output") / "test_genapp_wsim.db"
 TEST_DB.parent.mkdir(parents=True, exist_ok=True)
-if TEST_DB.exists():
-    TEST_DB.unlink()
+for side in ("", "-wal", "-shm"):  # the app runs SQLite in WAL mode
+    Path(f"{TEST_DB}{side}").unlink(missing_ok=True)
 os.environ["DATABASE_URL"] = f"sqlite:///{TEST_DB}"  # type: ignore
 
 from app.main import create_app  # noqa: E402
@@ -16,8 +16,8 @@ from app.utils import datasets  # noqa: E402
 
 
 def teardown_module(module):  # noqa: D401
-    if TEST_DB.exists():
-        TEST_DB.unlink()
+    for side in ("", "-wal", "-shm"):
+        Path(f"{TEST_DB}{side}").unlink(missing_ok=True)
     try:
         TEST_DB.parent.rmdir()
     except OSError: